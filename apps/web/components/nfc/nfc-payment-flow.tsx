@@ -1,6 +1,6 @@
 'use client';
 
-import React, { useState } from 'react';
+import React, { useRef, useState } from 'react';
 import { useNFC } from '../../hooks/useNFC';
 import { NFCMemberCard, NFCPaymentRequest } from '../../types/nfc';
 
@@ -21,6 +21,8 @@ export const NFCPaymentFlow: React.FC<NFCPaymentFlowProps> = ({
     notes: '',
     timestamp: new Date()
   });
+  // Idempotency-Key of the payment being attempted; reused only when retrying it
+  const attempt = useRef<{ key: string; cents: number } | null>(null);
 
   const handleStartPayment = async () => {
     await startPayment(myCard, theirCard);
@@ -30,9 +32,13 @@ export const NFCPaymentFlow: React.FC<NFCPaymentFlowProps> = ({
     try {
       // First, create a PaymentIntent on the server
       const cents = Math.round((paymentRequest.amount || 0) * 100);
+      if (!attempt.current || attempt.current.cents !== cents) {
+        attempt.current = { key: crypto.randomUUID(), cents };
+      }
+      const headers = { 'Content-Type': 'application/json', 'Idempotency-Key': attempt.current.key };
       const res = await fetch('/api/stripe/create-payment-intent', {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers,
         body: JSON.stringify({ amount: cents, currency: 'usd' })
       });
 
@@ -46,7 +52,7 @@ export const NFCPaymentFlow: React.FC<NFCPaymentFlowProps> = ({
       // For demo mode: confirm the PaymentIntent on the server using a test PM
       const conf = await fetch('/api/stripe/confirm-payment-intent', {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers,
         body: JSON.stringify({ intent_id: intentId })
       });
 
@@ -54,6 +60,8 @@ export const NFCPaymentFlow: React.FC<NFCPaymentFlowProps> = ({
       if (!confJson.success) {
         throw new Error(confJson.error || 'Failed to confirm payment');
       }
+      // Paid: the next payment, even of the same amount, is a new attempt
+      attempt.current = null;
 
       // Complete NFC-specific processing (tokenize, record transaction)
       const success = await processPayment(paymentRequest);
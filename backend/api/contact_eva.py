@@ -2,15 +2,27 @@
 PMC Founding Members signup endpoint.
 Accepts POST requests with member details and logs/stores signups.
 """
-from flask import Blueprint, request, jsonify
-from datetime import datetime
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from datetime import datetime, timezone
+import csv
+import hmac
+import io
 import json
 import os
 
+from group_commit import CommitPendingError
+from signup_store import DuplicateSignupError, append_signup, get_signup_store, signup_store_info
+
 contact_eva_bp = Blueprint('contact_eva', __name__)
 
-# Log file for PMC signups
-SIGNUPS_LOG = os.path.join(os.path.dirname(__file__), '../pmc_signups.json')
+# Bearer token for reading signups back (unset = listing disabled)
+SIGNUPS_ADMIN_TOKEN = os.getenv('SIGNUPS_ADMIN_TOKEN')
+
+# Largest page the listing endpoint returns
+SIGNUPS_PAGE_MAX = int(os.getenv('SIGNUPS_PAGE_MAX', '500'))
+
+EXPORT_COLUMNS = ('signup_id', 'timestamp', 'name', 'pmc_id', 'email', 'business', 'plan', 'price')
+EXPORT_MIMETYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
 
 @contact_eva_bp.route('/contact-eva', methods=['POST'])
 def contact_eva():
@@ -46,21 +58,18 @@ def contact_eva():
             'price': data.get('price', 24.99)
         }
         
-        # Load existing signups or create new list
-        signups = []
-        if os.path.exists(SIGNUPS_LOG):
-            try:
-                with open(SIGNUPS_LOG, 'r') as f:
-                    signups = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                signups = []
-        
-        # Append new signup
-        signups.append(signup)
-        
-        # Write back to file
-        with open(SIGNUPS_LOG, 'w') as f:
-            json.dump(signups, f, indent=2)
+        # Record the signup (safe across workers; duplicates are rejected)
+        try:
+            signup_id = append_signup(signup)
+        except DuplicateSignupError as e:
+            return jsonify({'error': str(e), 'field': e.field}), 409
+        except CommitPendingError:
+            # Group commit is slow but the signup is queued and will be saved; a retry would get a 409
+            return jsonify({
+                'status': 'pending',
+                'message': 'Thank you! Your PMC application has been received and is being saved. '
+                           'Please do not submit it again.'
+            }), 202
         
         # Log to console
         print(f"[PMC SIGNUP] {signup['name']} ({signup['pmc_id']}) - {signup['email']}")
@@ -68,9 +77,132 @@ def contact_eva():
         return jsonify({
             'status': 'success',
             'message': 'Thank you! Your PMC application has been received. We will contact you within 24 hours.',
-            'signup_id': len(signups)
+            'signup_id': signup_id
         }), 200
     
     except Exception as e:
         print(f"[PMC SIGNUP ERROR] {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
+
+
+def _authorized():
+    header = request.headers.get('Authorization', '')
+    return bool(SIGNUPS_ADMIN_TOKEN) and hmac.compare_digest(header, f'Bearer {SIGNUPS_ADMIN_TOKEN}')
+
+
+@contact_eva_bp.route('/signups', methods=['GET'])
+def list_signups():
+    """
+    Page through PMC signups, oldest first (requires SIGNUPS_ADMIN_TOKEN).
+
+    Query parameters:
+        after: signup_id the previous page ended on (keyset pagination)
+        limit: page size (default 50, at most SIGNUPS_PAGE_MAX)
+        pmc_id / email: look up a single signup instead
+    """
+    if not _authorized():
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+
+    try:
+        after = int(request.args.get('after', 0))
+        limit = min(max(int(request.args.get('limit', 50)), 1), SIGNUPS_PAGE_MAX)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'after and limit must be integers'}), 400
+
+    store = get_signup_store()
+    pmc_id, email = request.args.get('pmc_id'), request.args.get('email')
+    if pmc_id or email:
+        signup = store.find(pmc_id=pmc_id or None, email=email if not pmc_id else None)
+        signups, next_after = ([signup] if signup else []), None
+    else:
+        signups = store.page(after, limit)
+        next_after = signups[-1]['signup_id'] if len(signups) == limit else None
+
+    return jsonify({
+        'success': True,
+        'data': {
+            'signups': signups,
+            'next_after': next_after,
+            'backend': store.backend
+        }
+    })
+
+
+@contact_eva_bp.route('/signups/stats', methods=['GET'])
+def signup_stats():
+    """Signup store backend, count and durability mode (requires SIGNUPS_ADMIN_TOKEN)."""
+    if not _authorized():
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+    return jsonify({
+        'success': True,
+        'data': signup_store_info()
+    })
+
+
+def _export_timestamp(value, name):
+    """Query parameter as a naive-UTC ISO string comparable with stored timestamps."""
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an ISO date or timestamp (e.g. 2025-11-26 or 2025-11-26T23:15:00Z)')
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.isoformat()
+
+
+def _csv_cell(value):
+    # Spreadsheet apps evaluate text starting with these as a formula
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        return "'" + value
+    return value
+
+
+def _csv_rows(signups):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for signup in signups:
+        writer.writerow([_csv_cell(signup.get(column)) for column in EXPORT_COLUMNS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+@contact_eva_bp.route('/signups/export', methods=['GET'])
+def export_signups():
+    """
+    Stream every matching signup as NDJSON or CSV (requires SIGNUPS_ADMIN_TOKEN).
+
+    Rows are read from the store as they are sent, so the export never
+    sits in worker memory however long the list gets.
+
+    Query parameters:
+        format: ndjson (default) or csv
+        since: earliest timestamp, inclusive (ISO date or datetime, UTC if no offset)
+        until: latest timestamp, exclusive
+        plan: only signups on this plan (case-insensitive)
+    """
+    if not _authorized():
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_MIMETYPES:
+        return jsonify({'success': False, 'error': 'format must be ndjson or csv'}), 400
+    try:
+        since = _export_timestamp(request.args.get('since'), 'since')
+        until = _export_timestamp(request.args.get('until'), 'until')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    signups = get_signup_store().scan(since=since, until=until, plan=request.args.get('plan') or None)
+    if export_format == 'csv':
+        body = _csv_rows(signups)
+    else:
+        body = (json.dumps(signup) + '\n' for signup in signups)
+
+    filename = f"pmc_signups-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.{export_format}"
+    return Response(stream_with_context(body), mimetype=EXPORT_MIMETYPES[export_format],
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
@@ -1,9 +1,95 @@
 from flask import Blueprint, request, jsonify
+import hashlib
+import json
 import os
+import time
 import stripe
 
+from single_flight import SingleFlight
+from stripe_card_cache import get_card_cache
+from stripe_client import STRIPE_SECRET_KEY, configure_stripe
+from ttl_cache import MemoryTTLCache
+
 stripe_bp = Blueprint('stripe_payments', __name__)
 
+# API key, pooled HTTP client, timeouts and retries (stripe_client; once per process)
+configure_stripe()
+
+# Seconds a created/confirmed intent is replayed to retries of the same request
+STRIPE_INTENT_CACHE_TTL = float(os.getenv('STRIPE_INTENT_CACHE_TTL', '600'))
+
+# Opt-in: without an Idempotency-Key, identical intent creations from the
+# same address and user agent within this many seconds count as retries.
+# Off by default (0): two real payments of the same amount look identical,
+# and clients behind one NAT share an address.
+STRIPE_IDEMPOTENCY_WINDOW = int(os.getenv('STRIPE_IDEMPOTENCY_WINDOW', '0'))
+
+# Completed results by idempotency key, and calls still waiting on Stripe
+_intent_results = MemoryTTLCache(maxsize=int(os.getenv('STRIPE_INTENT_CACHE_SIZE', '4096')),
+                                 ttl=STRIPE_INTENT_CACHE_TTL)
+_intent_flight = SingleFlight()
+
+
+def _fingerprint(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _idempotency_key(operation, params, data, derive=True):
+    """
+    Stripe idempotency key for this request, or None when there is none.
+
+    A client-supplied key (Idempotency-Key header or "idempotency_key" in the
+    body) is used as-is. Otherwise, if derive is set and
+    STRIPE_IDEMPOTENCY_WINDOW is on, the key hashes the client (remote
+    address, user agent), the parameters and the current time slot.
+    """
+    client_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+    if client_key:
+        material = ['client', str(client_key)]
+    elif derive and STRIPE_IDEMPOTENCY_WINDOW > 0:
+        material = ['request', request.remote_addr, request.headers.get('User-Agent', ''),
+                    _fingerprint(params), int(time.time() // STRIPE_IDEMPOTENCY_WINDOW)]
+    else:
+        return None
+    return f"solvy-{operation}-{_fingerprint([operation] + material)}"
+
+
+def _idempotent(operation, params, data, call, derive=True):
+    """
+    Run call(idempotency_key) once per idempotency key.
+
+    Concurrent duplicates wait for the first call; later ones within
+    STRIPE_INTENT_CACHE_TTL get its stored result without contacting Stripe.
+    Failed calls aren't stored, so a retry after an error tries again (with
+    the same key, so Stripe still won't create a second object).
+
+    Returns:
+        tuple: (response body dict, HTTP status)
+    """
+    key = _idempotency_key(operation, params, data, derive)
+    if key is None:
+        return call(None), 200
+
+    fingerprint = _fingerprint(params)
+    cached = _intent_results.get(key)
+    if cached is None:
+        def run():
+            stored = _intent_results.get(key)
+            if stored is not None:
+                return stored
+            body = call(key)
+            stored = {'fingerprint': fingerprint, 'body': body}
+            _intent_results.set(key, stored)
+            return dict(stored, fresh=True)
+
+        cached, shared = _intent_flight.do(key, run)
+        if cached.get('fresh') and not shared:
+            return dict(cached['body'], idempotency_key=key, replayed=False), 200
+
+    if cached['fingerprint'] != fingerprint:
+        return {'success': False, 'error': 'Idempotency key was already used with different parameters'}, 409
+    return dict(cached['body'], idempotency_key=key, replayed=True), 200
+
 
 @stripe_bp.route('/create-payment-intent', methods=['POST', 'OPTIONS'])
 def create_payment_intent():
@@ -16,23 +102,25 @@ def create_payment_intent():
         amount = int(data.get('amount', 0))
         currency = data.get('currency', 'usd')
 
-        stripe_api_key = os.getenv('STRIPE_SECRET_KEY')
-
-        # If no Stripe key is configured, return a mock response for demo/testing.
-        if not stripe_api_key:
-            mock_id = f"mock_intent_{amount}_{currency}_{int(os.times()[4])}"
-            mock_client_secret = f"mock_client_secret_{mock_id}"
-            return jsonify({'success': True, 'client_secret': mock_client_secret, 'id': mock_id, 'mock': True})
-
-        stripe.api_key = stripe_api_key
-
-        intent = stripe.PaymentIntent.create(
-            amount=amount,
-            currency=currency,
-            automatic_payment_methods={'enabled': True},
-        )
-
-        return jsonify({'success': True, 'client_secret': intent.client_secret, 'id': intent.id})
+        def create(idempotency_key):
+            # If no Stripe key is configured, return a mock response for demo/testing.
+            if not STRIPE_SECRET_KEY:
+                mock_id = f"mock_intent_{amount}_{currency}_{int(os.times()[4])}"
+                mock_client_secret = f"mock_client_secret_{mock_id}"
+                return {'success': True, 'client_secret': mock_client_secret, 'id': mock_id, 'mock': True}
+
+            intent = stripe.PaymentIntent.create(
+                amount=amount,
+                currency=currency,
+                automatic_payment_methods={'enabled': True},
+                idempotency_key=idempotency_key
+            )
+            return {'success': True, 'client_secret': intent.client_secret, 'id': intent.id}
+
+        body, status = _idempotent('intent', {'amount': amount, 'currency': currency}, data, create)
+        return jsonify(body), status
+    except stripe.IdempotencyError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
@@ -48,21 +136,71 @@ def confirm_payment_intent():
         if not intent_id:
             return jsonify({'success': False, 'error': 'intent_id required'}), 400
 
-        stripe_api_key = os.getenv('STRIPE_SECRET_KEY')
-
         # If mock intent id, return success immediately for demo
         if intent_id and intent_id.startswith('mock_intent_'):
             return jsonify({'success': True, 'status': 'succeeded', 'id': intent_id, 'mock': True})
 
-        if not stripe_api_key:
+        if not STRIPE_SECRET_KEY:
             return jsonify({'success': False, 'error': 'Stripe secret key not configured on server'}), 500
 
-        stripe.api_key = stripe_api_key
+        def confirm(idempotency_key):
+            # For demo/testing: confirm using Stripe's test payment method
+            # NOTE: This approach is for demo only. In production, confirm on the client with a real payment method.
+            confirmed = stripe.PaymentIntent.confirm(intent_id, payment_method='pm_card_visa',
+                                                     idempotency_key=idempotency_key)
+            return {'success': True, 'status': confirmed.status, 'id': confirmed.id}
+
+        # Only a client key marks a retry; a guessed one could report a second
+        # confirmation as succeeded without it ever reaching Stripe
+        body, status = _idempotent('confirm', {'intent_id': intent_id}, data, confirm, derive=False)
+        return jsonify(body), status
+    except stripe.IdempotencyError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
 
-        # For demo/testing: confirm using Stripe's test payment method
-        # NOTE: This approach is for demo only. In production, confirm on the client with a real payment method.
-        confirmed = stripe.PaymentIntent.confirm(intent_id, payment_method='pm_card_visa')
 
-        return jsonify({'success': True, 'status': confirmed.status, 'id': confirmed.id})
-    except Exception as e:
+@stripe_bp.route('/idempotency/stats', methods=['GET'])
+def idempotency_stats():
+    """Replay cache and in-flight coalescing counts for payment intent calls."""
+    return jsonify({
+        'success': True,
+        'data': {
+            'cache': _intent_results.info(),
+            'in_flight': _intent_flight.info(),
+            'window_seconds': STRIPE_IDEMPOTENCY_WINDOW
+        }
+    })
+
+
+# Issuing events that change what the card cache holds
+CARD_CACHE_EVENTS = ('issuing_card.', 'issuing_cardholder.')
+
+
+@stripe_bp.route('/webhooks/issuing', methods=['POST'])
+def issuing_webhook():
+    """
+    Stripe Issuing webhook: card and cardholder changes invalidate the card cache.
+
+    Configure the endpoint in the Stripe dashboard for issuing_card.* and
+    issuing_cardholder.* events and set STRIPE_WEBHOOK_SECRET to its signing
+    secret.
+    """
+    webhook_secret = os.getenv('STRIPE_WEBHOOK_SECRET')
+    if not webhook_secret:
+        return jsonify({'success': False, 'error': 'Stripe webhook secret not configured on server'}), 500
+
+    try:
+        event = stripe.Webhook.construct_event(
+            request.get_data(),
+            request.headers.get('Stripe-Signature', ''),
+            webhook_secret
+        )
+    except (ValueError, stripe.SignatureVerificationError) as e:
         return jsonify({'success': False, 'error': str(e)}), 400
+
+    invalidated = event['type'].startswith(CARD_CACHE_EVENTS)
+    if invalidated:
+        get_card_cache().invalidate()
+
+    return jsonify({'success': True, 'type': event['type'], 'invalidated': invalidated})
@@ -1,3 +1,5 @@
+import itertools
+import json
 import os
 import sys
 from pathlib import Path
@@ -6,7 +8,7 @@ from pathlib import Path
 backend_dir = Path(__file__).parent
 sys.path.insert(0, str(backend_dir))
 
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
 from flask_cors import CORS
 
 # Create Flask app
@@ -17,13 +19,26 @@ app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'solvy-mvp-secret-key-2025')
 CORS(app, resources={r"/*": {"origins": "*"}})
 
 # Initialize services
-from tax_calculations import TaxAssistant
+from tax_calculations import TaxAssistant, compare_w2_vs_self_employment, optimize_tax_mix
+from tax_tables import available_tax_years, get_tax_year
+from tax_report import render_comparison_report
+from tax_batch import optimize_tax_mix_batch, stream_w2_scenarios, sweep_w2_vs_self_employment
 from solvy_connector import SOLVYDebitCardConnector, SOLVYDataIntegrator
 
-tax_assistant = TaxAssistant()
+# In-process LRU for repeated dashboard calculations (TAX_CACHE_SIZE=0 disables)
+tax_assistant = TaxAssistant(cache_size=int(os.getenv('TAX_CACHE_SIZE', '1024')))
 solvy_connector = SOLVYDebitCardConnector()
 solvy_integrator = SOLVYDataIntegrator()
 
+# Rows computed per vectorized chunk by the batch tax endpoint
+BATCH_CHUNK_SIZE = int(os.getenv('TAX_BATCH_CHUNK_SIZE', '1000'))
+
+# Largest ?chunk_size= a caller may ask for (bounds memory per batch request)
+BATCH_CHUNK_SIZE_MAX = int(os.getenv('TAX_BATCH_CHUNK_SIZE_MAX', '10000'))
+
+# Largest income x expenses x contribution grid a single sweep may request
+SWEEP_MAX_POINTS = int(os.getenv('TAX_SWEEP_MAX_POINTS', '50000'))
+
 # Register Kimi support routes (blueprint)
 try:
     from kimi_support import kimi_bp
@@ -69,6 +84,13 @@ def api_info():
 
 # ===== TAX ASSISTANT ENDPOINTS =====
 
+def _wants_details(data):
+    """Formatted bracket breakdowns are opt-in: ?details=true or "details": true."""
+    flag = request.args.get('details', data.get('details', False) if isinstance(data, dict) else False)
+    if isinstance(flag, str):
+        return flag.lower() in ('1', 'true', 'yes')
+    return bool(flag)
+
 @app.route('/api/tax/calculate', methods=['POST', 'OPTIONS'])
 def calculate_tax():
     if request.method == 'OPTIONS':
@@ -79,7 +101,8 @@ def calculate_tax():
         income = float(data.get('income', 0))
         filing_status = data.get('filing_status', 'single')
         
-        result = tax_assistant.calculate_marginal_tax(income, filing_status)
+        result = tax_assistant.calculate_marginal_tax(income, filing_status, tax_year=data.get('tax_year'),
+                                                      details=_wants_details(data))
         
         return jsonify({
             'success': True,
@@ -91,6 +114,162 @@ def calculate_tax():
             'error': str(e)
         }), 400
 
+def _iter_batch_rows():
+    """
+    Yield rows from a JSON array body, or line by line from an NDJSON body.
+
+    NDJSON is read incrementally from the request stream so large rosters
+    never sit in worker memory; a JSON array has to be parsed whole.
+    """
+    content_type = request.content_type or ''
+    if 'ndjson' in content_type or 'jsonlines' in content_type:
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield e
+        return
+
+    rows = request.get_json(silent=True)
+    if isinstance(rows, dict):
+        rows = rows.get('rows')
+    if not isinstance(rows, list):
+        raise ValueError('Body must be a JSON array of rows or NDJSON')
+    yield from rows
+
+@app.route('/api/tax/calculate/batch', methods=['POST', 'OPTIONS'])
+def calculate_tax_batch():
+    """
+    Calculate W-2 taxes for a whole roster in one request.
+
+    Accepts a JSON array (or {"rows": [...]}) or an NDJSON body of
+    {"income", "filing_status", "dependents"} objects or
+    [income, filing_status, dependents] arrays, and streams one NDJSON
+    result line per row in input order. The tax year is set with the
+    ?tax_year= query parameter.
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    try:
+        chunk_size = min(max(1, int(request.args.get('chunk_size', BATCH_CHUNK_SIZE))), BATCH_CHUNK_SIZE_MAX)
+        tax_year = get_tax_year(request.args.get('tax_year')).tax_year
+        rows = _iter_batch_rows()
+        first = next(rows, None)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+    def generate():
+        if first is None:
+            return
+        for record in stream_w2_scenarios(itertools.chain([first], rows), chunk_size=chunk_size,
+                                          tax_year=tax_year):
+            yield json.dumps(record) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def _sweep_axis(spec, default):
+    """Accept an explicit list of values or a {"start", "stop", "step"} range (stop inclusive)."""
+    if spec is None:
+        return default
+    if isinstance(spec, dict):
+        start, stop, step = float(spec['start']), float(spec['stop']), float(spec['step'])
+        if step <= 0:
+            raise ValueError('step must be positive')
+        count = int((stop - start) // step) + 1
+        if count > SWEEP_MAX_POINTS:
+            raise ValueError(f'Range has {count} values; the limit is {SWEEP_MAX_POINTS}')
+        return [start + i * step for i in range(max(count, 0))]
+    if isinstance(spec, (int, float)):
+        return [float(spec)]
+    return [float(v) for v in spec]
+
+@app.route('/api/tax/sweep', methods=['POST', 'OPTIONS'])
+def tax_sweep():
+    """
+    W-2 vs self-employment what-if grid for charting in one call.
+
+    Each axis (incomes, business_expenses, sep_ira_contributions) is a list
+    of values or a {"start", "stop", "step"} range.
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    try:
+        data = request.json or {}
+        incomes = _sweep_axis(data.get('incomes', data.get('income')), [])
+        expenses = _sweep_axis(data.get('business_expenses'), [0.0])
+        contributions = _sweep_axis(data.get('sep_ira_contributions'), [0.0])
+
+        if not incomes:
+            raise ValueError('incomes required')
+        points = len(incomes) * len(expenses) * len(contributions)
+        if points > SWEEP_MAX_POINTS:
+            raise ValueError(f'Sweep grid has {points} points; the limit is {SWEEP_MAX_POINTS}')
+
+        result = sweep_w2_vs_self_employment(
+            incomes, expenses, contributions,
+            filing_status=data.get('filing_status', 'married_jointly'),
+            dependents=int(data.get('dependents', 0)),
+            ibc_contribution=float(data.get('ibc_contribution', 0)),
+            tax_year=data.get('tax_year')
+        )
+
+        return jsonify({
+            'success': True,
+            'data': result
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/tax/compare', methods=['POST', 'OPTIONS'])
+def compare_tax():
+    """
+    W-2 vs self-employment side-by-side.
+
+    Returns JSON by default (bracket_details only with the details flag),
+    or the member-facing text report with ?format=report.
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    try:
+        data = request.json or {}
+        as_report = request.args.get('format', data.get('format', 'json')) == 'report'
+
+        comparison = compare_w2_vs_self_employment(
+            float(data.get('income', 0)),
+            business_expenses=float(data.get('business_expenses', 0)),
+            filing_status=data.get('filing_status', 'married_jointly'),
+            dependents=int(data.get('dependents', 0)),
+            ibc_contribution=float(data.get('ibc_contribution', 0)),
+            sep_ira_contribution=float(data.get('sep_ira_contribution', 0)),
+            tax_year=data.get('tax_year'),
+            details=_wants_details(data)
+        )
+
+        if as_report:
+            return Response(render_comparison_report(comparison), mimetype='text/plain')
+
+        return jsonify({
+            'success': True,
+            'data': comparison
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
 @app.route('/api/tax/optimize-expenses', methods=['POST', 'OPTIONS'])
 def optimize_expenses():
     if request.method == 'OPTIONS':
@@ -104,7 +283,12 @@ def optimize_expenses():
         # Convert expense values to float
         expenses = {k: float(v) for k, v in expenses.items()}
         
-        result = tax_assistant.optimize_business_expenses(revenue, expenses)
+        result = tax_assistant.optimize_business_expenses(
+            revenue, expenses,
+            filing_status=data.get('filing_status', 'married_jointly'),
+            dependents=int(data.get('dependents', 0)),
+            tax_year=data.get('tax_year')
+        )
         
         return jsonify({
             'success': True,
@@ -116,6 +300,78 @@ def optimize_expenses():
             'error': str(e)
         }), 400
 
+@app.route('/api/tax/years', methods=['GET'])
+def tax_years():
+    return jsonify({
+        'success': True,
+        'data': {'tax_years': available_tax_years(), 'default': get_tax_year().tax_year}
+    })
+
+@app.route('/api/tax/cache-stats', methods=['GET'])
+def tax_cache_stats():
+    return jsonify({
+        'success': True,
+        'data': tax_assistant.cache_info() or {'enabled': False}
+    })
+
+@app.route('/api/tax/optimize-mix', methods=['POST', 'OPTIONS'])
+def optimize_mix():
+    """
+    Tax-minimizing business expense / SEP IRA mix.
+
+    Send one member object, or a JSON array (or {"rows": [...]}) of them to
+    optimize a whole cohort in one vectorized pass. Fields: income,
+    expense_cap, filing_status, dependents, and optional sep_limit, budget,
+    tax_year (top level for cohorts).
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    try:
+        data = request.json
+        rows = data.get('rows') if isinstance(data, dict) else data
+        tax_year = (data.get('tax_year') if isinstance(data, dict) else None) or request.args.get('tax_year')
+
+        if isinstance(rows, list):
+            def column(key, default):
+                return [default if row.get(key) is None else float(row[key]) for row in rows]
+
+            statuses = [row.get('filing_status') or 'married_jointly' for row in rows]
+            result = optimize_tax_mix_batch(
+                column('income', 0.0), column('expense_cap', 0.0), statuses,
+                column('dependents', 0.0), column('sep_limit', float('inf')), column('budget', float('inf')),
+                tax_year=tax_year
+            )
+            columns = {key: values.tolist() for key, values in result.items()}
+            marginal_expenses = columns.pop('marginal_savings_expenses')
+            marginal_sep_ira = columns.pop('marginal_savings_sep_ira')
+            result = [
+                dict({key: values[i] for key, values in columns.items()},
+                     marginal_savings_per_dollar={'business_expenses': marginal_expenses[i],
+                                                  'sep_ira': marginal_sep_ira[i]})
+                for i in range(len(rows))
+            ]
+        else:
+            result = optimize_tax_mix(
+                float(data.get('income', 0)),
+                float(data.get('expense_cap', 0)),
+                filing_status=data.get('filing_status', 'married_jointly'),
+                dependents=int(data.get('dependents', 0)),
+                sep_limit=None if data.get('sep_limit') is None else float(data['sep_limit']),
+                budget=None if data.get('budget') is None else float(data['budget']),
+                tax_year=tax_year
+            )
+
+        return jsonify({
+            'success': True,
+            'data': result
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
 # ===== SOLVY DEBIT CARD ENDPOINTS =====
 
 @app.route('/api/solvy/connection-test', methods=['GET'])
@@ -152,7 +408,7 @@ def get_solvy_dashboard():
 def get_card_data():
     try:
         use_backup = request.args.get('use_backup', 'false').lower() == 'true'
-        card_data = solvy_connector.get_debit_card_data(use_backup)
+        card_data = solvy_connector.get_debit_card_data(use_backup, request.args.get('cardholder_id') or None)
         
         return jsonify({
             'success': True,
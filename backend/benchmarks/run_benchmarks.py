@@ -0,0 +1,425 @@
+"""
+SOLVY Benchmarks - Tax engine and API latency suite
+===================================================
+
+Purpose: Reproducible timings for the tax calculators and the Flask API,
+compared against a stored baseline so slowdowns are caught before deploy.
+
+What it measures:
+- Scalar calculators: income tax, W-2 / self-employment scenarios,
+  compare_w2_vs_self_employment, optimize_business_expenses
+- Batch calculators in tax_batch (NumPy, 1,000 rows per call)
+- /api/tax/* and /api/solvy/* routes through the Flask test client
+  (no network, so only request handling + calculation is timed)
+- kimi_client.send_message and /api/support/kimi against the local
+  kimi_mock_server (loopback HTTP over the pooled session)
+- /api/stripe/create-payment-intent against the local stripe_mock_server
+  (pooled stripe_client), and its idempotent replay
+
+Usage:
+    cd backend
+    python benchmarks/run_benchmarks.py                  # run + compare to baseline
+    python benchmarks/run_benchmarks.py --save-baseline  # record a new baseline
+    python benchmarks/run_benchmarks.py --filter api/ --output results.json
+
+Every case reports ops/sec and p50/p99 latency in microseconds. A case
+regresses when its p50 is more than --tolerance (default 25%) slower than
+the baseline; the run then exits with status 1. Baselines are machine
+specific - record one on the machine (or CI runner) that does the gating.
+
+Author: SOLVY Platform
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+# Time the calculation, not the dashboard LRU (set TAX_CACHE_SIZE to override)
+os.environ.setdefault('TAX_CACHE_SIZE', '0')
+
+import numpy as np
+
+from tax_calculations import (
+    calculate_income_tax,
+    calculate_self_employment_scenario,
+    calculate_w2_scenario,
+    compare_w2_vs_self_employment,
+    optimize_business_expenses,
+)
+from tax_batch import (
+    calculate_income_tax_batch,
+    calculate_self_employment_batch,
+    calculate_w2_scenario_batch,
+    sweep_w2_vs_self_employment,
+)
+
+DEFAULT_BASELINE = BENCH_DIR / 'baseline.json'
+
+FILING_STATUSES = ['single', 'married_jointly', 'head_of_household']
+BATCH_ROWS = 1000
+SEED = 2024
+
+
+def _inputs(count, seed=SEED):
+    """Deterministic (income, expenses, filing_status, dependents) tuples."""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        income = rng.uniform(20000, 400000)
+        rows.append((income, rng.uniform(0, income * 0.4), rng.choice(FILING_STATUSES), rng.randint(0, 3)))
+    return rows
+
+
+def _cycle(values):
+    """Zero-argument callable returning the next value, round robin."""
+    state = {'i': -1}
+
+    def next_value():
+        state['i'] = (state['i'] + 1) % len(values)
+        return values[state['i']]
+    return next_value
+
+
+def calculator_cases():
+    """(name, callable) pairs for the scalar and batch calculators."""
+    next_row = _cycle(_inputs(512))
+
+    def income_tax():
+        income, _, status, _ = next_row()
+        calculate_income_tax(income, status)
+
+    def w2_scenario():
+        income, _, status, dependents = next_row()
+        calculate_w2_scenario(income, status, dependents)
+
+    def w2_scenario_lean():
+        income, _, status, dependents = next_row()
+        calculate_w2_scenario(income, status, dependents, lean=True)
+
+    def self_employment_scenario():
+        income, expenses, status, dependents = next_row()
+        calculate_self_employment_scenario(income, expenses, status, dependents, 5000, 10000)
+
+    def compare():
+        income, expenses, status, dependents = next_row()
+        compare_w2_vs_self_employment(income, expenses, status, dependents, 5000, 10000)
+
+    def optimize():
+        income, expenses, status, dependents = next_row()
+        optimize_business_expenses(income, expenses, status, dependents)
+
+    rows = _inputs(BATCH_ROWS, seed=SEED + 1)
+    incomes = np.array([row[0] for row in rows])
+    expenses = np.array([row[1] for row in rows])
+    statuses = [row[2] for row in rows]
+    dependents = np.array([row[3] for row in rows])
+
+    def income_tax_batch():
+        calculate_income_tax_batch(incomes, statuses)
+
+    def w2_batch():
+        calculate_w2_scenario_batch(incomes, statuses, dependents)
+
+    def self_employment_batch():
+        calculate_self_employment_batch(incomes, expenses, statuses, dependents, 5000, 10000)
+
+    sweep_incomes = np.linspace(30000, 300000, 40)
+    sweep_expenses = np.linspace(0, 60000, 25)
+
+    def sweep():
+        sweep_w2_vs_self_employment(sweep_incomes, sweep_expenses, [0, 10000], 'married_jointly', 2)
+
+    return [
+        ('tax/income_tax', income_tax),
+        ('tax/w2_scenario', w2_scenario),
+        ('tax/w2_scenario_lean', w2_scenario_lean),
+        ('tax/self_employment_scenario', self_employment_scenario),
+        ('tax/compare_w2_vs_self_employment', compare),
+        ('tax/optimize_business_expenses', optimize),
+        (f'batch/income_tax_{BATCH_ROWS}', income_tax_batch),
+        (f'batch/w2_scenario_{BATCH_ROWS}', w2_batch),
+        (f'batch/self_employment_{BATCH_ROWS}', self_employment_batch),
+        ('batch/sweep_40x25x2', sweep),
+    ]
+
+
+def api_cases():
+    """(name, callable) pairs hitting the Flask routes via the test client."""
+    from app_production import app
+
+    client = app.test_client()
+    next_row = _cycle(_inputs(512, seed=SEED + 2))
+    batch_rows = [
+        {'income': income, 'filing_status': status, 'dependents': dependents}
+        for income, _, status, dependents in _inputs(200, seed=SEED + 3)
+    ]
+
+    def check(response):
+        # Read the whole body so streamed responses are fully generated
+        response.get_data()
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.request.path} returned {response.status_code}")
+
+    def post(path, payload_for):
+        def call():
+            check(client.post(path, json=payload_for(next_row())))
+        return call
+
+    def get(path):
+        def call():
+            check(client.get(path))
+        return call
+
+    def calculate_payload(row):
+        income, _, status, dependents = row
+        return {'income': income, 'filing_status': status, 'dependents': dependents}
+
+    def compare_payload(row):
+        income, expenses, status, dependents = row
+        return {'income': income, 'business_expenses': expenses, 'filing_status': status,
+                'dependents': dependents, 'ibc_contribution': 5000, 'sep_ira_contribution': 10000}
+
+    def optimize_payload(row):
+        income, expenses, status, dependents = row
+        return {'revenue': income, 'expenses': {'equipment': expenses * 0.6, 'home_office': expenses * 0.4},
+                'filing_status': status, 'dependents': dependents}
+
+    def mix_payload(row):
+        income, expenses, status, dependents = row
+        return {'income': income, 'expense_cap': expenses, 'filing_status': status, 'dependents': dependents}
+
+    def batch():
+        check(client.post('/api/tax/calculate/batch', json=batch_rows))
+
+    def sweep():
+        check(client.post('/api/tax/sweep', json={
+            'incomes': {'start': 30000, 'stop': 300000, 'step': 10000},
+            'business_expenses': {'start': 0, 'stop': 60000, 'step': 5000},
+            'filing_status': 'married_jointly',
+            'dependents': 2
+        }))
+
+    return [
+        ('api/tax/calculate', post('/api/tax/calculate', calculate_payload)),
+        ('api/tax/compare', post('/api/tax/compare', compare_payload)),
+        ('api/tax/optimize-expenses', post('/api/tax/optimize-expenses', optimize_payload)),
+        ('api/tax/optimize-mix', post('/api/tax/optimize-mix', mix_payload)),
+        ('api/tax/calculate/batch_200', batch),
+        ('api/tax/sweep', sweep),
+        ('api/tax/years', get('/api/tax/years')),
+        ('api/solvy/connection-test', get('/api/solvy/connection-test')),
+        ('api/solvy/dashboard', get('/api/solvy/dashboard')),
+        ('api/solvy/card-data', get('/api/solvy/card-data')),
+    ]
+
+
+def kimi_cases():
+    """(name, callable) pairs for the Kimi client against a local mock server."""
+    import kimi_client
+    from app_production import app
+    from kimi_guard import UpstreamGuard, set_guard
+    from kimi_mock_server import start_in_thread
+
+    _, base_url = start_in_thread()
+    kimi_client.KIMI_API_KEY = 'benchmark'
+    kimi_client.KIMI_BASE_URL = base_url
+    # Timing loops would trip the rate limits; measure the call path, not the limiter
+    set_guard(UpstreamGuard())
+    client = app.test_client()
+
+    question = 'What can I deduct for a home office?'
+    # Every case is a standalone first message (no conversation history to grow);
+    # upstream cases also skip the reply cache so every call makes the round trip
+    standalone = {'conversation': False}
+    uncached = {'cache': False, 'conversation': False}
+
+    def send_message():
+        result = kimi_client.send_message('bench-member', question, context=uncached)
+        if not result['success']:
+            raise RuntimeError(result['error'])
+
+    def send_message_cached():
+        result = kimi_client.send_message('bench-member', question, context=standalone)
+        if not result['success']:
+            raise RuntimeError(result['error'])
+
+    def support_route():
+        response = client.post('/api/support/kimi', json={'member_id': 'bench-member', 'message': question,
+                                                          'context': uncached})
+        if response.status_code != 200:
+            raise RuntimeError(f"/api/support/kimi returned {response.status_code}")
+
+    def stream_message():
+        events = list(kimi_client.stream_message('bench-member', question, context=uncached))
+        if events[-1]['type'] != 'done':
+            raise RuntimeError(events[-1].get('error'))
+
+    return [
+        ('kimi/send_message', send_message),
+        ('kimi/stream_message', stream_message),
+        ('kimi/send_message_cached', send_message_cached),
+        ('api/support/kimi', support_route),
+    ]
+
+
+def stripe_cases():
+    """(name, callable) pairs for the Stripe payment path against a local mock server."""
+    import uuid
+
+    from api import stripe_payments
+    from app_production import app
+    from stripe_client import configure_stripe
+    from stripe_mock_server import start_in_thread
+
+    _, api_base = start_in_thread()
+    configure_stripe(api_key='sk_test_benchmark', api_base=api_base, force=True)
+    stripe_payments.STRIPE_SECRET_KEY = 'sk_test_benchmark'
+    client = app.test_client()
+
+    def create_intent():
+        # Fresh key per call: time the Stripe round trip, not the replay cache
+        response = client.post('/api/stripe/create-payment-intent', json={'amount': 2499, 'currency': 'usd'},
+                               headers={'Idempotency-Key': uuid.uuid4().hex})
+        if response.status_code != 200:
+            raise RuntimeError(f"/api/stripe/create-payment-intent returned {response.status_code}")
+
+    replay_key = uuid.uuid4().hex
+
+    def create_intent_replayed():
+        response = client.post('/api/stripe/create-payment-intent', json={'amount': 2499, 'currency': 'usd'},
+                               headers={'Idempotency-Key': replay_key})
+        if not response.get_json().get('success'):
+            raise RuntimeError(response.get_json().get('error'))
+
+    return [
+        ('api/stripe/create-payment-intent', create_intent),
+        ('api/stripe/create-payment-intent_replayed', create_intent_replayed),
+    ]
+
+
+def measure(func, min_time=0.5, min_iterations=20, warmup=5):
+    """
+    Time repeated calls of func.
+
+    Args:
+        func: Zero-argument callable to time
+        min_time: Keep sampling for at least this many seconds
+        min_iterations: ... and at least this many calls
+        warmup: Untimed calls made first (imports, lazy tables, JIT-ish caches)
+
+    Returns:
+        dict: iterations, ops_per_sec, mean/p50/p99 latency in microseconds
+    """
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    clock = time.perf_counter_ns
+    started = clock()
+    deadline = started + int(min_time * 1e9)
+    while len(samples) < min_iterations or clock() < deadline:
+        t0 = clock()
+        func()
+        samples.append(clock() - t0)
+    elapsed = clock() - started
+
+    latencies = np.array(samples, dtype=float) / 1000.0
+    return {
+        'iterations': len(samples),
+        'ops_per_sec': round(len(samples) / (elapsed / 1e9), 1),
+        'mean_us': round(float(latencies.mean()), 2),
+        'p50_us': round(float(np.percentile(latencies, 50)), 2),
+        'p99_us': round(float(np.percentile(latencies, 99)), 2)
+    }
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Flag cases whose p50 latency grew by more than `tolerance` (a fraction).
+
+    Returns:
+        list: {'name', 'baseline_p50_us', 'p50_us', 'change'} for each regression
+    """
+    previous = baseline.get('results', {})
+    regressions = []
+    for name, result in results.items():
+        before = previous.get(name)
+        if not before or not before.get('p50_us'):
+            continue
+        change = result['p50_us'] / before['p50_us'] - 1
+        result['baseline_p50_us'] = before['p50_us']
+        result['change'] = round(change, 3)
+        if change > tolerance:
+            regressions.append({
+                'name': name,
+                'baseline_p50_us': before['p50_us'],
+                'p50_us': result['p50_us'],
+                'change': round(change, 3)
+            })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SOLVY tax engine and API benchmarks')
+    parser.add_argument('--filter', default='', help='only run cases whose name contains this text')
+    parser.add_argument('--min-time', type=float, default=0.5, help='seconds to sample each case')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='baseline JSON to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='write results to --baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p50 slowdown (0.25 = 25%%)')
+    parser.add_argument('--output', help='also write results JSON to this path')
+    args = parser.parse_args(argv)
+
+    cases = [(name, func) for name, func in calculator_cases() + api_cases() + kimi_cases() + stripe_cases() if args.filter in name]
+
+    results = {}
+    for name, func in cases:
+        results[name] = measure(func, min_time=args.min_time)
+        result = results[name]
+        print(f"{name:<42} {result['ops_per_sec']:>12,.1f} ops/s  "
+              f"p50 {result['p50_us']:>10,.1f}us  p99 {result['p99_us']:>10,.1f}us", file=sys.stderr)
+
+    report = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results
+    }
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        regressions = []
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+        report['tolerance'] = args.tolerance
+    else:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one", file=sys.stderr)
+        regressions = []
+
+    report['regressions'] = regressions
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+    for regression in regressions:
+        print(f"REGRESSION {regression['name']}: p50 {regression['baseline_p50_us']}us -> "
+              f"{regression['p50_us']}us ({regression['change']:+.0%})", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+SOLVY Stripe Load Test - Payment path at real concurrency, no network
+=====================================================================
+
+Purpose: Measure how many payments a worker pushes through
+/api/stripe/create-payment-intent + /confirm-payment-intent when many
+requests are in flight at once, and how many Stripe connections that
+costs, against the local stripe_mock_server instead of Stripe.
+
+What it does:
+- Starts stripe_mock_server on a free port (--delay-ms simulates Stripe's
+  latency) and points the app at it through STRIPE_API_BASE
+- Runs --concurrency threads, each making payments through the Flask test
+  client: create an intent (fresh Idempotency-Key per payment), confirm it
+- Repeats per --client: "pooled" (stripe_client's shared keep-alive pool)
+  and/or "default" (the SDK's own client: one session per thread)
+- Reports payments/s, p50/p99 latency per payment, and the connections
+  and requests the mock server saw
+
+Usage:
+    cd backend
+    python benchmarks/stripe_load.py                          # both clients, 16 threads
+    python benchmarks/stripe_load.py --concurrency 64 --payments 2000 --delay-ms 40
+    python benchmarks/stripe_load.py --client pooled --fail-rate 0.02
+
+Author: SOLVY Platform
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from urllib.request import urlopen
+
+BENCH_DIR = Path(__file__).parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+# Everything below talks to the local mock; never let a real key reach it
+os.environ['STRIPE_SECRET_KEY'] = 'sk_test_load'
+os.environ.pop('STRIPE_API_BASE', None)
+
+import numpy as np
+
+from stripe_mock_server import start_in_thread
+
+
+def run_load(client_kind, concurrency, payments, delay_ms, fail_rate):
+    """
+    One load run against a fresh mock server.
+
+    Returns:
+        dict: payments, failures, seconds, payments_per_second, p50/p99 ms,
+        and the mock server's connection / request counts
+    """
+    import stripe
+    from app_production import app
+    from stripe_client import configure_stripe, set_stripe_http_client
+
+    server, api_base = start_in_thread(delay_ms=delay_ms, fail_rate=fail_rate)
+    configure_stripe(api_key='sk_test_load', api_base=api_base, pool_size=concurrency, force=True)
+    if client_kind == 'default':
+        set_stripe_http_client(stripe.new_default_http_client())
+    client = app.test_client()
+
+    latencies, failures = [], []
+    lock = threading.Lock()
+    remaining = {'n': payments}
+
+    def worker():
+        while True:
+            with lock:
+                if remaining['n'] <= 0:
+                    return
+                remaining['n'] -= 1
+            started = time.perf_counter()
+            created = client.post('/api/stripe/create-payment-intent', json={'amount': 2499, 'currency': 'usd'},
+                                  headers={'Idempotency-Key': uuid.uuid4().hex}).get_json()
+            ok = created.get('success')
+            if ok:
+                confirmed = client.post('/api/stripe/confirm-payment-intent', json={'intent_id': created['id']},
+                                        headers={'Idempotency-Key': uuid.uuid4().hex}).get_json()
+                ok = confirmed.get('status') == 'succeeded'
+            elapsed = time.perf_counter() - started
+            with lock:
+                (latencies if ok else failures).append(elapsed)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+
+    stats = json.load(urlopen(f'{api_base}/stats'))
+    server.shutdown()
+    latencies_ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        'client': client_kind,
+        'concurrency': concurrency,
+        'payments': len(latencies),
+        'failures': len(failures),
+        'seconds': round(seconds, 3),
+        'payments_per_second': round(len(latencies) / seconds, 1),
+        'p50_ms': round(float(np.percentile(latencies_ms, 50)), 2),
+        'p99_ms': round(float(np.percentile(latencies_ms, 99)), 2),
+        'stripe_connections': stats['connections'],
+        'stripe_requests': stats['requests'],
+        'idempotent_replays': stats['idempotent_replays']
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test the Stripe payment path against a local mock')
+    parser.add_argument('--client', choices=('both', 'pooled', 'default'), default='both')
+    parser.add_argument('--concurrency', type=int, default=16, help='payments in flight at once')
+    parser.add_argument('--payments', type=int, default=500, help='payments per run')
+    parser.add_argument('--delay-ms', type=float, default=20, help='simulated Stripe latency per request')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='mock responses lost after applying')
+    args = parser.parse_args(argv)
+
+    kinds = ('default', 'pooled') if args.client == 'both' else (args.client,)
+    results = []
+    for kind in kinds:
+        result = run_load(kind, max(1, args.concurrency), args.payments, args.delay_ms, args.fail_rate)
+        results.append(result)
+        print(f"{kind:<8} {result['payments_per_second']:>8,.1f} payments/s  p50 {result['p50_ms']:>8,.1f}ms  "
+              f"p99 {result['p99_ms']:>8,.1f}ms  {result['stripe_connections']} connections / "
+              f"{result['stripe_requests']} requests", file=sys.stderr)
+
+    print(json.dumps(results, indent=2))
+    return 1 if any(result['failures'] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
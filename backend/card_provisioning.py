@@ -0,0 +1,313 @@
+"""
+SOLVY Card Provisioning - Bulk cardholder and virtual card creation
+===================================================================
+
+Purpose: Onboard a cohort of PMC members in one job instead of one
+request-bound create_cardholder / create_virtual_card call at a time. Runs
+the Stripe calls on a bounded worker pool, can be stopped and restarted at
+any point, and reports throughput.
+
+How it works:
+- Members are read lazily from a CSV (header row) or JSONL file; each needs
+  name, email, pmc_id (or email alone as the member key) and an address
+  (address_line1/city/state/postal_code columns, or a nested "address"
+  object in JSONL); phone and spending_limit (cents) are optional
+- Each member is two steps, cardholder then card, through the
+  SOLVYStripeConnector methods. Every Stripe create carries an idempotency
+  key derived from the member key, step and submitted parameters, so a
+  retried request (the Stripe library retries connection errors and 5xx
+  up to --retries times) or a rerun after a crash returns the object
+  created the first time instead of a duplicate, while a rerun after
+  correcting a failed member's row sends a fresh key. Stripe forgets keys
+  after 24 hours; a rerun later than that is only protected by the
+  checkpoint
+- At most --concurrency members are in flight; the input file is only read
+  as fast as the pool drains it, so a large cohort doesn't sit in memory
+- Every finished step is appended to a JSONL checkpoint. A rerun with the
+  same checkpoint skips members that already have a card and reuses the
+  cardholder of members that stopped half way; failed members are retried
+- Progress (done, failed, members/s) goes to stderr every few seconds and
+  a summary with throughput and latency percentiles is printed at the end
+
+Usage:
+    cd backend
+    python card_provisioning.py members.csv                     # checkpoint: members.csv.checkpoint.jsonl
+    python card_provisioning.py members.jsonl --concurrency 16 --retries 5
+    python card_provisioning.py members.csv --api-base http://127.0.0.1:12111   # stripe_mock_server.py
+
+Requires STRIPE_SECRET_KEY (any value works against the mock server).
+Exits with status 1 when any member failed; rerun to retry them.
+
+Author: SOLVY Platform
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+# Add backend directory to path for imports
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+import stripe
+
+from solvy_connector import create_cardholder, create_virtual_card
+from stripe_client import STRIPE_POOL_SIZE, configure_stripe
+
+ADDRESS_FIELDS = ('line1', 'city', 'state', 'postal_code')
+
+# Card spending limit (cents) when a member row has none
+DEFAULT_SPENDING_LIMIT = 100000
+
+
+def read_members(path, format='auto'):
+    """
+    Yield (line number, raw member dict) from a CSV or JSONL file.
+
+    A JSONL line that isn't valid JSON is yielded as a ValueError instead,
+    so run() reports it as invalid and carries on with the next line.
+    """
+    if format == 'auto':
+        format = 'jsonl' if str(path).lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+    with open(path, newline='', encoding='utf-8') as f:
+        if format == 'csv':
+            for number, row in enumerate(csv.DictReader(f), 2):
+                yield number, {key.strip(): (value or '').strip() for key, value in row.items() if key}
+        else:
+            for number, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        yield number, json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield number, ValueError(f"invalid JSON: {e.msg}")
+
+
+def member_record(raw):
+    """
+    Validated member data in the shape SOLVYStripeConnector.create_cardholder expects.
+
+    Raises:
+        ValueError: the row isn't an object, or a required field is missing or malformed
+    """
+    if isinstance(raw, Exception):
+        # Unreadable line (see read_members)
+        raise raw
+    if not isinstance(raw, dict):
+        raise ValueError('member must be a JSON object')
+    address = raw.get('address') if isinstance(raw.get('address'), dict) else {
+        field: raw.get(f'address_{field}') or raw.get(field) for field in ADDRESS_FIELDS
+    }
+    member = {
+        'key': str(raw.get('pmc_id') or raw.get('email') or '').strip().lower(),
+        'pmc_id': raw.get('pmc_id'),
+        'name': raw.get('name'),
+        'email': raw.get('email'),
+        'address': {field: address.get(field) for field in ADDRESS_FIELDS}
+    }
+    missing = [field for field in ('key', 'name', 'email') if not member[field]]
+    missing += [f'address_{field}' for field in ADDRESS_FIELDS if not member['address'][field]]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    if raw.get('phone'):
+        member['phone'] = raw['phone']
+    try:
+        member['spending_limit'] = int(raw.get('spending_limit') or DEFAULT_SPENDING_LIMIT)
+    except (TypeError, ValueError):
+        raise ValueError('spending_limit must be an integer amount in cents')
+    return member
+
+
+def idempotency_key(prefix, member_key, step, params):
+    """
+    Stable Stripe idempotency key for one provisioning step of one member.
+
+    The submitted params are part of the key: Stripe rejects a key reused
+    with different parameters, so a corrected row has to get a new one.
+    Stripe keeps keys for 24 hours.
+    """
+    material = json.dumps([member_key, params], sort_keys=True, default=str)
+    digest = hashlib.sha256(material.encode('utf-8')).hexdigest()[:32]
+    return f'{prefix}-{step}-{digest}'
+
+
+class Checkpoint:
+    """
+    Append-only JSONL record of finished steps, replayed on start.
+
+    Lines are flushed as they are written; a crash can lose at most the
+    operating system's unsynced tail, and the idempotency keys make redoing
+    those steps harmless.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn final line from an interrupted run
+                        continue
+                    self.state.setdefault(record['key'], {}).update(record)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def get(self, key):
+        with self._lock:
+            return dict(self.state.get(key, {}))
+
+    def record(self, key, **fields):
+        entry = dict(fields, key=key, at=time.time())
+        with self._lock:
+            self.state.setdefault(key, {}).update(entry)
+            self._file.write(json.dumps(entry) + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+
+def provision_member(member, checkpoint, prefix):
+    """Create (or resume) one member's cardholder and card; returns the checkpoint entry."""
+    state = checkpoint.get(member['key'])
+    cardholder_id = state.get('cardholder')
+    if not cardholder_id:
+        cardholder = create_cardholder(member, idempotency_key(prefix, member['key'], 'cardholder', member))
+        cardholder_id = cardholder['id']
+        checkpoint.record(member['key'], cardholder=cardholder_id, status='cardholder')
+    card_params = {'spending_limit': member['spending_limit']}
+    card_key = idempotency_key(prefix, member['key'], 'card', dict(card_params, cardholder=cardholder_id))
+    card = create_virtual_card(cardholder_id, card_params, card_key)
+    checkpoint.record(member['key'], cardholder=cardholder_id, card=card['id'], status='done', error=None)
+    return checkpoint.get(member['key'])
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(members, checkpoint, concurrency=8, prefix='solvy-provision', progress_every=5.0, log=sys.stderr):
+    """
+    Provision every member from an iterable of (line, raw dict).
+
+    Returns:
+        dict: counts (done, skipped, failed, invalid), seconds, members_per_second,
+        latency percentiles and the first few errors
+    """
+    stats = {'done': 0, 'skipped': 0, 'failed': 0, 'invalid': 0}
+    errors, latencies = [], []
+    started = last_report = time.perf_counter()
+    seen = set()
+
+    def timed(member):
+        begin = time.perf_counter()
+        provision_member(member, checkpoint, prefix)
+        return time.perf_counter() - begin
+
+    def fail(line, key, message):
+        if len(errors) < 20:
+            errors.append({'line': line, 'member': key, 'error': message})
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='provision') as pool:
+        pending = {}
+
+        def drain():
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                line, member = pending.pop(future)
+                try:
+                    latencies.append(future.result())
+                    stats['done'] += 1
+                except Exception as e:
+                    stats['failed'] += 1
+                    checkpoint.record(member['key'], status='failed', error=str(e))
+                    fail(line, member['key'], str(e))
+
+        def report():
+            nonlocal last_report
+            now = time.perf_counter()
+            if log and now - last_report >= progress_every:
+                last_report = now
+                elapsed = now - started
+                print(f"[provision] {stats['done']} done, {stats['failed']} failed, {stats['skipped']} skipped, "
+                      f"{len(pending)} in flight - {stats['done'] / elapsed:.1f} members/s", file=log)
+
+        for line, raw in members:
+            try:
+                member = member_record(raw)
+            except ValueError as e:
+                stats['invalid'] += 1
+                fail(line, (raw.get('pmc_id') or raw.get('email')) if isinstance(raw, dict) else None, str(e))
+                continue
+            if member['key'] in seen or checkpoint.get(member['key']).get('status') == 'done':
+                stats['skipped'] += 1
+                continue
+            seen.add(member['key'])
+
+            while len(pending) >= concurrency * 2:
+                drain()
+                report()
+            pending[pool.submit(timed, member)] = (line, member)
+
+        while pending:
+            drain()
+            report()
+
+    elapsed = time.perf_counter() - started
+    return dict(stats,
+                seconds=round(elapsed, 3),
+                members_per_second=round(stats['done'] / elapsed, 2) if elapsed else 0.0,
+                latency_p50_ms=round(_percentile(latencies, 50) * 1000, 1),
+                latency_p95_ms=round(_percentile(latencies, 95) * 1000, 1),
+                concurrency=concurrency,
+                errors=errors)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk-create Stripe Issuing cardholders and virtual cards')
+    parser.add_argument('input', help='members CSV or JSONL file')
+    parser.add_argument('--format', choices=('auto', 'csv', 'jsonl'), default='auto')
+    parser.add_argument('--checkpoint', help='progress file (default: <input>.checkpoint.jsonl)')
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('STRIPE_PROVISION_CONCURRENCY', '8')),
+                        help='members provisioned at once')
+    parser.add_argument('--retries', type=int, default=3, help='Stripe retries per request (same idempotency key)')
+    parser.add_argument('--idempotency-prefix', default='solvy-provision',
+                        help='change to provision the same members again as new cards')
+    parser.add_argument('--api-base', help='Stripe API base URL (e.g. a local stripe_mock_server.py)')
+    parser.add_argument('--progress-every', type=float, default=5.0, help='seconds between progress lines')
+    args = parser.parse_args(argv)
+
+    if not stripe.api_key:
+        parser.error('STRIPE_SECRET_KEY is not set')
+    # One pooled connection per in-flight member
+    configure_stripe(api_base=args.api_base, max_retries=args.retries,
+                     pool_size=max(args.concurrency, STRIPE_POOL_SIZE), force=True)
+
+    checkpoint = Checkpoint(args.checkpoint or f'{args.input}.checkpoint.jsonl')
+    try:
+        summary = run(read_members(args.input, args.format), checkpoint, max(1, args.concurrency),
+                      args.idempotency_prefix, args.progress_every)
+    finally:
+        checkpoint.close()
+
+    print(json.dumps(summary, indent=2))
+    return 1 if summary['failed'] or summary['invalid'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
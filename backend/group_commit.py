@@ -0,0 +1,192 @@
+"""
+SOLVY Group Commit - Background writer that batches durable writes
+==================================================================
+
+Purpose: Let many request threads share one fsync. Each signup (or audit
+record) written on its own pays a full open/write/fsync round trip; during
+a launch those serialize on the disk. A single writer thread collecting
+whatever arrived in the last few milliseconds and committing it together
+turns N fsyncs into one.
+
+How it works:
+- Callers submit() a record and get a concurrent.futures.Future
+- The writer thread takes the first waiting record, then keeps collecting
+  until max_batch records are queued or max_delay has passed since the
+  first one, and hands the batch to the flush function in one call
+- The flush function makes the batch durable (one transaction / one
+  fsync) and returns one result per record; an Exception in that list
+  fails just that record's future
+- A future resolves only after its record is on disk, so a caller that
+  waits on it gets the same guarantee as a synchronous write; callers
+  that don't need the guarantee (audit trails) can skip waiting
+- write() with a timeout raises CommitPendingError when the record is
+  still queued or being flushed: it has not failed and will be committed,
+  so the caller should report it as pending rather than as an error (a
+  client retrying a "failed" write would otherwise hit its own record)
+- With max_delay=0 there is no added wait: records that arrive while a
+  flush is running simply form the next batch
+
+One writer per process: a forked gunicorn worker starts its own thread on
+first use.
+
+Author: SOLVY Platform
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+_STOP = object()
+
+
+class CommitPendingError(TimeoutError):
+    """write() timed out before the record's batch committed; the record is still queued and will be."""
+
+    def __init__(self, timeout):
+        super().__init__(f"Record accepted but not yet committed after {timeout}s")
+        self.timeout = timeout
+
+
+class GroupCommitWriter:
+    """
+    Background writer committing submitted records in batches.
+
+    Args:
+        flush: Callable taking a list of records and returning a list of the
+            same length (result or Exception per record); raising fails the
+            whole batch
+        max_batch: Most records committed together
+        max_delay: Seconds to keep collecting after the first record of a batch
+        name: Writer thread name
+    """
+
+    def __init__(self, flush, max_batch=64, max_delay=0.002, name='group-commit'):
+        self.flush = flush
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max(0.0, max_delay)
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.records = 0
+        self.largest_batch = 0
+        self.flush_seconds = 0.0
+
+    def _ensure_thread(self):
+        pid = os.getpid()
+        if self._thread is None or self._pid != pid:
+            with self._lock:
+                if self._thread is None or self._pid != pid:
+                    if self._pid != pid:
+                        # Inherited across fork: the parent's queue, thread and counts aren't ours
+                        self._queue = queue.Queue()
+                        self.batches = self.records = self.largest_batch = 0
+                        self.flush_seconds = 0.0
+                    self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._pid = pid
+                    self._thread.start()
+
+    def submit(self, record):
+        """
+        Queue a record for the next batch.
+
+        Returns:
+            Future: resolves to the record's result once it is committed
+        """
+        self._ensure_thread()
+        future = Future()
+        self._queue.put((record, future))
+        return future
+
+    def write(self, record, timeout=None):
+        """
+        Submit a record and wait until it is committed.
+
+        Returns:
+            The record's result
+
+        Raises:
+            CommitPendingError: if it isn't committed within timeout (it still will be)
+            Exception: the record's own error from the flush
+        """
+        future = self.submit(record)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            if future.done():
+                # Committed just as the wait ran out, or the flush itself returned a TimeoutError
+                return future.result()
+            raise CommitPendingError(timeout) from None
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Finish this batch, then stop
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            self._commit(self._collect(item))
+
+    def _commit(self, batch):
+        started = time.perf_counter()
+        try:
+            results = self.flush([record for record, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        with self._lock:
+            self.batches += 1
+            self.records += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            self.flush_seconds += time.perf_counter() - started
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def close(self, timeout=5):
+        """Commit what is queued and stop the writer thread."""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid() or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def info(self):
+        with self._lock:
+            return {
+                'max_batch': self.max_batch,
+                'max_delay_ms': round(self.max_delay * 1000, 3),
+                'batches': self.batches,
+                'records': self.records,
+                'largest_batch': self.largest_batch,
+                'avg_batch': round(self.records / self.batches, 2) if self.batches else 0.0,
+                'avg_flush_ms': round(self.flush_seconds * 1000 / self.batches, 3) if self.batches else 0.0,
+                'queued': self._queue.qsize()
+            }
+
+
+def start_writer(flush, max_batch=64, max_delay=0.002, name='group-commit'):
+    """GroupCommitWriter that commits its queue when the interpreter exits."""
+    writer = GroupCommitWriter(flush, max_batch, max_delay, name)
+    atexit.register(writer.close)
+    return writer
@@ -0,0 +1,194 @@
+"""
+SOLVY Kimi ASGI - Event-loop server for support chat
+====================================================
+
+Purpose: Serve /api/support/kimi on asyncio so a worker waiting on Kimi
+holds a coroutine, not a thread or process. One worker can carry hundreds
+of concurrent chats, JSON or server-sent-event streams.
+
+How it works:
+- POST /api/support/kimi is handled natively with
+  kimi_client.send_message_async / stream_message_async, using the same
+  request parsing, response shape and SSE format as the Flask route
+  (kimi_support)
+- Every other path (tax, card, signup, stats...) is passed to the existing
+  Flask app through asgiref's WsgiToAsgi, which runs it on a thread pool
+- Lifespan shutdown closes the pooled async HTTP client
+
+Run:
+    uvicorn kimi_asgi:app --host 0.0.0.0 --port 5001 --workers 4
+    # or under gunicorn:
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn_config.py kimi_asgi:app
+
+Requires: httpx, asgiref, uvicorn (see requirements.txt)
+
+Author: SOLVY Platform
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from urllib.parse import parse_qs
+
+# Add backend directory to path for imports
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app_production import app as flask_app
+from kimi_client import close_async_client, send_message_async, stream_message_async
+from kimi_support import (
+    SSE_HEADERS,
+    SSE_OPEN,
+    parse_support_request,
+    retry_after_header,
+    sse_event,
+    support_response,
+    wants_stream,
+)
+
+SUPPORT_PATH = '/api/support/kimi'
+
+# Largest request body the native route will read
+MAX_BODY_BYTES = int(os.getenv('KIMI_ASGI_MAX_BODY', str(64 * 1024)))
+
+CORS_HEADERS = [(b'access-control-allow-origin', b'*')]
+
+logger = logging.getLogger(__name__)
+
+flask_asgi = WsgiToAsgi(flask_app)
+
+
+def _header(scope, name):
+    for key, value in scope.get('headers', []):
+        if key == name:
+            return value.decode('latin-1')
+    return ''
+
+
+async def _read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise ConnectionError('client disconnected')
+        body += message.get('body', b'')
+        if len(body) > MAX_BODY_BYTES:
+            raise ValueError(f'Request body larger than {MAX_BODY_BYTES} bytes')
+        if not message.get('more_body'):
+            return body
+
+
+async def _send_json(send, status, body):
+    data = json.dumps(body).encode()
+    headers = [(b'content-type', b'application/json'), (b'content-length', str(len(data)).encode())]
+    retry_after = retry_after_header(body)
+    if retry_after:
+        headers.append((b'retry-after', retry_after.encode()))
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': headers + CORS_HEADERS
+    })
+    await send({'type': 'http.response.body', 'body': data})
+
+
+async def _send_preflight(scope, send):
+    requested = _header(scope, b'access-control-request-headers') or 'Content-Type'
+    await send({
+        'type': 'http.response.start',
+        'status': 204,
+        'headers': CORS_HEADERS + [(b'access-control-allow-methods', b'POST, OPTIONS'),
+                                   (b'access-control-allow-headers', requested.encode('latin-1'))]
+    })
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def _stream_reply(receive, send, member_id, inquiry, channel, context):
+    """Relay stream_message_async events as SSE until done or the browser goes away."""
+    disconnected = asyncio.Event()
+
+    async def watch_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        disconnected.set()
+
+    watcher = asyncio.create_task(watch_disconnect())
+    events = stream_message_async(member_id, inquiry, channel=channel, context=context)
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'text/event-stream; charset=utf-8')] + CORS_HEADERS +
+                       [(k.lower().encode(), v.encode()) for k, v in SSE_HEADERS.items()]
+        })
+        await send({'type': 'http.response.body', 'body': SSE_OPEN.encode(), 'more_body': True})
+        async for event in events:
+            if disconnected.is_set():
+                # Stop reading upstream; closing the generator releases the connection
+                break
+            await send({'type': 'http.response.body', 'body': sse_event(event, member_id, channel).encode(),
+                        'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        watcher.cancel()
+        await events.aclose()
+
+
+async def support_kimi(scope, receive, send):
+    """Async twin of kimi_support.support_kimi."""
+    if scope['method'] == 'OPTIONS':
+        await _send_preflight(scope, send)
+        return
+    if scope['method'] != 'POST':
+        await _send_json(send, 405, {'success': False, 'error': 'Method not allowed'})
+        return
+
+    try:
+        try:
+            data = json.loads(await _read_body(receive) or b'{}')
+            member_id, inquiry, channel, context = parse_support_request(data if isinstance(data, dict) else {})
+        except ValueError as e:
+            await _send_json(send, 400, {'success': False, 'error': str(e)})
+            return
+
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        stream_flag = query.get('stream', [None])[0]
+        if wants_stream(data, stream_flag, _header(scope, b'accept')):
+            await _stream_reply(receive, send, member_id, inquiry, channel, context)
+            return
+
+        kimi_resp = await send_message_async(member_id, inquiry, channel=channel, context=context)
+        body, status = support_response(member_id, channel, kimi_resp)
+        await _send_json(send, status, body)
+
+    except ConnectionError:
+        pass
+    except Exception as e:
+        logger.exception('Kimi support endpoint failed')
+        await _send_json(send, 500, {'success': False, 'error': str(e)})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await close_async_client()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI entry point: native async support chat, Flask for everything else."""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+    elif scope['type'] == 'http' and scope['path'].rstrip('/') == SUPPORT_PATH:
+        await support_kimi(scope, receive, send)
+    else:
+        await flask_asgi(scope, receive, send)
@@ -0,0 +1,199 @@
+"""
+SOLVY Kimi Cache - Response cache for repeated support questions
+================================================================
+
+Purpose: Answer the FAQ-style questions that make up most support chat
+(card, PMC signup, taxes) without a full LLM round trip each time.
+
+How it works:
+- Key = SHA-256 of the normalized message + system prompt + model +
+  temperature (the member id is not part of the key, replies are generic)
+- Normalizing lowercases, folds unicode/whitespace and drops trailing
+  punctuation, so "What is PMC?" and "what is pmc" share an entry
+- Entries expire after a TTL; the least recently used entry is evicted
+  once the cache is full
+- Backends:
+    memory  per-process LRU (default; ttl_cache.MemoryTTLCache)
+    disk    SQLite file shared by every gunicorn worker on the host; a hit
+            is a plain read (recency is only written back once an entry's
+            last_used is a tenth of the TTL old), so hits don't queue on
+            the database write lock
+    off     no caching
+
+Configuration (environment):
+    KIMI_CACHE=memory|disk|off
+    KIMI_CACHE_TTL=3600        seconds
+    KIMI_CACHE_SIZE=1024       entries
+    KIMI_CACHE_PATH=...        SQLite file for the disk backend
+
+Author: SOLVY Platform
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from ttl_cache import MemoryTTLCache, cache_stats
+
+KIMI_CACHE = os.getenv('KIMI_CACHE', 'memory').lower()
+KIMI_CACHE_TTL = float(os.getenv('KIMI_CACHE_TTL', '3600'))
+KIMI_CACHE_SIZE = int(os.getenv('KIMI_CACHE_SIZE', '1024'))
+KIMI_CACHE_PATH = os.getenv('KIMI_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                            'kimi_cache.sqlite3'))
+
+_WHITESPACE = re.compile(r'\s+')
+_TRAILING_PUNCTUATION = re.compile(r'[\s?!.,;:]+$')
+
+
+def normalize_message(message):
+    """Canonical form of a member message for cache lookups."""
+    text = unicodedata.normalize('NFKC', message or '').casefold()
+    text = _WHITESPACE.sub(' ', text).strip()
+    return _TRAILING_PUNCTUATION.sub('', text)
+
+
+def cache_key(message, system_prompt, model, temperature):
+    """Stable key for a reply to `message` under the given prompt and sampling settings."""
+    material = json.dumps([normalize_message(message), system_prompt, model, float(temperature)],
+                          ensure_ascii=False)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+# Per-process backend (KIMI_CACHE=memory)
+MemoryResponseCache = MemoryTTLCache
+
+
+class SQLiteResponseCache:
+    """
+    TTL + LRU reply cache in a SQLite file shared across worker processes.
+
+    WAL mode lets workers read concurrently while one writes; each thread
+    (and each forked process) opens its own connection. Hits only read:
+    last_used is refreshed at most once per TOUCH_INTERVAL of the TTL, which
+    is precise enough for LRU eviction. Hit/miss counters are kept per
+    process, so info() reports this worker's hit rate (size is host-wide).
+
+    Args:
+        path: SQLite database file (created on first use)
+        maxsize: Entries kept before least recently used rows are deleted
+        ttl: Seconds an entry stays valid
+    """
+
+    backend = 'disk'
+
+    # Fraction of the TTL a hit may leave last_used stale before writing it back
+    TOUCH_INTERVAL = 0.1
+
+    _SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS responses ('
+        ' key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)',
+    )
+
+    def __init__(self, path, maxsize=1024, ttl=3600):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.stores = self.evictions = self.expirations = 0
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            for statement in self._SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _bump(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def get(self, key):
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute('SELECT value, expires_at, last_used FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is not None and row[1] <= now:
+            with conn:
+                conn.execute('DELETE FROM responses WHERE key = ? AND expires_at <= ?', (key, now))
+            self._bump('expirations')
+            row = None
+        if row is None:
+            self._bump('misses')
+            return None
+        if now - row[2] > self.ttl * self.TOUCH_INTERVAL:
+            with conn:
+                conn.execute('UPDATE responses SET last_used = ? WHERE key = ?', (now, key))
+        self._bump('hits')
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)',
+                         (key, json.dumps(value), now + self.ttl, now))
+            excess = conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0] - self.maxsize
+            if excess > 0:
+                # Expired rows go first (they sort as least recently used or are dead anyway)
+                conn.execute('DELETE FROM responses WHERE key IN ('
+                             ' SELECT key FROM responses ORDER BY expires_at <= ? DESC, last_used LIMIT ?)',
+                             (now, excess))
+        self._bump('stores')
+        if excess > 0:
+            self._bump('evictions', excess)
+
+    def clear(self):
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM responses')
+
+    def info(self):
+        size = self._connect().execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        with self._lock:
+            return cache_stats(self.hits, self.misses, self.stores, self.evictions, self.expirations,
+                          size, self.maxsize, self.ttl, self.backend)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Process-wide cache chosen by KIMI_CACHE, or None when caching is off."""
+    global _cache
+    if _cache is None and KIMI_CACHE != 'off':
+        with _cache_lock:
+            if _cache is None:
+                if KIMI_CACHE == 'disk':
+                    _cache = SQLiteResponseCache(KIMI_CACHE_PATH, KIMI_CACHE_SIZE, KIMI_CACHE_TTL)
+                else:
+                    _cache = MemoryResponseCache(KIMI_CACHE_SIZE, KIMI_CACHE_TTL)
+    return _cache
+
+
+def set_response_cache(cache):
+    """Replace the process-wide cache (None disables caching)."""
+    global _cache, KIMI_CACHE
+    with _cache_lock:
+        _cache = cache
+        KIMI_CACHE = 'off' if cache is None else cache.backend
+    return cache
+
+
+def cache_bypassed(context):
+    """A request skips the cache when its context sets "cache": false (or "no_cache": true)."""
+    if not isinstance(context, dict):
+        return False
+    return context.get('cache') is False or bool(context.get('no_cache'))
@@ -1,30 +1,166 @@
+import asyncio
+import json
 import os
+import socket
+import threading
+import time
 import requests
 import logging
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+
+from kimi_cache import cache_bypassed, cache_key, get_response_cache
+from kimi_conversations import build_window, clean_history, conversation_key, get_conversation_store
+from kimi_guard import get_guard
+from kimi_singleflight import get_async_single_flight, get_single_flight
+
+try:
+    import httpx
+except ImportError:  # only the async client (kimi_asgi) needs it
+    httpx = None
 
 KIMI_API_KEY = os.getenv('KIMI_API_KEY')
 KIMI_BASE_URL = os.getenv('KIMI_BASE_URL', 'https://api.moonshot.cn/v1')
 
+# Connection pool: sockets kept open per worker process, shared by its threads
+KIMI_POOL_SIZE = int(os.getenv('KIMI_POOL_SIZE', '10'))
+# Retries (with exponential backoff) when the connection itself fails;
+# a request that reached Kimi is never re-sent
+KIMI_MAX_RETRIES = int(os.getenv('KIMI_MAX_RETRIES', '2'))
+KIMI_BACKOFF_FACTOR = float(os.getenv('KIMI_BACKOFF_FACTOR', '0.3'))
+# TCP keep-alive probes so idle pooled sockets aren't silently dropped by NATs/LBs
+KIMI_TCP_KEEPALIVE = os.getenv('KIMI_TCP_KEEPALIVE', 'true').lower() == 'true'
+# Async client: concurrent upstream connections per worker (each held chat uses one)
+KIMI_ASYNC_MAX_CONNECTIONS = int(os.getenv('KIMI_ASYNC_MAX_CONNECTIONS', '200'))
+
 logger = logging.getLogger(__name__)
 
 
-def send_message(member_id, message, channel='chat', context=None, timeout=20):
+class _KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled sockets have SO_KEEPALIVE set."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        if KIMI_TCP_KEEPALIVE:
+            kwargs['socket_options'] = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            ]
+        super().init_poolmanager(*args, **kwargs)
+
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def _new_session():
+    retry = Retry(
+        total=KIMI_MAX_RETRIES,
+        connect=KIMI_MAX_RETRIES,
+        read=0,
+        status=0,
+        backoff_factor=KIMI_BACKOFF_FACTOR,
+        raise_on_status=False
+    )
+    adapter = _KeepAliveAdapter(pool_connections=1, pool_maxsize=KIMI_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
     """
-    Send a message to Kimi and return the assistant reply.
+    Module-level pooled session for Kimi calls.
 
-    If `KIMI_API_KEY` is not set, returns a mocked reply for local development.
+    One session per process: urllib3's pool is thread-safe, so gunicorn
+    worker threads share it, and a forked worker (e.g. with --preload)
+    builds its own instead of reusing the parent's sockets.
     """
-    # Mock fallback when no API key is configured
-    if not KIMI_API_KEY:
-        logger.info('KIMI_API_KEY not set — returning mock response')
-        mock = {
-            'success': True,
-            'source': 'mock',
-            'reply': f"Hello {member_id}! This is a mock Kimi reply. Set `KIMI_API_KEY` to enable live responses.",
-            'metadata': {}
-        }
-        return mock
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _new_session()
+                _session_pid = pid
+    return _session
+
+
+def close_session():
+    """Close pooled connections (next call opens a fresh pool)."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _mock_reply(member_id):
+    return f"Hello {member_id}! This is a mock Kimi reply. Set `KIMI_API_KEY` to enable live responses."
 
+
+def _mock_result(member_id):
+    logger.info('KIMI_API_KEY not set — returning mock response')
+    return {
+        'success': True,
+        'source': 'mock',
+        'reply': _mock_reply(member_id),
+        'metadata': {}
+    }
+
+
+def _mock_events(member_id, started):
+    """stream_message events for the mock reply, one word per token."""
+    logger.info('KIMI_API_KEY not set — streaming mock response')
+    parts = []
+    for i, word in enumerate(_mock_reply(member_id).split(' ')):
+        fragment = word if i == 0 else ' ' + word
+        parts.append(fragment)
+        yield {'type': 'token', 'content': fragment}
+    elapsed = _elapsed_ms(started)
+    yield {'type': 'done', 'source': 'mock', 'reply': ''.join(parts), 'latency_ms': elapsed, 'ttft_ms': elapsed}
+
+
+def _extract_reply(data):
+    """Best-effort extraction of the assistant message from a completion body."""
+    reply = None
+    if isinstance(data, dict):
+        # Try common fields
+        if 'choices' in data and data['choices']:
+            # follow DeepSeek-like shape
+            reply = data['choices'][0].get('message', {}).get('content') or data['choices'][0].get('text')
+        elif 'message' in data:
+            reply = data['message'].get('content') or data.get('message')
+        elif 'result' in data and isinstance(data['result'], str):
+            reply = data['result']
+
+    if reply is None:
+        reply = str(data)
+    return reply
+
+
+def _success_result(reply, data, started):
+    return {
+        'success': True,
+        'source': 'kimi',
+        'reply': reply,
+        'raw': data,
+        'cached': False,
+        'latency_ms': _elapsed_ms(started)
+    }
+
+
+def _error_result(error, started):
+    return {
+        'success': False,
+        'error': str(error),
+        'latency_ms': _elapsed_ms(started)
+    }
+
+
+def _chat_request(member_id, message, channel, stream=False, history=()):
+    """URL, headers and payload for a chat completion call; `history` goes between the system prompt and message."""
     # Build payload according to integration doc structure (generic POST to chat endpoint)
     url = f"{KIMI_BASE_URL}/chat/completions"
     headers = {
@@ -36,6 +172,7 @@ def send_message(member_id, message, channel='chat', context=None, timeout=20):
         'model': os.getenv('KIMI_MODEL', 'moonshot-v1-128k'),
         'messages': [
             {'role': 'system', 'content': os.getenv('KIMI_SYSTEM_PROMPT', 'You are the SOVEREIGNITITY™ Sovereign Concierge, providing exceptional customer service.')},
+            *history,
             {'role': 'user', 'content': message}
         ],
         'max_tokens': int(os.getenv('KIMI_MAX_TOKENS', '1024')),
@@ -45,37 +182,482 @@ def send_message(member_id, message, channel='chat', context=None, timeout=20):
             'channel': channel
         }
     }
+    if stream:
+        payload['stream'] = True
+    return url, headers, payload
+
+
+def _reply_key(message, payload):
+    return cache_key(message, payload['messages'][0]['content'], payload['model'], payload['temperature'])
+
+
+def _standalone(payload):
+    """True when the request carries no conversation history (just system prompt + message)."""
+    return len(payload['messages']) == 2
+
+
+def _reply_cache(message, payload, context):
+    """(cache, key) for this request, or (None, None) when caching is off or bypassed."""
+    # Keys cover the message alone, so replies that depend on earlier turns aren't cached
+    cache = None if cache_bypassed(context) or not _standalone(payload) else get_response_cache()
+    if cache is None:
+        return None, None
+    return cache, _reply_key(message, payload)
+
+
+def _conversation_window(member_id, message, context):
+    """
+    Conversation history to send with this message (see kimi_conversations).
+
+    Returns:
+        tuple: (key, history, window) - the store key to record the exchange
+        under (None when stateless), the history messages, and window stats
+        for the result (carrying the conversation "id" when the store is on;
+        None when stateless and no history was supplied)
+    """
+    store = get_conversation_store()
+    context = context if isinstance(context, dict) else {}
+    key, conversation_id = conversation_key(member_id, context) if store is not None else (None, None)
+    supplied = clean_history(context.get('history'))
+    if key is not None and context.get('reset'):
+        store.reset(key)
+    if supplied:
+        conversation = {'summary': '', 'turns': supplied}
+    elif key is not None:
+        conversation = store.get(key)
+    else:
+        return key, [], None
+    history, window = build_window(conversation, message)
+    if conversation_id is not None:
+        # The client needs the id to continue this conversation
+        return key, history, dict(window, id=conversation_id)
+    return key, history, window if history else None
+
+
+def _remember(key, message, result, window):
+    """Record an answered exchange in the member's conversation; returns `result` with window stats."""
+    if key is not None and result.get('reply') and result.get('success', True) and not result.get('rejected'):
+        get_conversation_store().append(key, message, result['reply'])
+    if window is not None:
+        result = dict(result, conversation=window)
+    return result
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def _cached_result(cached, started):
+    return {
+        'success': True,
+        'source': 'kimi',
+        'reply': cached['reply'],
+        'raw': cached.get('raw'),
+        'cached': True,
+        'latency_ms': _elapsed_ms(started)
+    }
+
+
+def _fetch_reply(url, headers, payload, timeout, cache, key, started):
+    """
+    One upstream chat completion; stores the reply in `cache` on success.
+
+    Subject to the upstream guard: returns a rejection immediately when the
+    circuit is open or the worker is over its rate limit.
+    """
+    guard = get_guard()
+    rejected = guard.admit()
+    if rejected is not None:
+        return dict(rejected, latency_ms=_elapsed_ms(started))
 
     try:
-        resp = requests.post(url, json=payload, headers=headers, timeout=timeout)
+        resp = get_session().post(url, json=payload, headers=headers, timeout=timeout)
         resp.raise_for_status()
         data = resp.json()
+        reply = _extract_reply(data)
 
-        # Best-effort extraction of assistant message
-        reply = None
-        if isinstance(data, dict):
-            # Try common fields
-            if 'choices' in data and data['choices']:
-                # follow DeepSeek-like shape
-                reply = data['choices'][0].get('message', {}).get('content') or data['choices'][0].get('text')
-            elif 'message' in data:
-                reply = data['message'].get('content') or data.get('message')
-            elif 'result' in data and isinstance(data['result'], str):
-                reply = data['result']
-
-        if reply is None:
-            reply = str(data)
-
-        return {
-            'success': True,
-            'source': 'kimi',
-            'reply': reply,
-            'raw': data
-        }
+        if cache is not None:
+            cache.set(key, {'reply': reply, 'raw': data})
+
+        result = _success_result(reply, data, started)
+        guard.record(True, result['latency_ms'])
+        return result
 
     except Exception as e:
         logger.exception('Kimi send_message failed')
-        return {
-            'success': False,
-            'error': str(e)
-        }
+        result = _error_result(e, started)
+        guard.record(False, result['latency_ms'])
+        return result
+
+
+def send_message(member_id, message, channel='chat', context=None, timeout=20):
+    """
+    Send a message to Kimi and return the assistant reply.
+
+    If `KIMI_API_KEY` is not set, returns a mocked reply for local development.
+    Live calls go through the pooled session (see `get_session`) and report
+    `latency_ms`; point `KIMI_BASE_URL` at kimi_mock_server to measure it.
+
+    Replies are cached per normalized message (see kimi_cache); pass
+    `context={'cache': False}` to force a fresh answer. Cached results carry
+    `'cached': True`.
+
+    Identical requests already in flight share one upstream call (see
+    kimi_singleflight); results reused that way carry `'coalesced': True`.
+
+    Members over their rate limit, an open circuit or a worker over its
+    upstream rate get an immediate result with `'rejected'` set (see
+    kimi_guard) instead of waiting on Kimi.
+
+    When the conversation store is on, earlier turns of the conversation
+    are sent as a token-budgeted window and the exchange is recorded (see
+    kimi_conversations); results carry `'conversation'` window stats whose
+    `'id'` the client sends back as `context['conversation_id']`.
+    """
+    # Mock fallback when no API key is configured
+    if not KIMI_API_KEY:
+        return _mock_result(member_id)
+
+    started = time.perf_counter()
+    conversation, history, window = _conversation_window(member_id, message, context)
+    url, headers, payload = _chat_request(member_id, message, channel, history=history)
+    result = _answer(member_id, message, context, timeout, url, headers, payload, started)
+    return _remember(conversation, message, result, window)
+
+
+def _answer(member_id, message, context, timeout, url, headers, payload, started):
+    """send_message after the request is built: cache, guard, single-flight, upstream."""
+    cache, key = _reply_cache(message, payload, context)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return _cached_result(cached, started)
+
+    rejected = get_guard().check_member(member_id)
+    if rejected is not None:
+        return dict(rejected, latency_ms=_elapsed_ms(started))
+
+    def fetch():
+        return _fetch_reply(url, headers, payload, timeout, cache, key, started)
+
+    # Requests with history are specific to one member; nothing to coalesce
+    flight = get_single_flight() if _standalone(payload) else None
+    if flight is None:
+        return fetch()
+
+    def cached_reply():
+        cached = cache.get(key)
+        return _cached_result(cached, started) if cached is not None else None
+
+    # Host mode: another worker may have answered (into the shared disk cache) while we waited for its lock
+    recheck = cached_reply if cache is not None and cache.backend == 'disk' else None
+    result, shared = flight.do(key or _reply_key(message, payload), fetch, recheck)
+    if shared:
+        result = dict(result, coalesced=True, latency_ms=_elapsed_ms(started))
+    return result
+
+
+def _delta_content(line):
+    """Content fragment carried by one line of an OpenAI-style `text/event-stream`, if any."""
+    if not line or not line.startswith('data:'):
+        return None
+    data = line[5:].strip()
+    if data == '[DONE]':
+        # Callers keep reading to the end of the body so the connection returns to the pool
+        return None
+    chunk = json.loads(data)
+    choices = chunk.get('choices') or [{}]
+    return (choices[0].get('delta') or {}).get('content') or choices[0].get('text')
+
+
+def _rejection_events(rejected, started):
+    """stream_message events for a guard rejection (fallback reply or error)."""
+    if rejected['success']:
+        yield {'type': 'token', 'content': rejected['reply']}
+        yield {'type': 'done', 'source': rejected['source'], 'reply': rejected['reply'],
+               'rejected': rejected['rejected'], 'latency_ms': _elapsed_ms(started), 'ttft_ms': _elapsed_ms(started)}
+    else:
+        yield {'type': 'error', 'error': rejected['error'], 'rejected': rejected['rejected'],
+               'retry_after': rejected['retry_after'], 'latency_ms': _elapsed_ms(started)}
+
+
+def _stream_deltas(resp):
+    """Content fragments from a streamed completion response."""
+    for line in resp.iter_lines(decode_unicode=True):
+        content = _delta_content(line)
+        if content:
+            yield content
+
+
+def stream_message(member_id, message, channel='chat', context=None, timeout=20):
+    """
+    Stream a Kimi reply as it is generated.
+
+    Yields event dicts:
+        {'type': 'token', 'content': '...'}  for each fragment, then one of
+        {'type': 'done', 'source', 'reply', 'latency_ms', 'ttft_ms'}
+        {'type': 'error', 'error', 'latency_ms'}
+
+    Without `KIMI_API_KEY` the mock reply is streamed word by word; a cached
+    reply (see send_message) arrives as a single token. Conversation history
+    is windowed and recorded as in send_message.
+    `timeout` bounds the connect and each gap between fragments, not the
+    whole reply.
+    """
+    started = time.perf_counter()
+    first_token = None
+    parts = []
+
+    def elapsed_ms(since=None):
+        return round(((since or time.perf_counter()) - started) * 1000, 2)
+
+    if not KIMI_API_KEY:
+        yield from _mock_events(member_id, started)
+        return
+
+    conversation, history, window = _conversation_window(member_id, message, context)
+    url, headers, payload = _chat_request(member_id, message, channel, stream=True, history=history)
+    headers['Accept'] = 'text/event-stream'
+
+    cache, key = _reply_cache(message, payload, context)
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        yield {'type': 'token', 'content': cached['reply']}
+        yield _remember(conversation, message, {'type': 'done', 'source': 'kimi', 'reply': cached['reply'],
+                                                'cached': True, 'latency_ms': elapsed_ms(),
+                                                'ttft_ms': elapsed_ms()}, window)
+        return
+
+    guard = get_guard()
+    rejected = guard.check_member(member_id) or guard.admit()
+    if rejected is not None:
+        yield from _rejection_events(rejected, started)
+        return
+
+    succeeded = None
+    try:
+        with get_session().post(url, json=payload, headers=headers, timeout=timeout, stream=True) as resp:
+            resp.raise_for_status()
+            for content in _stream_deltas(resp):
+                if first_token is None:
+                    first_token = time.perf_counter()
+                parts.append(content)
+                yield {'type': 'token', 'content': content}
+        succeeded = True
+    except Exception as e:
+        logger.exception('Kimi stream_message failed')
+        succeeded = False
+        yield {'type': 'error', 'error': str(e), 'latency_ms': elapsed_ms()}
+        return
+    finally:
+        # Slowness is judged on time to first token. A browser that leaves
+        # mid-stream still counts as success once tokens were flowing.
+        guard.record(bool(succeeded) or (succeeded is None and first_token is not None),
+                     elapsed_ms(first_token) if first_token else elapsed_ms())
+
+    if cache is not None:
+        cache.set(key, {'reply': ''.join(parts)})
+    yield _remember(conversation, message, {'type': 'done', 'source': 'kimi', 'reply': ''.join(parts),
+                                            'latency_ms': elapsed_ms(),
+                                            'ttft_ms': elapsed_ms(first_token) if first_token else None}, window)
+
+
+# ===== ASYNC CLIENT (kimi_asgi) =====
+
+_async_client = None
+_async_client_key = None
+_async_client_lock = threading.Lock()
+
+
+def get_async_client():
+    """
+    Pooled httpx.AsyncClient for the running event loop.
+
+    Shares the sync session's settings: KIMI_MAX_RETRIES retries on
+    connection failures only, keep-alive up to KIMI_POOL_SIZE idle
+    connections, and at most KIMI_ASYNC_MAX_CONNECTIONS open at once.
+    """
+    global _async_client, _async_client_key
+    if httpx is None:
+        raise RuntimeError('The async Kimi client requires httpx (pip install httpx)')
+    key = (os.getpid(), id(asyncio.get_running_loop()))
+    if _async_client is None or _async_client_key != key:
+        with _async_client_lock:
+            if _async_client is None or _async_client_key != key:
+                limits = httpx.Limits(max_connections=KIMI_ASYNC_MAX_CONNECTIONS,
+                                      max_keepalive_connections=KIMI_POOL_SIZE)
+                transport = httpx.AsyncHTTPTransport(retries=KIMI_MAX_RETRIES, limits=limits)
+                _async_client = httpx.AsyncClient(transport=transport)
+                _async_client_key = key
+    return _async_client
+
+
+async def close_async_client():
+    """Close the async pool (call on ASGI shutdown)."""
+    global _async_client
+    client, _async_client = _async_client, None
+    if client is not None:
+        await client.aclose()
+
+
+async def _cache_call(cache, method, *args):
+    # The SQLite backend does file I/O; keep it off the event loop
+    if cache.backend == 'disk':
+        return await asyncio.to_thread(getattr(cache, method), *args)
+    return getattr(cache, method)(*args)
+
+
+async def _conversation_window_async(member_id, message, context):
+    # The disk conversation store does file I/O; keep it off the event loop
+    store = get_conversation_store()
+    if store is not None and store.backend == 'disk':
+        return await asyncio.to_thread(_conversation_window, member_id, message, context)
+    return _conversation_window(member_id, message, context)
+
+
+async def _remember_async(key, message, result, window):
+    store = get_conversation_store()
+    if key is not None and store is not None and store.backend == 'disk':
+        return await asyncio.to_thread(_remember, key, message, result, window)
+    return _remember(key, message, result, window)
+
+
+async def _check_member_async(guard, member_id):
+    # The shared (disk) member limiter does file I/O; keep it off the event loop
+    buckets = guard.member_buckets
+    if buckets is not None and buckets.backend == 'disk':
+        return await asyncio.to_thread(guard.check_member, member_id)
+    return guard.check_member(member_id)
+
+
+async def _fetch_reply_async(url, headers, payload, timeout, cache, key, started):
+    """Async twin of _fetch_reply."""
+    guard = get_guard()
+    rejected = guard.admit()
+    if rejected is not None:
+        return dict(rejected, latency_ms=_elapsed_ms(started))
+
+    try:
+        resp = await get_async_client().post(url, json=payload, headers=headers, timeout=timeout)
+        resp.raise_for_status()
+        data = resp.json()
+        reply = _extract_reply(data)
+
+        if cache is not None:
+            await _cache_call(cache, 'set', key, {'reply': reply, 'raw': data})
+
+        result = _success_result(reply, data, started)
+        guard.record(True, result['latency_ms'])
+        return result
+
+    except Exception as e:
+        logger.exception('Kimi send_message_async failed')
+        result = _error_result(e, started)
+        guard.record(False, result['latency_ms'])
+        return result
+
+
+async def send_message_async(member_id, message, channel='chat', context=None, timeout=20):
+    """
+    asyncio version of send_message (same mock fallback, cache and result shape).
+
+    Waiting on Kimi doesn't hold a thread, so one ASGI worker can carry
+    hundreds of concurrent chats. Identical in-flight requests in the same
+    event loop share one upstream call; kimi_guard limits and conversation
+    history apply as in the sync client.
+    """
+    if not KIMI_API_KEY:
+        return _mock_result(member_id)
+
+    started = time.perf_counter()
+    conversation, history, window = await _conversation_window_async(member_id, message, context)
+    url, headers, payload = _chat_request(member_id, message, channel, history=history)
+    result = await _answer_async(member_id, message, context, timeout, url, headers, payload, started)
+    return await _remember_async(conversation, message, result, window)
+
+
+async def _answer_async(member_id, message, context, timeout, url, headers, payload, started):
+    """Async twin of _answer."""
+    cache, key = _reply_cache(message, payload, context)
+    if cache is not None:
+        cached = await _cache_call(cache, 'get', key)
+        if cached is not None:
+            return _cached_result(cached, started)
+
+    rejected = await _check_member_async(get_guard(), member_id)
+    if rejected is not None:
+        return dict(rejected, latency_ms=_elapsed_ms(started))
+
+    def fetch():
+        return _fetch_reply_async(url, headers, payload, timeout, cache, key, started)
+
+    flight = get_async_single_flight() if _standalone(payload) else None
+    if flight is None:
+        return await fetch()
+
+    result, shared = await flight.do(key or _reply_key(message, payload), fetch)
+    if shared:
+        result = dict(result, coalesced=True, latency_ms=_elapsed_ms(started))
+    return result
+
+
+async def stream_message_async(member_id, message, channel='chat', context=None, timeout=20):
+    """asyncio version of stream_message; yields the same event dicts."""
+    started = time.perf_counter()
+    first_token = None
+    parts = []
+
+    if not KIMI_API_KEY:
+        for event in _mock_events(member_id, started):
+            yield event
+        return
+
+    conversation, history, window = await _conversation_window_async(member_id, message, context)
+    url, headers, payload = _chat_request(member_id, message, channel, stream=True, history=history)
+    headers['Accept'] = 'text/event-stream'
+
+    cache, key = _reply_cache(message, payload, context)
+    cached = await _cache_call(cache, 'get', key) if cache is not None else None
+    if cached is not None:
+        yield {'type': 'token', 'content': cached['reply']}
+        yield await _remember_async(conversation, message, {
+            'type': 'done', 'source': 'kimi', 'reply': cached['reply'], 'cached': True,
+            'latency_ms': _elapsed_ms(started), 'ttft_ms': _elapsed_ms(started)}, window)
+        return
+
+    guard = get_guard()
+    rejected = await _check_member_async(guard, member_id) or guard.admit()
+    if rejected is not None:
+        for event in _rejection_events(rejected, started):
+            yield event
+        return
+
+    succeeded = None
+    try:
+        async with get_async_client().stream('POST', url, json=payload, headers=headers,
+                                             timeout=timeout) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                content = _delta_content(line)
+                if not content:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter()
+                parts.append(content)
+                yield {'type': 'token', 'content': content}
+        succeeded = True
+    except Exception as e:
+        logger.exception('Kimi stream_message_async failed')
+        succeeded = False
+        yield {'type': 'error', 'error': str(e), 'latency_ms': _elapsed_ms(started)}
+        return
+    finally:
+        # Same outcome rule as stream_message
+        guard.record(bool(succeeded) or (succeeded is None and first_token is not None),
+                     round(((first_token or time.perf_counter()) - started) * 1000, 2))
+
+    if cache is not None:
+        await _cache_call(cache, 'set', key, {'reply': ''.join(parts)})
+    yield await _remember_async(conversation, message, {
+        'type': 'done', 'source': 'kimi', 'reply': ''.join(parts), 'latency_ms': _elapsed_ms(started),
+        'ttft_ms': round((first_token - started) * 1000, 2) if first_token else None}, window)
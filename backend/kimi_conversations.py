@@ -0,0 +1,407 @@
+"""
+SOLVY Kimi Conversations - Per-member chat history for support
+===============================================================
+
+Purpose: Give Kimi the earlier turns of a support chat without the
+frontend resending the whole transcript, and without the prompt (and the
+token bill) growing with every message of a long session.
+
+How it works:
+- Each conversation is identified by a server-issued conversation_id
+  (random, unguessable). A request without one starts a new conversation
+  and gets its id back in the result's "conversation" stats; the client
+  sends it with the next message to continue. member_id is a free-form
+  field anyone can send, so it is never enough on its own to read or reset
+  a history; the store key is member_id + conversation_id.
+- Each conversation keeps its recent turns and a running summary
+- Only a window is sent upstream: the newest turns that fit in
+  KIMI_CONTEXT_TOKENS, after the summary and the new message. Older turns
+  are folded into the summary (one line per exchange, first sentence of
+  the question and answer) instead of being dropped outright.
+- Stored turns are compacted the same way, so a conversation never holds
+  more than one window of raw turns
+- Tokens are estimated locally (about 4 characters per token, 1 per CJK
+  character); no round trip to a tokenizer
+- Backends:
+    off     stateless, every message stands alone (default)
+    memory  per-process LRU of conversations
+    disk    SQLite file shared by every gunicorn worker on the host
+
+Request context (the "context" field of /api/support/kimi):
+    {"conversation_id": "..."}   continue a conversation (an id this server
+                                 issued; anything else starts a new one)
+    {"reset": true}              start over (forget earlier turns)
+    {"conversation": false}      don't read or record history
+    {"history": [{"role", "content"}, ...]}
+                                 caller-supplied turns, windowed the same
+                                 way and used instead of the stored ones
+
+Tradeoff: a follow-up message carries history, so its reply can't come
+from the reply cache (kimi_cache) or be shared with identical in-flight
+questions (kimi_singleflight); only first messages get those. That is why
+the store is off by default - turn it on when multi-turn answers matter
+more than upstream load.
+
+Configuration (environment):
+    KIMI_CONVERSATIONS=off|memory|disk
+    KIMI_CONVERSATION_SIZE=2048     conversations kept
+    KIMI_CONVERSATION_TTL=86400     seconds idle before a conversation is forgotten
+    KIMI_CONVERSATION_PATH=...      SQLite file for the disk backend
+    KIMI_CONTEXT_TOKENS=2000        history budget per request
+    KIMI_SUMMARY_TOKENS=300         cap on the running summary
+
+Author: SOLVY Platform
+"""
+
+import json
+import math
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+KIMI_CONVERSATIONS = os.getenv('KIMI_CONVERSATIONS', 'off').lower()
+KIMI_CONVERSATION_SIZE = int(os.getenv('KIMI_CONVERSATION_SIZE', '2048'))
+KIMI_CONVERSATION_TTL = float(os.getenv('KIMI_CONVERSATION_TTL', '86400'))
+KIMI_CONVERSATION_PATH = os.getenv('KIMI_CONVERSATION_PATH',
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                'kimi_conversations.sqlite3'))
+KIMI_CONTEXT_TOKENS = int(os.getenv('KIMI_CONTEXT_TOKENS', '2000'))
+KIMI_SUMMARY_TOKENS = int(os.getenv('KIMI_SUMMARY_TOKENS', '300'))
+
+ANONYMOUS_MEMBER = 'anonymous'
+SUMMARY_HEADER = 'Summary of the earlier conversation with this member:'
+
+# Per-message framing overhead (role, separators) in the chat format
+_MESSAGE_OVERHEAD = 4
+_WIDE = re.compile(r'[\u1100-\u11ff\u2e80-\ua4cf\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]')
+_SENTENCE_END = re.compile(r'(?<=[.!?。！？])\s')
+_SUMMARY_CLAUSE_WORDS = 25
+_CONVERSATION_ID = re.compile(r'^[A-Za-z0-9_-]{24,64}$')
+
+
+def estimate_tokens(text):
+    """Rough token count for `text`: ~4 characters per token, CJK characters count 1 each."""
+    text = text or ''
+    wide = len(_WIDE.findall(text))
+    return wide + math.ceil((len(text) - wide) / 4)
+
+
+def message_tokens(message):
+    return estimate_tokens(message['content']) + _MESSAGE_OVERHEAD
+
+
+def _gist(text):
+    """First sentence of `text`, cut to a couple of dozen words."""
+    text = ' '.join((text or '').split())
+    sentence = _SENTENCE_END.split(text, 1)[0]
+    words = sentence.split(' ')
+    if len(words) > _SUMMARY_CLAUSE_WORDS:
+        sentence = ' '.join(words[:_SUMMARY_CLAUSE_WORDS]) + '...'
+    return sentence
+
+
+def summarize_turns(turns, summary='', max_tokens=KIMI_SUMMARY_TOKENS):
+    """
+    Fold `turns` into `summary`, one line per exchange.
+
+    Extractive: keeps the gist of each question and answer rather than
+    asking Kimi to summarize (which would add a call per fold). When the
+    summary outgrows max_tokens its oldest lines are dropped.
+
+    Returns:
+        str: the new summary
+    """
+    lines = summary.splitlines() if summary else []
+    question = None
+    for turn in turns:
+        if turn['role'] == 'user':
+            if question is not None:
+                lines.append(f"- Member asked: {question}")
+            question = _gist(turn['content'])
+        else:
+            answer = _gist(turn['content'])
+            lines.append(f"- Member asked: {question}; you answered: {answer}" if question is not None
+                         else f"- You said: {answer}")
+            question = None
+    if question is not None:
+        lines.append(f"- Member asked: {question}")
+
+    while len(lines) > 1 and estimate_tokens('\n'.join(lines)) > max_tokens:
+        lines.pop(0)
+    return '\n'.join(lines)
+
+
+def build_window(conversation, message, budget=KIMI_CONTEXT_TOKENS, summary_tokens=KIMI_SUMMARY_TOKENS):
+    """
+    History messages to send ahead of `message`.
+
+    Args:
+        conversation: {'summary': str, 'turns': [{'role', 'content'}, ...]}
+        message: The new member message (its size counts against the budget)
+        budget: Estimated tokens allowed for summary + turns + message
+
+    Returns:
+        tuple: (messages, stats) where messages is a list of chat messages
+        (an optional summary system message, then the newest turns that
+        fit) and stats is {'turns', 'summarized', 'history_tokens'}
+    """
+    turns = conversation.get('turns') or []
+    summary = conversation.get('summary') or ''
+    remaining = budget - estimate_tokens(message) - _MESSAGE_OVERHEAD
+    if summary or sum(message_tokens(turn) for turn in turns) > remaining:
+        # Turns cut from the window grow the summary, so keep room for it at its cap
+        remaining -= (max(summary_tokens, estimate_tokens(summary)) + estimate_tokens(SUMMARY_HEADER + '\n')
+                      + _MESSAGE_OVERHEAD)
+
+    start = len(turns)
+    while start > 0 and message_tokens(turns[start - 1]) <= remaining:
+        remaining -= message_tokens(turns[start - 1])
+        start -= 1
+    # Never open the window on an answer whose question was cut off
+    if start < len(turns) and turns[start]['role'] == 'assistant':
+        start += 1
+
+    if start:
+        summary = summarize_turns(turns[:start], summary, summary_tokens)
+
+    messages = []
+    if summary:
+        messages.append({'role': 'system', 'content': f"{SUMMARY_HEADER}\n{summary}"})
+    messages.extend({'role': turn['role'], 'content': turn['content']} for turn in turns[start:])
+    stats = {
+        'turns': len(turns) - start,
+        'summarized': bool(summary),
+        'history_tokens': sum(message_tokens(m) for m in messages)
+    }
+    return messages, stats
+
+
+def compact(conversation, budget=KIMI_CONTEXT_TOKENS, summary_tokens=KIMI_SUMMARY_TOKENS):
+    """Fold the oldest exchanges into the summary until the raw turns fit in `budget`."""
+    turns = conversation['turns']
+    total = sum(message_tokens(turn) for turn in turns)
+    cut = 0
+    while total > budget and cut < len(turns):
+        total -= message_tokens(turns[cut])
+        cut += 1
+    while cut < len(turns) and turns[cut]['role'] == 'assistant':
+        cut += 1
+    if cut:
+        conversation['summary'] = summarize_turns(turns[:cut], conversation.get('summary', ''), summary_tokens)
+        conversation['turns'] = turns[cut:]
+    return conversation
+
+
+def clean_history(history):
+    """Caller-supplied history as a list of user/assistant turns (anything else is ignored)."""
+    if not isinstance(history, list):
+        return []
+    return [
+        {'role': turn['role'], 'content': turn['content']}
+        for turn in history
+        if isinstance(turn, dict) and turn.get('role') in ('user', 'assistant')
+        and isinstance(turn.get('content'), str) and turn['content']
+    ]
+
+
+def new_conversation_id():
+    """Fresh unguessable conversation id."""
+    return secrets.token_urlsafe(18)
+
+
+def conversation_key(member_id, context):
+    """
+    Store key and conversation id for this request.
+
+    The id is the one the client sent back when it is well formed, else a
+    new one (so a guessed or made-up id can't reach someone else's history).
+
+    Returns:
+        tuple: (key, conversation_id), or (None, None) when the request is stateless
+    """
+    context = context if isinstance(context, dict) else {}
+    if context.get('conversation') is False:
+        return None, None
+    conversation_id = context.get('conversation_id')
+    if not isinstance(conversation_id, str) or not _CONVERSATION_ID.match(conversation_id):
+        conversation_id = new_conversation_id()
+    return f"{member_id or ANONYMOUS_MEMBER}:{conversation_id}", conversation_id
+
+
+def _new_conversation():
+    return {'summary': '', 'turns': []}
+
+
+def _with_turns(conversation, user_message, reply, budget, summary_tokens):
+    conversation['turns'] = conversation['turns'] + [
+        {'role': 'user', 'content': user_message},
+        {'role': 'assistant', 'content': reply}
+    ]
+    return compact(conversation, budget, summary_tokens)
+
+
+class MemoryConversationStore:
+    """
+    Per-process TTL + LRU store of conversations.
+
+    Args:
+        maxsize: Conversations kept before the least recently used is dropped
+        ttl: Seconds a conversation survives without a new message
+        budget: Raw-turn token budget (see compact)
+        summary_tokens: Cap on each conversation's summary
+    """
+
+    backend = 'memory'
+
+    def __init__(self, maxsize=2048, ttl=86400, budget=KIMI_CONTEXT_TOKENS, summary_tokens=KIMI_SUMMARY_TOKENS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.budget = budget
+        self.summary_tokens = summary_tokens
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        """Copy of the conversation, or an empty one."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                return _new_conversation()
+            self._entries.move_to_end(key)
+            return {'summary': entry[1]['summary'], 'turns': list(entry[1]['turns'])}
+
+    def append(self, key, user_message, reply):
+        """Record one exchange (and compact the stored turns)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            conversation = entry[1] if entry is not None and entry[0] > time.time() else _new_conversation()
+            conversation = _with_turns(conversation, user_message, reply, self.budget, self.summary_tokens)
+            self._entries[key] = (time.time() + self.ttl, conversation)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def reset(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        with self._lock:
+            return {'backend': self.backend, 'conversations': len(self._entries), 'maxsize': self.maxsize,
+                    'ttl': self.ttl, 'evictions': self.evictions, 'context_tokens': self.budget,
+                    'summary_tokens': self.summary_tokens}
+
+
+class SQLiteConversationStore:
+    """
+    Conversation store in a SQLite file shared across worker processes, so
+    a member's next message may land on any worker.
+
+    Args:
+        path: SQLite database file (created on first use)
+        maxsize, ttl, budget, summary_tokens: as in MemoryConversationStore
+    """
+
+    backend = 'disk'
+
+    def __init__(self, path, maxsize=2048, ttl=86400, budget=KIMI_CONTEXT_TOKENS,
+                 summary_tokens=KIMI_SUMMARY_TOKENS):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.budget = budget
+        self.summary_tokens = summary_tokens
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS conversations ('
+                         ' key TEXT PRIMARY KEY, summary TEXT NOT NULL, turns TEXT NOT NULL,'
+                         ' expires_at REAL NOT NULL, last_used REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS conversations_last_used ON conversations (last_used)')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute('SELECT summary, turns FROM conversations WHERE key = ? AND expires_at > ?',
+                                      (key, time.time())).fetchone()
+        if row is None:
+            return _new_conversation()
+        return {'summary': row[0], 'turns': json.loads(row[1])}
+
+    def append(self, key, user_message, reply):
+        conn = self._connect()
+        now = time.time()
+        # Read-modify-write under one write lock: two workers answering the
+        # same member at once must not lose a turn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT summary, turns FROM conversations WHERE key = ? AND expires_at > ?',
+                               (key, now)).fetchone()
+            conversation = {'summary': row[0], 'turns': json.loads(row[1])} if row else _new_conversation()
+            conversation = _with_turns(conversation, user_message, reply, self.budget, self.summary_tokens)
+            conn.execute('INSERT OR REPLACE INTO conversations VALUES (?, ?, ?, ?, ?)',
+                         (key, conversation['summary'], json.dumps(conversation['turns']), now + self.ttl, now))
+            conn.execute('DELETE FROM conversations WHERE expires_at <= ?', (now,))
+            excess = conn.execute('SELECT COUNT(*) FROM conversations').fetchone()[0] - self.maxsize
+            if excess > 0:
+                conn.execute('DELETE FROM conversations WHERE key IN ('
+                             ' SELECT key FROM conversations ORDER BY last_used LIMIT ?)', (excess,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def reset(self, key):
+        self._connect().execute('DELETE FROM conversations WHERE key = ?', (key,))
+
+    def clear(self):
+        self._connect().execute('DELETE FROM conversations')
+
+    def info(self):
+        count = self._connect().execute('SELECT COUNT(*) FROM conversations WHERE expires_at > ?',
+                                        (time.time(),)).fetchone()[0]
+        return {'backend': self.backend, 'conversations': count, 'maxsize': self.maxsize, 'ttl': self.ttl,
+                'context_tokens': self.budget, 'summary_tokens': self.summary_tokens}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_conversation_store():
+    """Process-wide store chosen by KIMI_CONVERSATIONS, or None when off."""
+    global _store
+    if _store is None and KIMI_CONVERSATIONS != 'off':
+        with _store_lock:
+            if _store is None:
+                if KIMI_CONVERSATIONS == 'disk':
+                    _store = SQLiteConversationStore(KIMI_CONVERSATION_PATH, KIMI_CONVERSATION_SIZE,
+                                                     KIMI_CONVERSATION_TTL)
+                else:
+                    _store = MemoryConversationStore(KIMI_CONVERSATION_SIZE, KIMI_CONVERSATION_TTL)
+    return _store
+
+
+def set_conversation_store(store):
+    """Replace the process-wide store (None disables conversation history)."""
+    global _store, KIMI_CONVERSATIONS
+    with _store_lock:
+        _store = store
+        KIMI_CONVERSATIONS = 'off' if store is None else store.backend
+    return store
@@ -0,0 +1,425 @@
+"""
+SOLVY Kimi Guard - Rate limiting and circuit breaking for the Kimi upstream
+===========================================================================
+
+Purpose: Keep a slow or failing Kimi API from tying up every worker (and
+with them the tax and card endpoints). Requests that can't be served
+quickly are rejected up front instead of waiting out the 20s timeout.
+
+How it works:
+- Process token bucket: at most KIMI_RATE_LIMIT upstream calls per second
+  per worker (bursts up to KIMI_RATE_BURST)
+- Member token bucket: at most KIMI_MEMBER_RATE_LIMIT requests per second
+  per member_id. The memory backend limits per worker; the disk backend
+  keeps buckets in SQLite so all workers on the host share them. Anonymous
+  visitors all share one member id, so only the process bucket limits them.
+- Circuit breaker: KIMI_BREAKER_FAILURES consecutive failed (or slower than
+  KIMI_BREAKER_SLOW_MS) calls open the circuit. While open, calls are
+  rejected immediately; after KIMI_BREAKER_RESET seconds one probe call is
+  let through (half-open) and its outcome closes or re-opens the circuit.
+- Rejected requests fail fast (KIMI_FALLBACK=fail) or get an immediate
+  canned reply (KIMI_FALLBACK=mock)
+
+A limit of 0 disables that limiter; KIMI_BREAKER_FAILURES=0 disables the
+breaker.
+
+Author: SOLVY Platform
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from kimi_conversations import ANONYMOUS_MEMBER
+
+KIMI_RATE_LIMIT = float(os.getenv('KIMI_RATE_LIMIT', '10'))
+KIMI_RATE_BURST = float(os.getenv('KIMI_RATE_BURST', '20'))
+KIMI_MEMBER_RATE_LIMIT = float(os.getenv('KIMI_MEMBER_RATE_LIMIT', '0.2'))
+KIMI_MEMBER_RATE_BURST = float(os.getenv('KIMI_MEMBER_RATE_BURST', '5'))
+KIMI_MEMBER_LIMIT_BACKEND = os.getenv('KIMI_MEMBER_LIMIT_BACKEND', 'memory').lower()
+KIMI_RATE_LIMIT_PATH = os.getenv('KIMI_RATE_LIMIT_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                      'kimi_rate_limit.sqlite3'))
+KIMI_BREAKER_FAILURES = int(os.getenv('KIMI_BREAKER_FAILURES', '5'))
+KIMI_BREAKER_RESET = float(os.getenv('KIMI_BREAKER_RESET', '30'))
+KIMI_BREAKER_SLOW_MS = float(os.getenv('KIMI_BREAKER_SLOW_MS', '10000'))
+KIMI_FALLBACK = os.getenv('KIMI_FALLBACK', 'fail').lower()
+
+FALLBACK_REPLY = ("Our support assistant is busy right now. Please try again in a minute, "
+                  "or email support and a member of the team will follow up.")
+
+# Reasons a request can be turned away, mapped to the HTTP status the API uses
+REJECTION_STATUS = {
+    'member_rate_limited': 429,
+    'rate_limited': 503,
+    'circuit_open': 503
+}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Args:
+        rate: Tokens added per second
+        capacity: Most tokens the bucket holds (the allowed burst)
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    def try_acquire(self, tokens=1):
+        """
+        Take tokens if available.
+
+        Returns:
+            float: 0 if acquired, else seconds until enough tokens refill
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                self.allowed += 1
+                return 0.0
+            self.rejected += 1
+            return (tokens - self._tokens) / self.rate
+
+    def info(self):
+        with self._lock:
+            return {'rate': self.rate, 'burst': self.capacity, 'tokens': round(self._tokens, 2),
+                    'allowed': self.allowed, 'rejected': self.rejected}
+
+
+class KeyedTokenBucket:
+    """
+    One token bucket per key (member_id), least recently used keys dropped
+    beyond max_keys. A dropped key simply starts again with a full bucket.
+    """
+
+    backend = 'memory'
+
+    def __init__(self, rate, capacity, max_keys=10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    def try_acquire(self, key, tokens=1):
+        """Take tokens from key's bucket; returns 0 or seconds until it refills."""
+        now = time.monotonic()
+        with self._lock:
+            level, updated = self._buckets.pop(key, (self.capacity, now))
+            level = min(self.capacity, level + (now - updated) * self.rate)
+            wait = 0.0
+            if level >= tokens:
+                level -= tokens
+                self.allowed += 1
+            else:
+                wait = (tokens - level) / self.rate
+                self.rejected += 1
+            self._buckets[key] = (level, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def info(self):
+        with self._lock:
+            return {'backend': self.backend, 'rate': self.rate, 'burst': self.capacity,
+                    'members': len(self._buckets), 'allowed': self.allowed, 'rejected': self.rejected}
+
+
+class SQLiteKeyedTokenBucket:
+    """
+    Per-key token buckets in a SQLite file shared by all workers on the host.
+
+    Each acquire is one short IMMEDIATE transaction, so concurrent workers
+    see a consistent bucket level. Counters are per process.
+    """
+
+    backend = 'disk'
+
+    def __init__(self, path, rate, capacity):
+        self.path = path
+        self.rate = rate
+        self.capacity = capacity
+        self._local = threading.local()
+        self.allowed = 0
+        self.rejected = 0
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS buckets ('
+                         ' key TEXT PRIMARY KEY, level REAL NOT NULL, updated REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS buckets_updated ON buckets (updated)')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def try_acquire(self, key, tokens=1):
+        """Take tokens from key's bucket; returns 0 or seconds until it refills."""
+        conn = self._connect()
+        # Wall clock: monotonic clocks aren't comparable across processes
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT level, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            level, updated = row if row else (self.capacity, now)
+            level = min(self.capacity, level + max(0.0, now - updated) * self.rate)
+            wait = 0.0
+            if level >= tokens:
+                level -= tokens
+            else:
+                wait = (tokens - level) / self.rate
+            conn.execute('INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)', (key, level, now))
+            # Drop buckets that have been full for a while (idle members)
+            conn.execute('DELETE FROM buckets WHERE updated < ?', (now - 2 * self.capacity / self.rate,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        if wait:
+            self.rejected += 1
+        else:
+            self.allowed += 1
+        return wait
+
+    def info(self):
+        members = self._connect().execute('SELECT COUNT(*) FROM buckets').fetchone()[0]
+        return {'backend': self.backend, 'rate': self.rate, 'burst': self.capacity,
+                'members': members, 'allowed': self.allowed, 'rejected': self.rejected}
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker with half-open probing.
+
+    Args:
+        failure_threshold: Consecutive failures that open the circuit
+        reset_timeout: Seconds the circuit stays open before a probe is allowed
+        half_open_max_calls: Probe calls allowed at once while half-open
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, half_open_max_calls=1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self):
+        """
+        Whether a call may go upstream now.
+
+        Returns:
+            float: 0 if allowed, else seconds until the next probe
+        """
+        with self._lock:
+            if self._state == self.OPEN:
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    self.rejected += 1
+                    return remaining
+                self._state = self.HALF_OPEN
+                self._probes = 0
+            if self._state == self.HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    self.rejected += 1
+                    return self.reset_timeout
+                self._probes += 1
+            return 0.0
+
+    def open_for(self):
+        """Seconds the circuit stays open (0 if closed, half-open or due for a probe); no side effects."""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def reject_if_open(self):
+        """
+        Count a rejection if the circuit is open.
+
+        Unlike allow() this never moves the circuit to half-open, so a
+        caller that turns the request away can't strand a probe slot.
+
+        Returns:
+            float: Seconds until the next probe, or 0 if not open (nothing counted)
+        """
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if remaining <= 0:
+                return 0.0
+            self.rejected += 1
+            return remaining
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def info(self):
+        with self._lock:
+            return {'state': self._state, 'consecutive_failures': self._failures,
+                    'failure_threshold': self.failure_threshold, 'reset_timeout': self.reset_timeout,
+                    'times_opened': self.times_opened, 'rejected': self.rejected}
+
+
+class UpstreamGuard:
+    """
+    Limiters and breaker applied around every Kimi upstream call.
+
+    Any component may be None (disabled).
+    """
+
+    def __init__(self, bucket=None, member_buckets=None, breaker=None, slow_call_ms=0):
+        self.bucket = bucket
+        self.member_buckets = member_buckets
+        self.breaker = breaker
+        self.slow_call_ms = slow_call_ms
+
+    def check_member(self, member_id):
+        """Rejection for a member over their limit, else None (anonymous requests aren't limited here)."""
+        if self.member_buckets is not None and member_id and member_id != ANONYMOUS_MEMBER:
+            wait = self.member_buckets.try_acquire(str(member_id))
+            if wait:
+                return rejection('member_rate_limited', wait)
+        return None
+
+    def admit(self):
+        """
+        Rejection if the breaker is open or the worker is over its rate, else None.
+
+        An admitted call must be followed by record() so a half-open probe
+        always resolves.
+        """
+        # Open circuit: reject without spending a rate-limit token
+        if self.breaker is not None:
+            wait = self.breaker.reject_if_open()
+            if wait:
+                return rejection('circuit_open', wait)
+        if self.bucket is not None:
+            wait = self.bucket.try_acquire()
+            if wait:
+                return rejection('rate_limited', wait)
+        if self.breaker is not None:
+            wait = self.breaker.allow()
+            if wait:
+                return rejection('circuit_open', wait)
+        return None
+
+    def record(self, success, latency_ms):
+        """Feed an upstream call's outcome to the breaker."""
+        if self.breaker is None:
+            return
+        if success and not (self.slow_call_ms and latency_ms > self.slow_call_ms):
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def info(self):
+        return {
+            'rate_limit': self.bucket.info() if self.bucket is not None else None,
+            'member_rate_limit': self.member_buckets.info() if self.member_buckets is not None else None,
+            'circuit_breaker': self.breaker.info() if self.breaker is not None else None,
+            'slow_call_ms': self.slow_call_ms,
+            'fallback': KIMI_FALLBACK
+        }
+
+
+def rejection(reason, retry_after):
+    """Result dict for a request turned away before reaching Kimi."""
+    if KIMI_FALLBACK == 'mock':
+        return {
+            'success': True,
+            'source': 'fallback',
+            'reply': FALLBACK_REPLY,
+            'rejected': reason,
+            'retry_after': round(retry_after, 2)
+        }
+    return {
+        'success': False,
+        'error': 'Support assistant is busy, please retry shortly' if reason != 'member_rate_limited'
+                 else 'Too many messages, please wait before sending another',
+        'rejected': reason,
+        'retry_after': round(retry_after, 2)
+    }
+
+
+_guard = None
+_guard_pid = None
+_guard_lock = threading.Lock()
+
+
+def build_guard():
+    """UpstreamGuard from the KIMI_* environment settings."""
+    bucket = TokenBucket(KIMI_RATE_LIMIT, max(KIMI_RATE_BURST, 1)) if KIMI_RATE_LIMIT > 0 else None
+    member_buckets = None
+    if KIMI_MEMBER_RATE_LIMIT > 0:
+        burst = max(KIMI_MEMBER_RATE_BURST, 1)
+        if KIMI_MEMBER_LIMIT_BACKEND == 'disk':
+            member_buckets = SQLiteKeyedTokenBucket(KIMI_RATE_LIMIT_PATH, KIMI_MEMBER_RATE_LIMIT, burst)
+        else:
+            member_buckets = KeyedTokenBucket(KIMI_MEMBER_RATE_LIMIT, burst)
+    breaker = CircuitBreaker(KIMI_BREAKER_FAILURES, KIMI_BREAKER_RESET) if KIMI_BREAKER_FAILURES > 0 else None
+    return UpstreamGuard(bucket, member_buckets, breaker, KIMI_BREAKER_SLOW_MS)
+
+
+def get_guard():
+    """Per-process UpstreamGuard (rebuilt after fork so workers don't share state by accident)."""
+    global _guard, _guard_pid
+    pid = os.getpid()
+    if _guard is None or _guard_pid != pid:
+        with _guard_lock:
+            if _guard is None or _guard_pid != pid:
+                _guard = build_guard()
+                _guard_pid = pid
+    return _guard
+
+
+def set_guard(guard):
+    """Replace the process guard (e.g. to tune limits at runtime or in load tests)."""
+    global _guard, _guard_pid
+    with _guard_lock:
+        _guard = guard
+        _guard_pid = os.getpid()
+    return guard
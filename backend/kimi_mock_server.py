@@ -0,0 +1,164 @@
+"""
+SOLVY Kimi Mock Server - Local stand-in for the Kimi chat API
+=============================================================
+
+Purpose: Measure kimi_client latency and connection reuse without calling
+the real Kimi endpoint (no API key, no network, no cost).
+
+Serves:
+- POST /v1/chat/completions  OpenAI-style completion echoing the last user message
+                             ("stream": true answers as chunked SSE deltas)
+- GET  /stats                connections accepted, requests served and request body bytes
+
+Speaks HTTP/1.1 keep-alive, so a pooled client shows many requests over a
+few connections while an unpooled one opens a connection per request.
+
+Usage:
+    python kimi_mock_server.py --port 8765 --delay-ms 50 --token-delay-ms 20
+    KIMI_API_KEY=test KIMI_BASE_URL=http://127.0.0.1:8765/v1 python app_production.py
+
+Author: SOLVY Platform
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockKimiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; don't let Nagle hold the body
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.stats['connections'] += 1
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, model, content):
+        """Chunked `text/event-stream` of one delta per word, then [DONE]."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def write_chunk(text):
+            data = text.encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        for i, word in enumerate(content.split(' ')):
+            if i and self.server.token_delay:
+                time.sleep(self.server.token_delay)
+            chunk = {
+                'object': 'chat.completion.chunk',
+                'model': model,
+                'choices': [{'index': 0, 'delta': {'content': word if i == 0 else ' ' + word}}]
+            }
+            write_chunk(f"data: {json.dumps(chunk)}\n\n")
+        write_chunk('data: [DONE]\n\n')
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stats':
+            with self.server.stats_lock:
+                self._send_json(200, dict(self.server.stats))
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        if self.server.delay:
+            time.sleep(self.server.delay)
+
+        with self.server.stats_lock:
+            self.server.stats['requests'] += 1
+            self.server.stats['request_bytes'] += length
+
+        messages = body.get('messages') or [{}]
+        prompt = messages[-1].get('content', '')
+        if body.get('stream'):
+            self._send_stream(body.get('model', 'mock'), f"Mock reply to: {prompt}")
+            return
+
+        self._send_json(200, {
+            'id': f"mock-{self.server.stats['requests']}",
+            'object': 'chat.completion',
+            'model': body.get('model', 'mock'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': f"Mock reply to: {prompt}"},
+                'finish_reason': 'stop'
+            }],
+            'usage': {'prompt_tokens': len(prompt.split()), 'completion_tokens': 4}
+        })
+
+
+class MockKimiServer(ThreadingHTTPServer):
+    # Load tests open hundreds of connections at once; the default backlog is 5
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def create_server(host='127.0.0.1', port=0, delay_ms=0, verbose=False, token_delay_ms=0):
+    """
+    Build (but don't start) a mock server; port 0 picks a free port.
+
+    delay_ms is paid before any response (time to first token); streamed
+    replies also wait token_delay_ms between words.
+
+    Returns:
+        MockKimiServer: use server.server_address for the bound port
+    """
+    server = MockKimiServer((host, port), MockKimiHandler)
+    server.delay = delay_ms / 1000.0
+    server.token_delay = token_delay_ms / 1000.0
+    server.verbose = verbose
+    server.stats = {'connections': 0, 'requests': 0, 'request_bytes': 0}
+    server.stats_lock = threading.Lock()
+    return server
+
+
+def start_in_thread(**kwargs):
+    """Start a mock server on a background thread; returns (server, base_url)."""
+    server = create_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/v1"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local mock of the Kimi chat completions API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay-ms', type=float, default=0, help='simulated model latency per request')
+    parser.add_argument('--token-delay-ms', type=float, default=0, help='gap between streamed words')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.delay_ms, args.verbose, args.token_delay_ms)
+    print(f"Mock Kimi API on http://{args.host}:{args.port}/v1 (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,85 @@
+"""
+SOLVY Kimi Single-Flight - Coalesce identical in-flight Kimi calls
+==================================================================
+
+Purpose: When a broadcast makes many members ask the same question at
+once, make one upstream call and hand its result to everyone waiting.
+
+How it works:
+- process: the first request for a key (the leader) calls Kimi; identical
+  requests arriving while it runs wait on it and share its result
+- host: additionally, leaders for the same key in different gunicorn
+  workers serialize on a lock file named by the key (unrelated questions
+  never wait on each other). A leader that gets the lock after another
+  worker finished re-checks the shared reply cache and uses that answer
+  instead of calling Kimi again. A leader that can't get the lock within
+  KIMI_SINGLEFLIGHT_LOCK_WAIT calls Kimi itself. Needs KIMI_CACHE=disk,
+  since that cache is how the result crosses processes.
+- off: every request makes its own call
+
+The coalescing itself is single_flight.SingleFlight (shared with Stripe
+payment intents); this module picks the mode from the environment.
+
+The asyncio client (kimi_asgi) uses AsyncSingleFlight, which coalesces
+within one event loop; host mode's file locks would block the loop, so it
+falls back to process behaviour there.
+
+Configuration (environment):
+    KIMI_SINGLEFLIGHT=process|host|off
+    KIMI_SINGLEFLIGHT_LOCK_DIR=...    lock files for host mode
+    KIMI_SINGLEFLIGHT_LOCK_WAIT=25    seconds to wait for another worker's call
+
+Author: SOLVY Platform
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+
+from single_flight import AsyncSingleFlight, SingleFlight
+
+KIMI_SINGLEFLIGHT = os.getenv('KIMI_SINGLEFLIGHT', 'process').lower()
+KIMI_SINGLEFLIGHT_LOCK_DIR = os.getenv('KIMI_SINGLEFLIGHT_LOCK_DIR',
+                                       os.path.join(tempfile.gettempdir(), 'solvy-kimi-flight'))
+KIMI_SINGLEFLIGHT_LOCK_WAIT = float(os.getenv('KIMI_SINGLEFLIGHT_LOCK_WAIT', '25'))
+
+_flight = None
+_flight_pid = None
+_flight_lock = threading.Lock()
+
+
+def get_single_flight():
+    """Per-process SingleFlight chosen by KIMI_SINGLEFLIGHT, or None when off."""
+    global _flight, _flight_pid
+    if KIMI_SINGLEFLIGHT == 'off':
+        return None
+    pid = os.getpid()
+    if _flight is None or _flight_pid != pid:
+        with _flight_lock:
+            if _flight is None or _flight_pid != pid:
+                lock_dir = KIMI_SINGLEFLIGHT_LOCK_DIR if KIMI_SINGLEFLIGHT == 'host' else None
+                _flight = SingleFlight(lock_dir, KIMI_SINGLEFLIGHT_LOCK_WAIT)
+                _flight_pid = pid
+    return _flight
+
+
+_async_flight = None
+_async_flight_key = None
+
+
+def get_async_single_flight():
+    """AsyncSingleFlight for the running event loop, or None when KIMI_SINGLEFLIGHT=off."""
+    global _async_flight, _async_flight_key
+    if KIMI_SINGLEFLIGHT == 'off':
+        return None
+    key = (os.getpid(), id(asyncio.get_running_loop()))
+    if _async_flight is None or _async_flight_key != key:
+        _async_flight = AsyncSingleFlight()
+        _async_flight_key = key
+    return _async_flight
+
+
+def async_single_flight_info():
+    """Counts from the event loop's AsyncSingleFlight, if the async client has run."""
+    return _async_flight.info() if _async_flight is not None else None
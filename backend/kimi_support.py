@@ -1,47 +1,189 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from datetime import datetime
+import json
 import logging
+import math
 
-from kimi_client import send_message
+from kimi_cache import get_response_cache
+from kimi_conversations import get_conversation_store
+from kimi_guard import REJECTION_STATUS, get_guard
+from kimi_client import send_message, stream_message
+from kimi_singleflight import async_single_flight_info, get_single_flight
 
 kimi_bp = Blueprint('kimi_support', __name__)
 
 logger = logging.getLogger(__name__)
 
 
+def wants_stream(data, query_flag=None, accept=''):
+    """Streaming is requested by "stream": true, ?stream=true or Accept: text/event-stream."""
+    flag = query_flag if query_flag is not None else data.get('stream', False)
+    if isinstance(flag, str):
+        flag = flag.lower() in ('1', 'true', 'yes')
+    return bool(flag) or 'text/event-stream' in (accept or '')
+
+
+def parse_support_request(data):
+    """
+    (member_id, message, channel, context) from a support chat body.
+
+    Raises:
+        ValueError: if no message was sent
+    """
+    data = data or {}
+    inquiry = data.get('message', '')
+    if not inquiry:
+        raise ValueError('No message provided')
+    # Optional context can be provided by caller
+    return data.get('member_id', 'anonymous'), inquiry, data.get('channel', 'chat'), data.get('context')
+
+
+def support_response(member_id, channel, kimi_resp):
+    """(body, status) for a finished send_message result; also writes the request log line."""
+    # Record minimal log
+    logger.info('Kimi support request: member=%s channel=%s time=%s latency_ms=%s', member_id, channel,
+                datetime.utcnow().isoformat(), kimi_resp.get('latency_ms'))
+
+    if not kimi_resp.get('success'):
+        body = {'success': False, 'error': kimi_resp.get('error', 'unknown')}
+        if kimi_resp.get('rejected'):
+            # Turned away by kimi_guard: tell the client when to retry
+            body.update(rejected=kimi_resp['rejected'], retry_after=kimi_resp.get('retry_after'))
+            return body, REJECTION_STATUS.get(kimi_resp['rejected'], 503)
+        return body, 500
+
+    body = {
+        'success': True,
+        'reply': kimi_resp.get('reply'),
+        'source': kimi_resp.get('source', 'kimi'),
+        'cached': kimi_resp.get('cached', False),
+        'coalesced': kimi_resp.get('coalesced', False),
+        'raw': kimi_resp.get('raw')
+    }
+    if kimi_resp.get('rejected'):
+        body['rejected'] = kimi_resp['rejected']
+    if kimi_resp.get('conversation'):
+        # Conversation id and the history window sent with this message (turns, summarized, history_tokens)
+        body['conversation'] = kimi_resp['conversation']
+    return body, 200
+
+
+def retry_after_header(body):
+    """Retry-After value (whole seconds) for a rejected response, or None."""
+    if body.get('retry_after') is None or body.get('success'):
+        return None
+    return str(max(1, math.ceil(body['retry_after'])))
+
+
+# Comment line flushes headers so the browser sees the stream open immediately
+SSE_OPEN = ': stream open\n\n'
+
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    # Stop nginx from buffering the stream
+    'X-Accel-Buffering': 'no'
+}
+
+
+def sse_event(event, member_id, channel):
+    """
+    Format one stream_message event as a server-sent event.
+
+    `token` events carry {"content": ...}; the stream ends with one `done`
+    ({"reply", "source", "latency_ms", "ttft_ms", and "conversation" when
+    the conversation store is on or history was sent) or `error` ({"error"},
+    plus "rejected" and "retry_after" when kimi_guard turned it away).
+    """
+    event = dict(event)
+    kind = event.pop('type')
+    if kind == 'error':
+        error = {'success': False, 'error': event.get('error', 'unknown')}
+        if event.get('rejected'):
+            error.update(rejected=event['rejected'], retry_after=event.get('retry_after'))
+        event = error
+    elif kind == 'done':
+        logger.info('Kimi support stream: member=%s channel=%s time=%s latency_ms=%s ttft_ms=%s',
+                    member_id, channel, datetime.utcnow().isoformat(),
+                    event.get('latency_ms'), event.get('ttft_ms'))
+    return f"event: {kind}\ndata: {json.dumps(event)}\n\n"
+
+
+def _sse_reply(member_id, inquiry, channel, context):
+    """Relay stream_message events to the browser as server-sent events."""
+    def generate():
+        yield SSE_OPEN
+        for event in stream_message(member_id, inquiry, channel=channel, context=context):
+            yield sse_event(event, member_id, channel)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+
 @kimi_bp.route('/api/support/kimi', methods=['POST', 'OPTIONS'])
 def support_kimi():
+    """
+    Member support chat.
+
+    Returns the full reply as JSON, or streams it as server-sent events when
+    the request sets "stream": true (or ?stream=true / Accept: text/event-stream).
+    kimi_asgi serves this same route on an event loop.
+    """
     if request.method == 'OPTIONS':
         return '', 204
 
     try:
         data = request.get_json() or {}
-        member_id = data.get('member_id', 'anonymous')
-        inquiry = data.get('message', '')
-        channel = data.get('channel', 'chat')
+        try:
+            member_id, inquiry, channel, context = parse_support_request(data)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
 
-        if not inquiry:
-            return jsonify({'success': False, 'error': 'No message provided'}), 400
-
-        # Optional context can be provided by caller
-        context = data.get('context')
+        if wants_stream(data, request.args.get('stream'), request.headers.get('Accept', '')):
+            return _sse_reply(member_id, inquiry, channel, context)
 
         # Call Kimi client
         kimi_resp = send_message(member_id, inquiry, channel=channel, context=context)
 
-        # Record minimal log
-        logger.info('Kimi support request: member=%s channel=%s time=%s', member_id, channel, datetime.utcnow().isoformat())
-
-        if not kimi_resp.get('success'):
-            return jsonify({'success': False, 'error': kimi_resp.get('error', 'unknown')}), 500
-
-        return jsonify({
-            'success': True,
-            'reply': kimi_resp.get('reply'),
-            'source': kimi_resp.get('source', 'kimi'),
-            'raw': kimi_resp.get('raw')
-        })
+        body, status = support_response(member_id, channel, kimi_resp)
+        retry_after = retry_after_header(body)
+        return jsonify(body), status, ({'Retry-After': retry_after} if retry_after else {})
 
     except Exception as e:
         logger.exception('Kimi support endpoint failed')
         return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@kimi_bp.route('/api/support/kimi/cache-stats', methods=['GET'])
+def support_kimi_cache_stats():
+    """
+    This worker's reply cache hit rate (the disk backend's size is host-wide),
+    plus its single-flight counts (upstream calls made vs collapsed).
+    """
+    cache = get_response_cache()
+    flight = get_single_flight()
+    data = cache.info() if cache is not None else {'backend': 'off'}
+    data['single_flight'] = flight.info() if flight is not None else {'mode': 'off'}
+    if async_single_flight_info() is not None:
+        data['async_single_flight'] = async_single_flight_info()
+    return jsonify({
+        'success': True,
+        'data': data
+    })
+
+
+@kimi_bp.route('/api/support/kimi/upstream', methods=['GET'])
+def support_kimi_upstream():
+    """This worker's circuit breaker state and rate-limiter counters for the Kimi upstream."""
+    return jsonify({
+        'success': True,
+        'data': get_guard().info()
+    })
+
+
+@kimi_bp.route('/api/support/kimi/conversation-stats', methods=['GET'])
+def support_kimi_conversation_stats():
+    """Conversation store backend, size and window budget."""
+    store = get_conversation_store()
+    return jsonify({
+        'success': True,
+        'data': store.info() if store is not None else {'backend': 'off'}
+    })
@@ -0,0 +1,615 @@
+"""
+SOLVY Signup Store - PMC Founding Member signups
+================================================
+
+Purpose: Record signups from every gunicorn worker without losing any,
+find them by pmc_id or email, and turn away duplicates. The old
+pmc_signups.json was loaded, appended to and rewritten in full on each
+request: O(n) per signup, and two workers writing at once kept only one of
+their records.
+
+Backends (SIGNUP_STORE):
+    sqlite  SQLite in WAL mode (default). signup_id is an AUTOINCREMENT key
+            (never reused); unique case-insensitive indexes on pmc_id and
+            email reject duplicates and make lookups O(log n). Each thread
+            of each worker keeps its own connection; WAL lets them read while
+            one writes.
+    jsonl   Append-only log, one JSON object per line. A signup is a single
+            O_APPEND write under an exclusive fcntl lock on a sidecar .lock
+            file. signup_id comes from a durable counter file updated under
+            the same lock before the record is written (a crash can leave a
+            gap, never a duplicate). Each worker indexes pmc_id/email by
+            reading only the lines appended since it last looked.
+
+Both list signups with keyset pagination (signup_id > after), so a page
+costs the same however deep into the list it is, and both scan() lazily
+(line by line, or 500-row keyset batches) with timestamp/plan filters, so
+an export never holds the whole list in memory.
+
+Durability (SIGNUP_DURABILITY), how append_signup() commits:
+    immediate  each request commits (and fsyncs) its own signup (default)
+    group      requests hand their signup to a background writer
+               (group_commit) that commits everything queued within
+               SIGNUP_GROUP_COMMIT_MS in one transaction / one fsync. The
+               request still waits until its signup is on disk; it pays up
+               to a few milliseconds of extra latency so that a launch-day
+               burst shares fsyncs instead of queueing on them.
+
+Migration: on first use an empty store imports what exists - the JSONL log
+(for sqlite), else the legacy pmc_signups.json array (ids 1..n, as the old
+endpoint reported them). Source files are left untouched. Records SQLite
+can't take (a repeated pmc_id or email, a missing required field) are
+skipped, logged, and kept in the database with the reason
+(import_skipped(); the count shows in /api/signups/stats).
+
+Configuration (environment):
+    SIGNUP_STORE=sqlite|jsonl
+    SIGNUP_DB_PATH=...        SQLite file (default backend/pmc_signups.sqlite3)
+    SIGNUP_LOG_PATH=...       JSONL log (default backend/pmc_signups.jsonl)
+    SIGNUP_LEGACY_PATH=...    JSON array to migrate (default backend/pmc_signups.json)
+    SIGNUP_DURABILITY=immediate|group
+    SIGNUP_GROUP_COMMIT_MS=2       longest a batch keeps collecting
+    SIGNUP_GROUP_COMMIT_SIZE=64    most signups per batch
+    SIGNUP_COMMIT_TIMEOUT=10       seconds a request waits for its commit
+                                   (then it is answered 202 "pending")
+
+Author: SOLVY Platform
+"""
+
+import bisect
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from group_commit import start_writer
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SIGNUP_STORE = os.getenv('SIGNUP_STORE', 'sqlite').lower()
+SIGNUP_DB_PATH = os.getenv('SIGNUP_DB_PATH', os.path.join(_BACKEND_DIR, 'pmc_signups.sqlite3'))
+SIGNUP_LOG_PATH = os.getenv('SIGNUP_LOG_PATH', os.path.join(_BACKEND_DIR, 'pmc_signups.jsonl'))
+SIGNUP_LEGACY_PATH = os.getenv('SIGNUP_LEGACY_PATH', os.path.join(_BACKEND_DIR, 'pmc_signups.json'))
+SIGNUP_DURABILITY = os.getenv('SIGNUP_DURABILITY', 'immediate').lower()
+SIGNUP_GROUP_COMMIT_MS = float(os.getenv('SIGNUP_GROUP_COMMIT_MS', '2'))
+SIGNUP_GROUP_COMMIT_SIZE = int(os.getenv('SIGNUP_GROUP_COMMIT_SIZE', '64'))
+SIGNUP_COMMIT_TIMEOUT = float(os.getenv('SIGNUP_COMMIT_TIMEOUT', '10'))
+
+# Fields that identify a signup; each may appear only once (case-insensitive)
+UNIQUE_FIELDS = ('pmc_id', 'email')
+
+# Fixed width, so the counter is always rewritten in place with one write
+_COUNTER_FORMAT = '{:020d}\n'
+
+
+class DuplicateSignupError(ValueError):
+    """A signup with the same pmc_id or email is already recorded."""
+
+    def __init__(self, field, value):
+        super().__init__(f"A signup with this {field} already exists")
+        self.field = field
+        self.value = value
+
+
+def _normalize(value):
+    return str(value or '').strip().casefold()
+
+
+def _load_legacy(path):
+    """Records from a legacy JSON array file ([] if missing or unreadable)."""
+    if not path or not os.path.exists(path):
+        return []
+    try:
+        with open(path) as f:
+            records = json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return []
+    return [dict(record, signup_id=i) for i, record in enumerate(records, start=1)] \
+        if isinstance(records, list) else []
+
+
+def _matches(record, since=None, until=None, plan=None):
+    """Filter used by scan(): since <= timestamp < until (ISO strings) and plan (case-insensitive)."""
+    timestamp = record.get('timestamp') or ''
+    return ((since is None or timestamp >= since) and (until is None or timestamp < until)
+            and (plan is None or _normalize(record.get('plan')) == _normalize(plan)))
+
+
+def _read_jsonl(path):
+    """Records from a JSONL log, skipping torn lines."""
+    if not path or not os.path.exists(path):
+        return
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # Torn write from a crash; the lines before it are intact
+                continue
+
+
+class JSONLSignupStore:
+    """
+    Append-only JSONL signup log shared by every worker on the host.
+
+    Args:
+        path: JSONL log file; `<path>.lock` and `<path>.counter` sit next to it
+        legacy_path: JSON array file migrated into the log on first use
+    """
+
+    backend = 'jsonl'
+
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.lock_path = path + '.lock'
+        self.counter_path = path + '.counter'
+        self._ready = False
+        self._ready_lock = threading.Lock()
+        # Index of the log up to _offset: unique field -> {normalized value: line offset}
+        self._offset = 0
+        self._index = {field: {} for field in UNIQUE_FIELDS}
+        self._ids = []
+        self._id_offsets = []
+
+    @contextmanager
+    def _locked(self):
+        # flock locks belong to the open file, so threads of one worker exclude each other too
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _ensure_ready(self):
+        """Migrate the legacy file and create the counter (once per process)."""
+        if self._ready:
+            return
+        with self._ready_lock:
+            if self._ready:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._locked():
+                if not os.path.exists(self.path):
+                    self._migrate_legacy()
+                if not os.path.exists(self.counter_path):
+                    self._write_counter(max((r.get('signup_id', 0) for r in _read_jsonl(self.path)), default=0))
+            self._ready = True
+
+    def _migrate_legacy(self):
+        records = _load_legacy(self.legacy_path)
+        # Build the log under a temporary name so a crash can't leave half a migration
+        tmp_path = self.path + '.migrating'
+        with open(tmp_path, 'w') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        if records:
+            print(f"[PMC SIGNUP] Migrated {len(records)} signups from {self.legacy_path} to {self.path}")
+
+    def _read_counter(self):
+        with open(self.counter_path) as f:
+            return int(f.read().strip() or 0)
+
+    def _write_counter(self, value):
+        fd = os.open(self.counter_path, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            os.pwrite(fd, _COUNTER_FORMAT.format(value).encode(), 0)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _catch_up(self):
+        """Index lines other workers appended since this one last looked (call under the lock)."""
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Torn or still being written; look again next time
+                    break
+                offset = self._offset
+                self._offset += len(line)
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                for field in UNIQUE_FIELDS:
+                    value = _normalize(record.get(field))
+                    if value:
+                        self._index[field].setdefault(value, offset)
+                if record.get('signup_id', 0) > (self._ids[-1] if self._ids else 0):
+                    self._ids.append(record['signup_id'])
+                    self._id_offsets.append(offset)
+
+    def _record_at(self, offset):
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def append(self, signup):
+        """
+        Durably record one signup.
+
+        Args:
+            signup: Signup fields (JSON-serializable dict)
+
+        Returns:
+            int: The new signup_id
+
+        Raises:
+            DuplicateSignupError: if pmc_id or email is already signed up
+        """
+        result = self.append_many([signup])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def append_many(self, signups):
+        """
+        Durably record a batch of signups with one write and one fsync.
+
+        Returns:
+            list: signup_id, or a DuplicateSignupError, for each signup
+        """
+        self._ensure_ready()
+        results, lines = [], []
+        with self._locked():
+            self._catch_up()
+            taken = {field: set() for field in UNIQUE_FIELDS}
+            signup_id = self._read_counter()
+            for signup in signups:
+                duplicate = next((field for field in UNIQUE_FIELDS
+                                  if _normalize(signup.get(field)) in self._index[field]
+                                  or _normalize(signup.get(field)) in taken[field]), None)
+                if duplicate:
+                    results.append(DuplicateSignupError(duplicate, signup.get(duplicate)))
+                    continue
+                for field in UNIQUE_FIELDS:
+                    taken[field].add(_normalize(signup.get(field)))
+                signup_id += 1
+                results.append(signup_id)
+                lines.append(json.dumps(dict(signup, signup_id=signup_id)) + '\n')
+            if not lines:
+                return results
+
+            # Counter first: a crash before the records land costs ids, not duplicates
+            self._write_counter(signup_id)
+            data = ''.join(lines).encode('utf-8')
+            fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                size = os.fstat(fd).st_size
+                if size and os.pread(fd, 1, size - 1) != b'\n':
+                    # Terminate a torn line so it doesn't swallow these records
+                    data = b'\n' + data
+                os.write(fd, data)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        return results
+
+    def find(self, pmc_id=None, email=None):
+        """The signup with this pmc_id (or, if none is given, this email), or None."""
+        self._ensure_ready()
+        with self._locked():
+            self._catch_up()
+            for field, value in (('pmc_id', pmc_id), ('email', email)):
+                if value is not None:
+                    offset = self._index[field].get(_normalize(value))
+                    return self._record_at(offset) if offset is not None else None
+        return None
+
+    def page(self, after=0, limit=50):
+        """Up to `limit` signups with signup_id > after, oldest first."""
+        self._ensure_ready()
+        with self._locked():
+            self._catch_up()
+            start = bisect.bisect_right(self._ids, after or 0)
+            offsets = self._id_offsets[start:start + limit]
+        return [self._record_at(offset) for offset in offsets]
+
+    def scan(self, since=None, until=None, plan=None):
+        """
+        Stream matching signups in the order they were recorded.
+
+        Args:
+            since: Earliest timestamp (ISO string, inclusive)
+            until: Latest timestamp (ISO string, exclusive)
+            plan: Only signups on this plan
+
+        Yields:
+            dict: one signup at a time, read lazily from the log
+        """
+        for record in _read_jsonl(self.path):
+            if _matches(record, since, until, plan):
+                yield record
+
+    def __iter__(self):
+        """Signups in the order they were recorded."""
+        return self.scan()
+
+    def count(self):
+        """Last signup_id issued (the number of signups, unless a crash left a gap)."""
+        self._ensure_ready()
+        return self._read_counter()
+
+    def info(self):
+        return {'backend': self.backend, 'path': self.path, 'count': self.count()}
+
+
+class SQLiteSignupStore:
+    """
+    Signup repository in a SQLite file shared by every worker on the host.
+
+    Args:
+        path: SQLite database file (created on first use)
+        import_paths: (jsonl_path, legacy_json_path) imported into an empty
+            database on first use, first one that has records wins
+    """
+
+    backend = 'sqlite'
+
+    _COLUMNS = ('signup_id', 'timestamp', 'name', 'pmc_id', 'email', 'business', 'plan', 'price')
+
+    _SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS signups ('
+        ' signup_id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, name TEXT NOT NULL,'
+        ' pmc_id TEXT NOT NULL, email TEXT NOT NULL, business TEXT NOT NULL, plan TEXT, price REAL)',
+        'CREATE UNIQUE INDEX IF NOT EXISTS signups_pmc_id ON signups (pmc_id COLLATE NOCASE)',
+        'CREATE UNIQUE INDEX IF NOT EXISTS signups_email ON signups (email COLLATE NOCASE)',
+        'CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)',
+    )
+
+    def __init__(self, path, import_paths=()):
+        self.path = path
+        self.import_paths = import_paths
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            # A signup is acknowledged only once it is on disk
+            conn.execute('PRAGMA synchronous=FULL')
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for statement in self._SCHEMA:
+                    conn.execute(statement)
+                if conn.execute("SELECT 1 FROM meta WHERE name = 'imported'").fetchone() is None:
+                    self._import(conn)
+                    conn.execute("INSERT INTO meta VALUES ('imported', datetime('now'))")
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _import(self, conn):
+        jsonl_path, legacy_path = (tuple(self.import_paths) + (None, None))[:2]
+        for source, records in ((jsonl_path, lambda: list(_read_jsonl(jsonl_path))),
+                                (legacy_path, lambda: _load_legacy(legacy_path))):
+            records = records()
+            if not records:
+                continue
+            imported = 0
+            skipped = []
+            for record in records:
+                try:
+                    conn.execute('INSERT INTO signups VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                 tuple(record.get(column) for column in self._COLUMNS))
+                    imported += 1
+                except sqlite3.IntegrityError:
+                    # e.g. test rows repeated in the old file: the first copy is kept, the rest reported
+                    skipped.append({'signup_id': record.get('signup_id'), 'pmc_id': record.get('pmc_id'),
+                                    'email': record.get('email'), 'reason': self._import_conflict(conn, record)})
+            print(f"[PMC SIGNUP] Imported {imported} of {len(records)} signups from {source} into {self.path}")
+            for row in skipped:
+                print(f"[PMC SIGNUP] Skipped signup {row['signup_id']} ({row['pmc_id']}, {row['email']}): "
+                      f"{row['reason']}")
+            conn.execute("INSERT INTO meta VALUES ('import_skipped', ?)", (json.dumps(skipped),))
+            return
+
+    def _import_conflict(self, conn, record):
+        """Why an imported record was rejected: a missing field or the field it duplicates."""
+        missing = [column for column in self._COLUMNS[1:6] if record.get(column) is None]
+        if missing:
+            return f"missing {', '.join(missing)}"
+        for field in ('signup_id',) + UNIQUE_FIELDS:
+            collation = '' if field == 'signup_id' else ' COLLATE NOCASE'
+            if conn.execute(f'SELECT 1 FROM signups WHERE {field} = ?{collation}',
+                            (record.get(field),)).fetchone() is not None:
+                return f"duplicate {field}"
+        return 'constraint violation'
+
+    def import_skipped(self):
+        """Records the first-use import could not insert (with the reason), [] if none."""
+        row = self._connect().execute("SELECT value FROM meta WHERE name = 'import_skipped'").fetchone()
+        return json.loads(row[0]) if row is not None else []
+
+    def _row(self, row):
+        return dict(row) if row is not None else None
+
+    def append(self, signup):
+        """
+        Durably record one signup.
+
+        Returns:
+            int: The new signup_id
+
+        Raises:
+            DuplicateSignupError: if pmc_id or email is already signed up
+        """
+        conn = self._connect()
+        try:
+            return self._insert(conn, signup)
+        except sqlite3.IntegrityError:
+            raise self._duplicate(signup)
+
+    def append_many(self, signups):
+        """
+        Durably record a batch of signups in one transaction (one WAL fsync).
+
+        Returns:
+            list: signup_id, or a DuplicateSignupError, for each signup
+        """
+        conn = self._connect()
+        results = []
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for signup in signups:
+                try:
+                    results.append(self._insert(conn, signup))
+                except sqlite3.IntegrityError:
+                    # Only the failed statement is undone; the rest of the batch commits
+                    results.append(self._duplicate(signup))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return results
+
+    def _insert(self, conn, signup):
+        values = tuple(signup.get(column) for column in self._COLUMNS[1:])
+        return conn.execute('INSERT INTO signups (timestamp, name, pmc_id, email, business, plan, price)'
+                            ' VALUES (?, ?, ?, ?, ?, ?, ?)', values).lastrowid
+
+    def _duplicate(self, signup):
+        for field in UNIQUE_FIELDS:
+            if self.find(**{field: signup.get(field)}) is not None:
+                return DuplicateSignupError(field, signup.get(field))
+        return sqlite3.IntegrityError('signup violates a constraint')
+
+    def find(self, pmc_id=None, email=None):
+        """The signup with this pmc_id (or, if none is given, this email), or None."""
+        conn = self._connect()
+        for field, value in (('pmc_id', pmc_id), ('email', email)):
+            if value is not None:
+                return self._row(conn.execute(f'SELECT * FROM signups WHERE {field} = ? COLLATE NOCASE',
+                                              (str(value).strip(),)).fetchone())
+        return None
+
+    def page(self, after=0, limit=50):
+        """Up to `limit` signups with signup_id > after, oldest first."""
+        rows = self._connect().execute('SELECT * FROM signups WHERE signup_id > ? ORDER BY signup_id LIMIT ?',
+                                       (after or 0, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def scan(self, since=None, until=None, plan=None, batch_size=500):
+        """
+        Stream matching signups in signup_id order (arguments as in JSONLSignupStore.scan).
+
+        Reads keyset batches of batch_size rows, each its own short query,
+        so a slow export neither holds rows in memory nor keeps a read
+        transaction open.
+        """
+        where, params = ['signup_id > ?'], []
+        for clause, value in (('timestamp >= ?', since), ('timestamp < ?', until),
+                              ('plan = ? COLLATE NOCASE', plan)):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        query = f"SELECT * FROM signups WHERE {' AND '.join(where)} ORDER BY signup_id LIMIT ?"
+        after = 0
+        while True:
+            rows = self._connect().execute(query, (after, *params, batch_size)).fetchall()
+            for row in rows:
+                yield dict(row)
+            if len(rows) < batch_size:
+                return
+            after = rows[-1]['signup_id']
+
+    def __iter__(self):
+        """Signups in signup_id order."""
+        return self.scan()
+
+    def count(self):
+        return self._connect().execute('SELECT COUNT(*) FROM signups').fetchone()[0]
+
+    def info(self):
+        return {'backend': self.backend, 'path': self.path, 'count': self.count(),
+                'import_skipped': len(self.import_skipped())}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def build_signup_store():
+    """Signup store chosen by SIGNUP_STORE."""
+    if SIGNUP_STORE == 'jsonl':
+        return JSONLSignupStore(SIGNUP_LOG_PATH, SIGNUP_LEGACY_PATH)
+    return SQLiteSignupStore(SIGNUP_DB_PATH, (SIGNUP_LOG_PATH, SIGNUP_LEGACY_PATH))
+
+
+def get_signup_store():
+    """Process-wide signup store."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = build_signup_store()
+    return _store
+
+
+def set_signup_store(store):
+    """Replace the process-wide signup store (e.g. to point it at a temp dir)."""
+    global _store
+    with _store_lock:
+        _store = store
+    return store
+
+
+_writer = None
+
+
+def get_signup_writer():
+    """Process-wide group-commit writer for signups, or None in immediate mode."""
+    global _writer
+    if SIGNUP_DURABILITY != 'group':
+        return None
+    if _writer is None:
+        with _store_lock:
+            if _writer is None:
+                # Resolve the store per batch, so set_signup_store() applies to queued writes too
+                _writer = start_writer(lambda signups: get_signup_store().append_many(signups),
+                                       SIGNUP_GROUP_COMMIT_SIZE, SIGNUP_GROUP_COMMIT_MS / 1000.0,
+                                       name='signup-group-commit')
+    return _writer
+
+
+def append_signup(signup):
+    """
+    Record a signup with the configured durability mode.
+
+    Returns:
+        int: signup_id, once the signup is on disk
+
+    Raises:
+        DuplicateSignupError: if pmc_id or email is already signed up
+        group_commit.CommitPendingError: group mode only, if the signup is
+            still queued after SIGNUP_COMMIT_TIMEOUT (it will be recorded)
+    """
+    writer = get_signup_writer()
+    if writer is None:
+        return get_signup_store().append(signup)
+    return writer.write(signup, SIGNUP_COMMIT_TIMEOUT)
+
+
+def signup_store_info():
+    """Store backend and size, plus group-commit batching counters when enabled."""
+    data = get_signup_store().info()
+    data['durability'] = SIGNUP_DURABILITY
+    if _writer is not None:
+        data['group_commit'] = _writer.info()
+    return data
@@ -0,0 +1,215 @@
+"""
+SOLVY Single-Flight - Coalesce identical in-flight calls
+========================================================
+
+Purpose: When many requests need the same expensive, idempotent result at
+once (a broadcast question to Kimi, a retried payment intent), make one
+call and hand its result to everyone waiting.
+
+How it works:
+- The first caller for a key (the leader) runs the call; callers arriving
+  with the same key while it runs wait on it and share its result (or its
+  exception)
+- With a lock_dir, leaders for the same key in different processes also
+  serialize on a lock file named by the key, and a leader that gets the
+  lock after another process finished runs recheck() (e.g. a shared cache
+  lookup) instead of the call. A leader that can't get the lock within
+  lock_wait seconds makes the call itself.
+- AsyncSingleFlight does the same for coroutines on one event loop
+
+Author: SOLVY Platform
+"""
+
+import asyncio
+import fcntl
+import os
+import threading
+import time
+
+
+# Poll interval while another worker holds a key's lock
+_LOCK_POLL = 0.01
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls that share a key.
+
+    Args:
+        lock_dir: Directory for cross-process lock files (None = this process only)
+        lock_wait: Seconds a leader waits for another worker's lock on the
+                   same key before making the call itself
+    """
+
+    def __init__(self, lock_dir=None, lock_wait=25):
+        self.lock_dir = lock_dir
+        self.lock_wait = lock_wait
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.collapsed = 0
+        self.collapsed_across_workers = 0
+        self.lock_timeouts = 0
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+
+    def do(self, key, fn, recheck=None):
+        """
+        Run fn() once for all concurrent callers with the same key.
+
+        Args:
+            key: Hex string identifying identical requests
+            fn: Zero-argument callable making the real call
+            recheck: Optional zero-argument callable run after the
+                cross-process lock is acquired; a non-None return is used
+                as the result instead of calling fn (host mode only)
+
+        Returns:
+            tuple: (result, shared) where shared is True if this caller
+            reused another request's result
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.collapsed += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        shared = False
+        try:
+            if self.lock_dir and recheck is not None:
+                call.result, shared = self._do_locked(key, fn, recheck)
+            else:
+                call.result = fn()
+                with self._lock:
+                    self.executed += 1
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, shared
+
+    def _acquire(self, path):
+        """
+        Open and exclusively lock the key's lock file, or None after lock_wait.
+
+        The holder deletes the file before unlocking, so a lock taken on a
+        file that has since been unlinked (or replaced) is retried on the
+        current one.
+        """
+        deadline = time.monotonic() + self.lock_wait
+        while True:
+            lock_file = open(path, 'a')
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        lock_file.close()
+                        return None
+                    time.sleep(_LOCK_POLL)
+            try:
+                current = os.stat(path)
+            except FileNotFoundError:
+                current = None
+            if current is not None and current.st_ino == os.fstat(lock_file.fileno()).st_ino:
+                return lock_file
+            lock_file.close()
+
+    def _do_locked(self, key, fn, recheck):
+        path = os.path.join(self.lock_dir, f"{key}.lock")
+        lock_file = self._acquire(path)
+        if lock_file is None:
+            # Another worker's call is stuck; don't queue behind it
+            result = fn()
+            with self._lock:
+                self.lock_timeouts += 1
+                self.executed += 1
+            return result, False
+        try:
+            result = recheck()
+            if result is not None:
+                with self._lock:
+                    self.collapsed_across_workers += 1
+                return result, True
+            result = fn()
+            with self._lock:
+                self.executed += 1
+            return result, False
+        finally:
+            os.unlink(path)
+            lock_file.close()
+
+    def info(self):
+        with self._lock:
+            return {
+                'mode': 'host' if self.lock_dir else 'process',
+                'executed': self.executed,
+                'collapsed': self.collapsed,
+                'collapsed_across_workers': self.collapsed_across_workers,
+                'lock_timeouts': self.lock_timeouts,
+                'in_flight': len(self._calls)
+            }
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines sharing one event loop."""
+
+    def __init__(self):
+        self._calls = {}
+        self.executed = 0
+        self.collapsed = 0
+
+    async def do(self, key, fn):
+        """
+        Await fn() once for all concurrent callers with the same key.
+
+        The call runs as its own task, so a caller that disconnects (is
+        cancelled) doesn't cancel it for the others.
+
+        Returns:
+            tuple: (result, shared) as in SingleFlight.do
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+        if shared:
+            self.collapsed += 1
+        else:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._finish(key))
+        return await asyncio.shield(task), shared
+
+    def _finish(self, key):
+        del self._calls[key]
+        self.executed += 1
+
+    def info(self):
+        return {
+            'mode': 'async',
+            'executed': self.executed,
+            'collapsed': self.collapsed,
+            'in_flight': len(self._calls)
+        }
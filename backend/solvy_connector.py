@@ -1,33 +1,133 @@
 """
 SOLVY Connector - Real Stripe Integration for Virtual Card Issuing
 Complete financial platform with virtual card issuing
+
+Stripe reachability is checked in the background (StripeHealth): importing
+this module, and booting a worker, never waits on the network. The first
+status read starts a probe and later reads re-probe once the result is
+older than STRIPE_HEALTH_INTERVAL seconds (STRIPE_HEALTH_RETRY after a
+failure); every read returns the cached result immediately.
 """
 
 import os
+import threading
+import time
+from datetime import datetime
+
 import stripe
 from flask import jsonify
 
+from stripe_card_cache import get_card_cache
+from stripe_client import configure_stripe, stripe_client_info
+
+# Seconds a successful Stripe probe stays fresh
+STRIPE_HEALTH_INTERVAL = float(os.getenv('STRIPE_HEALTH_INTERVAL', '300'))
+
+# Seconds before a failed probe is retried
+STRIPE_HEALTH_RETRY = float(os.getenv('STRIPE_HEALTH_RETRY', '30'))
+
+
+class StripeHealth:
+    """
+    Cached Stripe connection status, refreshed by a background probe.
+
+    status is one of:
+        unconfigured - no STRIPE_SECRET_KEY
+        pending      - first probe still running
+        connected    - last probe succeeded
+        failed       - last probe raised (see error)
+    """
+
+    def __init__(self, probe=None, interval=None, retry=None):
+        self.probe = probe or stripe.Balance.retrieve
+        self.interval = STRIPE_HEALTH_INTERVAL if interval is None else interval
+        self.retry = STRIPE_HEALTH_RETRY if retry is None else retry
+        self._reset(os.getpid())
+
+    def _reset(self, pid):
+        self._pid = pid
+        self._lock = threading.Lock()
+        self._status = 'pending'
+        self._error = None
+        self._checked_at = None
+        self._checked = None
+        self._latency_ms = None
+        self._probing = False
+        self.probes = 0
+
+    def _stale(self):
+        if self._checked is None:
+            return True
+        max_age = self.interval if self._status == 'connected' else self.retry
+        return time.monotonic() - self._checked >= max_age
+
+    def refresh(self, force=False):
+        """Start a background probe if the cached result is stale (or force); never blocks."""
+        if not stripe.api_key:
+            return
+        if self._pid != os.getpid():
+            # Forked worker: the parent's probe thread and lock aren't ours
+            self._reset(os.getpid())
+        with self._lock:
+            if self._probing or not (force or self._stale()):
+                return
+            self._probing = True
+        threading.Thread(target=self._run, name='stripe-health', daemon=True).start()
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            self.probe()
+            status, error = 'connected', None
+        except Exception as e:
+            status, error = 'failed', str(e)
+        with self._lock:
+            changed = status != self._status
+            self._status, self._error = status, error
+            self._latency_ms = round((time.perf_counter() - started) * 1000, 1)
+            self._checked = time.monotonic()
+            self._checked_at = datetime.utcnow().isoformat()
+            self._probing = False
+            self.probes += 1
+        if changed:
+            print("✅ Stripe connection successful" if status == 'connected' else f"❌ Stripe connection failed: {error}")
+
+    def snapshot(self):
+        """Current cached status (kicks off a refresh if it is stale)."""
+        if not stripe.api_key:
+            return {'status': 'unconfigured', 'connected': False}
+        self.refresh()
+        with self._lock:
+            return {
+                'status': self._status,
+                'connected': self._status == 'connected',
+                'error': self._error,
+                'checked_at': self._checked_at,
+                'latency_ms': self._latency_ms,
+                'refreshing': self._probing
+            }
+
+    @property
+    def connected(self):
+        return self.snapshot()['connected']
+
+
 class SOLVYStripeConnector:
     def __init__(self):
-        # Initialize Stripe with real API keys
-        stripe.api_key = os.getenv('STRIPE_SECRET_KEY')
-        self.stripe_connected = bool(stripe.api_key)
+        # Initialize Stripe with real API keys and the pooled client (no network call here; see StripeHealth)
+        configure_stripe()
+        self.health = StripeHealth()
         self.baanx_status = "contract_pending"
         self.alchemy_status = "planning"
-        
-        # Test connection on startup
-        if self.stripe_connected:
-            try:
-                stripe.Balance.retrieve()
-                print("✅ Stripe connection successful")
-            except Exception as e:
-                print(f"❌ Stripe connection failed: {e}")
-                self.stripe_connected = False
+
+    @property
+    def stripe_connected(self):
+        return self.health.connected
 
     # ===== VIRTUAL CARD ISSUING METHODS =====
     
-    def create_cardholder(self, member_data):
-        """Create real Stripe cardholder for virtual card issuing"""
+    def create_cardholder(self, member_data, idempotency_key=None):
+        """Create real Stripe cardholder for virtual card issuing (retry-safe with an idempotency_key)"""
         try:
             cardholder = stripe.issuing.Cardholder.create(
                 name=member_data['name'],
@@ -43,14 +143,16 @@ class SOLVYStripeConnector:
                         'postal_code': member_data['address']['postal_code'],
                         'country': 'US',
                     },
-                }
+                },
+                idempotency_key=idempotency_key
             )
+            get_card_cache().invalidate()
             return cardholder
         except Exception as e:
             raise Exception(f"Cardholder creation failed: {str(e)}")
     
-    def create_virtual_card(self, cardholder_id, card_data=None):
-        """Issue real virtual card"""
+    def create_virtual_card(self, cardholder_id, card_data=None, idempotency_key=None):
+        """Issue real virtual card (retry-safe with an idempotency_key)"""
         try:
             if card_data is None:
                 card_data = {}
@@ -67,29 +169,25 @@ class SOLVYStripeConnector:
                             'interval': 'all_time',
                         },
                     ],
-                }
+                },
+                idempotency_key=idempotency_key
             )
+            get_card_cache().invalidate()
             return card
         except Exception as e:
             raise Exception(f"Virtual card creation failed: {str(e)}")
     
     def list_cardholders(self):
-        """List all cardholders"""
+        """List all cardholders (every page, served from the card cache)"""
         try:
-            cardholders = stripe.issuing.Cardholder.list(limit=10)
-            return cardholders
+            return get_card_cache().cardholders()
         except Exception as e:
             raise Exception(f"Failed to list cardholders: {str(e)}")
     
     def list_cards(self, cardholder_id=None):
-        """List all issued cards"""
+        """List all issued cards, optionally for one cardholder (served from the card cache)"""
         try:
-            params = {'limit': 10}
-            if cardholder_id:
-                params['cardholder'] = cardholder_id
-                
-            cards = stripe.issuing.Card.list(**params)
-            return cards
+            return get_card_cache().cards(cardholder_id)
         except Exception as e:
             raise Exception(f"Failed to list cards: {str(e)}")
 
@@ -182,11 +280,11 @@ def test_connections():
     return connector.test_connection()
 
 # Virtual card functions
-def create_cardholder(member_data):
-    return connector.create_cardholder(member_data)
+def create_cardholder(member_data, idempotency_key=None):
+    return connector.create_cardholder(member_data, idempotency_key)
 
-def create_virtual_card(cardholder_id, card_data=None):
-    return connector.create_virtual_card(cardholder_id, card_data)
+def create_virtual_card(cardholder_id, card_data=None, idempotency_key=None):
+    return connector.create_virtual_card(cardholder_id, card_data, idempotency_key)
 
 def list_cardholders():
     return connector.list_cardholders()
@@ -200,38 +298,41 @@ class SOLVYDebitCardConnector:
         self._connector = connector
 
     def generate_connection_report(self):
-        # Return combined connection status and basic diagnostics
+        # Return combined connection status and basic diagnostics (cached; never probes inline)
         return {
-            'stripe': {
-                'connected': self._connector.stripe_connected
-            },
+            'stripe': self._connector.health.snapshot(),
+            'stripe_client': stripe_client_info(),
+            'card_cache': get_card_cache().info(),
             'services': {
                 'baanx': getattr(self._connector, 'baanx_status', 'unknown'),
                 'alchemy': getattr(self._connector, 'alchemy_status', 'unknown')
             }
         }
 
-    def get_debit_card_data(self, use_backup=False):
-        # Return sample card data or live via Stripe connector
+    def get_debit_card_data(self, use_backup=False, cardholder_id=None):
+        # Return sample card data or live cards from the in-memory card cache
         try:
-            cards = self._connector.list_cards()
-            # Convert to simple serializable structure
-            simple = []
-            for c in getattr(cards, 'data', []) if hasattr(cards, 'data') else cards:
-                simple.append({
-                    'id': getattr(c, 'id', str(c)),
-                    'brand': getattr(c, 'brand', 'VISA'),
-                    'last4': getattr(c, 'last4', '0000'),
-                    'status': getattr(c, 'status', 'active')
-                })
-
-            if not simple:
+            if not stripe.api_key:
+                raise RuntimeError('Stripe is not configured')
+            cards = self._connector.list_cards(cardholder_id)
+            simple = [{
+                'id': c['id'],
+                'cardholder': c['cardholder'],
+                'brand': c['brand'],
+                'last4': c['last4'],
+                'status': c['status']
+            } for c in cards]
+
+            if not simple and not cardholder_id:
                 # Fallback sample
                 simple = [{'id': 'card_000', 'brand': 'VISA', 'last4': '0000', 'status': 'active'}]
 
+            cache = get_card_cache().info()
             return {
                 'cards': simple,
-                'source': 'stripe' if self._connector.stripe_connected else 'mock'
+                'source': 'stripe' if cards else 'mock',
+                'cached_at': cache['loaded_at'],
+                'stale': cache['stale']
             }
         except Exception:
             return {
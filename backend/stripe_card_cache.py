@@ -0,0 +1,298 @@
+"""
+SOLVY Card Cache - In-memory Stripe Issuing cards and cardholders
+=================================================================
+
+Purpose: Serve the dashboard's card lists from memory. Listing cards used
+to cost a Stripe round trip per page view and only ever saw the first 10
+cards; the cache holds every card and cardholder and refreshes them in the
+background.
+
+How it works:
+- A load walks every page of issuing.Card.list and issuing.Cardholder.list
+  (auto-pagination, 100 per page) and keeps a plain-dict snapshot with
+  indexes by card id, cardholder id and cards per cardholder
+- Reads within STRIPE_CARD_CACHE_TTL are served as-is; older snapshots are
+  still served (stale-while-revalidate) for up to STRIPE_CARD_CACHE_STALE
+  seconds while one background thread reloads them
+- Only a cold or expired cache makes the caller wait, and concurrent
+  callers share that single load
+- A failed reload keeps serving the previous snapshot (with the error in
+  info()) and is retried on the next read
+- invalidate() (Stripe Issuing webhook, card/cardholder creation) marks
+  the snapshot stale and starts a reload. It also touches a signal file;
+  every worker stats that file on read, so an event delivered to one
+  gunicorn worker invalidates them all
+
+Configuration (environment):
+    STRIPE_CARD_CACHE_TTL=60        seconds a snapshot is fresh
+    STRIPE_CARD_CACHE_STALE=600     seconds a stale snapshot may still be served
+    STRIPE_CARD_CACHE_SIGNAL=...    file touched on invalidation
+
+Author: SOLVY Platform
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+import stripe
+
+STRIPE_CARD_CACHE_TTL = float(os.getenv('STRIPE_CARD_CACHE_TTL', '60'))
+STRIPE_CARD_CACHE_STALE = float(os.getenv('STRIPE_CARD_CACHE_STALE', '600'))
+STRIPE_CARD_CACHE_SIGNAL = os.getenv('STRIPE_CARD_CACHE_SIGNAL',
+                                     os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                  'stripe_card_cache.signal'))
+
+# Largest page Stripe's list endpoints accept
+PAGE_SIZE = 100
+
+
+def _field(obj, name, default=None):
+    try:
+        value = obj.get(name, default) if isinstance(obj, dict) else getattr(obj, name, default)
+    except AttributeError:
+        value = default
+    return default if value is None else value
+
+
+def _object_id(value):
+    # Expandable fields arrive as an id or as the full object
+    return value if isinstance(value, str) or value is None else _field(value, 'id')
+
+
+def simplify_card(card):
+    """Serializable subset of an issuing.Card."""
+    return {
+        'id': _field(card, 'id'),
+        'cardholder': _object_id(_field(card, 'cardholder')),
+        'brand': _field(card, 'brand', 'Visa'),
+        'last4': _field(card, 'last4', '0000'),
+        'exp_month': _field(card, 'exp_month'),
+        'exp_year': _field(card, 'exp_year'),
+        'type': _field(card, 'type'),
+        'status': _field(card, 'status', 'active'),
+        'currency': _field(card, 'currency'),
+        'created': _field(card, 'created')
+    }
+
+
+def simplify_cardholder(cardholder):
+    """Serializable subset of an issuing.Cardholder."""
+    return {
+        'id': _field(cardholder, 'id'),
+        'name': _field(cardholder, 'name'),
+        'email': _field(cardholder, 'email'),
+        'type': _field(cardholder, 'type'),
+        'status': _field(cardholder, 'status'),
+        'created': _field(cardholder, 'created')
+    }
+
+
+def load_issuing_snapshot():
+    """Every Issuing card and cardholder, following Stripe's pagination."""
+    cards = [simplify_card(card)
+             for card in stripe.issuing.Card.list(limit=PAGE_SIZE).auto_paging_iter()]
+    cardholders = [simplify_cardholder(holder)
+                   for holder in stripe.issuing.Cardholder.list(limit=PAGE_SIZE).auto_paging_iter()]
+    return cards, cardholders
+
+
+class CardSnapshot:
+    """One loaded view of cards and cardholders with lookup indexes."""
+
+    def __init__(self, cards, cardholders):
+        self.cards = cards
+        self.cardholders = cardholders
+        self.cards_by_id = {card['id']: card for card in cards}
+        self.cardholders_by_id = {holder['id']: holder for holder in cardholders}
+        self.cards_by_cardholder = {}
+        for card in cards:
+            self.cards_by_cardholder.setdefault(card['cardholder'], []).append(card)
+        self.loaded = time.monotonic()
+        self.loaded_at = datetime.utcnow().isoformat()
+
+
+class IssuingCardCache:
+    """
+    Stale-while-revalidate cache of Stripe Issuing cards and cardholders.
+
+    Args:
+        loader: Callable returning (cards, cardholders) as lists of dicts
+        ttl: Seconds a snapshot is served without reloading
+        stale_ttl: Seconds past which a snapshot is too old to serve
+        signal_path: File whose mtime marks a cross-worker invalidation (None = this process only)
+    """
+
+    def __init__(self, loader=load_issuing_snapshot, ttl=STRIPE_CARD_CACHE_TTL,
+                 stale_ttl=STRIPE_CARD_CACHE_STALE, signal_path=STRIPE_CARD_CACHE_SIGNAL):
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.signal_path = signal_path
+        self._reset(os.getpid())
+
+    def _reset(self, pid):
+        self._pid = pid
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._snapshot = None
+        self._invalidated = False
+        self._signal = self._signal_mtime()
+        self._refreshing = False
+        self._error = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.loads = 0
+        self.failures = 0
+        self.invalidations = 0
+
+    def _signal_mtime(self):
+        if not self.signal_path:
+            return None
+        try:
+            return os.stat(self.signal_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _check_signal(self):
+        mtime = self._signal_mtime()
+        if mtime != self._signal:
+            self._signal = mtime
+            self._invalidated = True
+
+    def _age(self, snapshot):
+        return time.monotonic() - snapshot.loaded
+
+    def get(self):
+        """
+        Current snapshot, reloading only when there is none or it is too old to serve.
+
+        Raises:
+            The loader's exception when nothing has been loaded yet (or the
+            last snapshot is past stale_ttl) and the load fails
+        """
+        if self._pid != os.getpid():
+            # Forked worker: the parent's threads and locks aren't ours
+            self._reset(os.getpid())
+        with self._lock:
+            self._check_signal()
+            snapshot = self._snapshot
+            if snapshot is not None and self._age(snapshot) < self.stale_ttl:
+                if self._invalidated or self._age(snapshot) >= self.ttl:
+                    self.stale_hits += 1
+                    self._start_refresh()
+                else:
+                    self.hits += 1
+                return snapshot
+        return self._load()
+
+    def _start_refresh(self):
+        # Caller holds self._lock
+        if self._refreshing:
+            return
+        self._refreshing = True
+        threading.Thread(target=self._refresh, name='card-cache-refresh', daemon=True).start()
+
+    def _refresh(self):
+        try:
+            self._load(force=True)
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _load(self, force=False):
+        with self._load_lock:
+            if not force:
+                # Someone else may have loaded while we waited for the lock
+                with self._lock:
+                    snapshot = self._snapshot
+                    if snapshot is not None and not self._invalidated and self._age(snapshot) < self.ttl:
+                        self.hits += 1
+                        return snapshot
+            with self._lock:
+                # Invalidations arriving during this load flag the next one
+                self._invalidated = False
+            try:
+                snapshot = CardSnapshot(*self.loader())
+            except Exception as e:
+                with self._lock:
+                    self._invalidated = True
+                    self._error = str(e)
+                    self.failures += 1
+                    if force and self._snapshot is not None:
+                        return self._snapshot
+                raise
+            with self._lock:
+                self._snapshot = snapshot
+                self._error = None
+                self.loads += 1
+            return snapshot
+
+    def invalidate(self):
+        """Mark the snapshot stale in every worker and start reloading it here."""
+        if self.signal_path:
+            try:
+                with open(self.signal_path, 'a'):
+                    pass
+                os.utime(self.signal_path)
+            except OSError:
+                pass
+        with self._lock:
+            self._signal = self._signal_mtime()
+            self._invalidated = True
+            self.invalidations += 1
+            if self._snapshot is not None and self._pid == os.getpid():
+                self._start_refresh()
+
+    def cards(self, cardholder_id=None):
+        """All cards, or those of one cardholder."""
+        snapshot = self.get()
+        if cardholder_id:
+            return snapshot.cards_by_cardholder.get(cardholder_id, [])
+        return snapshot.cards
+
+    def cardholders(self):
+        return self.get().cardholders
+
+    def info(self):
+        with self._lock:
+            snapshot = self._snapshot
+            return {
+                'cards': len(snapshot.cards) if snapshot else 0,
+                'cardholders': len(snapshot.cardholders) if snapshot else 0,
+                'loaded_at': snapshot.loaded_at if snapshot else None,
+                'age_seconds': round(self._age(snapshot), 1) if snapshot else None,
+                'stale': bool(snapshot) and (self._invalidated or self._age(snapshot) >= self.ttl),
+                'refreshing': self._refreshing,
+                'ttl': self.ttl,
+                'stale_ttl': self.stale_ttl,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'loads': self.loads,
+                'failures': self.failures,
+                'invalidations': self.invalidations,
+                'last_error': self._error
+            }
+
+
+_card_cache = None
+_card_cache_lock = threading.Lock()
+
+
+def get_card_cache():
+    """Process-wide Issuing card cache."""
+    global _card_cache
+    if _card_cache is None:
+        with _card_cache_lock:
+            if _card_cache is None:
+                _card_cache = IssuingCardCache()
+    return _card_cache
+
+
+def set_card_cache(cache):
+    """Replace the process-wide card cache (tests, benchmarks)."""
+    global _card_cache
+    _card_cache = cache
@@ -0,0 +1,178 @@
+"""
+SOLVY Stripe Client - Pooled, tunable HTTP client for the Stripe SDK
+====================================================================
+
+Purpose: One place that decides how this process talks to Stripe. The SDK
+default gives every thread its own requests session (a fresh TLS
+handshake per thread) with an 80 second timeout and no retries; a gthread
+worker paying for a card page or an intent should neither open eight
+connections nor hang for over a minute.
+
+How it works:
+- configure_stripe() sets the SDK's process-wide settings once: API key,
+  API base (point it at stripe_mock_server.py for local load tests),
+  network retries and stripe.default_http_client
+- The default client is a stripe.RequestsClient over a single pooled
+  requests session shared by every thread: up to STRIPE_POOL_SIZE
+  keep-alive connections (TCP keep-alive on, so idle sockets survive
+  NATs), separate connect and read timeouts
+- Retries are left to the SDK (STRIPE_MAX_RETRIES): it retries connection
+  errors, 409s and 5xx with the same Idempotency-Key, so a retried create
+  never makes a second object; the transport itself never re-sends
+- A forked worker builds its own pool instead of sharing the parent's
+  sockets
+- set_stripe_http_client() swaps in any stripe.HTTPClient (tests, a
+  different transport)
+
+Configuration (environment):
+    STRIPE_SECRET_KEY=sk_...
+    STRIPE_API_BASE=https://api.stripe.com   e.g. http://127.0.0.1:12111 for the mock
+    STRIPE_POOL_SIZE=20             pooled connections per worker
+    STRIPE_CONNECT_TIMEOUT=5        seconds
+    STRIPE_READ_TIMEOUT=30          seconds
+    STRIPE_MAX_RETRIES=2            SDK retries per request
+    STRIPE_TCP_KEEPALIVE=true
+
+Author: SOLVY Platform
+"""
+
+import os
+import socket
+import threading
+
+import requests
+import stripe
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY')
+STRIPE_API_BASE = os.getenv('STRIPE_API_BASE')
+STRIPE_POOL_SIZE = int(os.getenv('STRIPE_POOL_SIZE', '20'))
+STRIPE_CONNECT_TIMEOUT = float(os.getenv('STRIPE_CONNECT_TIMEOUT', '5'))
+STRIPE_READ_TIMEOUT = float(os.getenv('STRIPE_READ_TIMEOUT', '30'))
+STRIPE_MAX_RETRIES = int(os.getenv('STRIPE_MAX_RETRIES', '2'))
+STRIPE_TCP_KEEPALIVE = os.getenv('STRIPE_TCP_KEEPALIVE', 'true').lower() == 'true'
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled sockets have SO_KEEPALIVE set."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        if STRIPE_TCP_KEEPALIVE:
+            kwargs['socket_options'] = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            ]
+        super().init_poolmanager(*args, **kwargs)
+
+
+def new_session(pool_size=STRIPE_POOL_SIZE):
+    """requests session with one keep-alive pool of pool_size connections per host."""
+    adapter = _KeepAliveAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class PooledRequestsClient(stripe.RequestsClient):
+    """stripe.RequestsClient sharing one pooled session across threads."""
+
+    def __init__(self, pool_size=STRIPE_POOL_SIZE, connect_timeout=STRIPE_CONNECT_TIMEOUT,
+                 read_timeout=STRIPE_READ_TIMEOUT, **kwargs):
+        super().__init__(timeout=(connect_timeout, read_timeout), session=new_session(pool_size), **kwargs)
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+    def close(self):
+        super().close()
+        self._session.close()
+
+
+_lock = threading.Lock()
+_settings = None
+_client = None
+
+
+def configure_stripe(api_key=None, api_base=None, max_retries=None, pool_size=None, http_client=None, force=False):
+    """
+    Apply Stripe SDK settings for this process (first call wins unless force).
+
+    Arguments left as None fall back to the environment; repeat calls
+    without force are no-ops, so every module that uses Stripe can call
+    this at import.
+
+    Returns:
+        stripe.HTTPClient: the client now in use
+    """
+    global _settings
+    with _lock:
+        if _settings is not None and not force:
+            return _client
+        _settings = {
+            'api_key': api_key or STRIPE_SECRET_KEY,
+            'api_base': api_base or STRIPE_API_BASE,
+            'max_retries': STRIPE_MAX_RETRIES if max_retries is None else max_retries,
+            'pool_size': pool_size or STRIPE_POOL_SIZE,
+            'custom_client': http_client is not None
+        }
+        if _settings['api_key']:
+            stripe.api_key = _settings['api_key']
+        if _settings['api_base']:
+            stripe.api_base = _settings['api_base']
+        stripe.max_network_retries = _settings['max_retries']
+        _install(http_client or PooledRequestsClient(pool_size=_settings['pool_size']))
+        return _client
+
+
+def _install(client):
+    # Caller holds _lock
+    global _client
+    previous, _client = _client, client
+    stripe.default_http_client = client
+    if previous is not None and previous is not client:
+        try:
+            previous.close()
+        except Exception:
+            pass
+
+
+def set_stripe_http_client(client):
+    """Route every Stripe SDK call through `client` (a stripe.HTTPClient)."""
+    configure_stripe()
+    with _lock:
+        _settings['custom_client'] = True
+        _install(client)
+
+
+def get_stripe_http_client():
+    """The stripe.HTTPClient this process uses (configuring from the environment if needed)."""
+    return configure_stripe()
+
+
+def _after_fork():
+    # The parent's pooled sockets (and locks) aren't ours; open a fresh pool
+    global _lock, _client
+    _lock = threading.Lock()
+    if _settings is not None and not _settings['custom_client']:
+        _client = PooledRequestsClient(pool_size=_settings['pool_size'])
+        stripe.default_http_client = _client
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def stripe_client_info():
+    """Current Stripe transport settings (no secrets)."""
+    client = _client
+    return {
+        'configured': _settings is not None,
+        'api_base': stripe.api_base,
+        'live_key': bool(stripe.api_key) and stripe.api_key.startswith(('sk_live_', 'rk_live_')),
+        'max_retries': stripe.max_network_retries,
+        'client': type(client).__name__ if client is not None else None,
+        'pool_size': getattr(client, 'pool_size', None),
+        'connect_timeout': getattr(client, 'connect_timeout', None),
+        'read_timeout': getattr(client, 'read_timeout', None)
+    }
@@ -0,0 +1,376 @@
+"""
+SOLVY Stripe Mock Server - Local stand-in for the Stripe API
+============================================================
+
+Purpose: Exercise the payment path (api/stripe_payments), card
+provisioning (card_provisioning.py), the card cache and the Stripe
+connector end to end - including load tests at real concurrency - without
+a Stripe account, network or test-mode rate limits.
+
+Serves (form-encoded requests, Stripe-shaped JSON responses):
+- POST /v1/payment_intents                create an intent (requires_payment_method)
+- POST /v1/payment_intents/<id>/confirm   confirm it (succeeded; confirming twice is a 400)
+- GET  /v1/payment_intents/<id>           retrieve
+- POST /v1/issuing/cardholders            create a cardholder
+- POST /v1/issuing/cards                  create a card (cardholder must exist)
+- GET  /v1/issuing/cardholders            list, with limit / starting_after paging
+- GET  /v1/issuing/cards                  list, also filtered by ?cardholder=
+- GET  /v1/balance                        balance: confirmed intents are "available"
+- GET  /stats                             connections, requests, objects created,
+                                          idempotent replays, injected failures
+
+Speaks HTTP/1.1 keep-alive, so /stats shows whether a client reuses
+pooled connections (stripe_client) or opens new ones.
+
+Idempotency-Key behaves like Stripe's: a repeated key with the same
+parameters replays the stored response (Idempotent-Replayed: true), the
+same key with different parameters is a 400 idempotency_error.
+
+--fail-rate drops that fraction of create/confirm responses: the change is made
+and stored under its key, but the client gets a 500 (with
+Stripe-Should-Retry), as if the connection died on the way back. A client
+that retries with the same Idempotency-Key gets the stored result and no
+duplicate.
+
+Usage:
+    python stripe_mock_server.py --port 12111 --delay-ms 30 --fail-rate 0.05
+    STRIPE_SECRET_KEY=sk_test_mock STRIPE_API_BASE=http://127.0.0.1:12111 python app_production.py
+    STRIPE_SECRET_KEY=sk_test_mock python card_provisioning.py members.csv --api-base http://127.0.0.1:12111
+    python benchmarks/stripe_load.py --concurrency 32      # starts its own mock
+
+Author: SOLVY Platform
+"""
+
+import argparse
+import itertools
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+_KEY_PART = re.compile(r'\[([^\]]*)\]')
+_INTENT_PATH = re.compile(r'^/v1/payment_intents/([^/]+)(/confirm)?$')
+
+
+def decode_form(body):
+    """Stripe's nested form encoding (a[b][c]=1) as nested dicts."""
+    params = {}
+    for key, value in parse_qsl(body, keep_blank_values=True):
+        head = key.split('[', 1)[0]
+        path = [head] + _KEY_PART.findall(key[len(head):])
+        node = params
+        for part in path[:-1]:
+            node = node.setdefault(part, {})
+        node[path[-1]] = value
+    return params
+
+
+class MockStripeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.stats['connections'] += 1
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Request-Id', f"req_mock{next(self.server.request_ids)}")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status, message, type='invalid_request_error', param=None, code=None):
+        error = {'type': type, 'message': message}
+        if param:
+            error['param'] = param
+        if code:
+            error['code'] = code
+        self._send_json(status, {'error': error})
+
+    def _count(self, name, amount=1):
+        with self.server.lock:
+            self.server.stats[name] += amount
+
+    # ----- GET -----
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path.rstrip('/')
+        query = dict(parse_qsl(url.query))
+
+        if path == '/stats':
+            with self.server.lock:
+                self._send_json(200, dict(self.server.stats))
+            return
+
+        self._count('requests')
+        if self.server.delay:
+            time.sleep(self.server.delay)
+
+        intent_match = _INTENT_PATH.match(path)
+        if path == '/v1/balance':
+            with self.server.lock:
+                available = sum(intent['amount'] for intent in self.server.payment_intents.values()
+                                if intent['status'] == 'succeeded')
+            self._send_json(200, {
+                'object': 'balance',
+                'livemode': False,
+                'available': [{'amount': available, 'currency': 'usd'}],
+                'pending': [{'amount': 0, 'currency': 'usd'}],
+                'issuing': {'available': [{'amount': 100000000, 'currency': 'usd'}]}
+            })
+        elif intent_match and not intent_match.group(2):
+            with self.server.lock:
+                intent = self.server.payment_intents.get(intent_match.group(1))
+                intent = dict(intent) if intent else None
+            if intent is None:
+                self._error(404, f"No such payment_intent: '{intent_match.group(1)}'", code='resource_missing')
+            else:
+                self._send_json(200, intent)
+        elif path == '/v1/issuing/cardholders':
+            self._send_list(path, self.server.cardholders, query)
+        elif path == '/v1/issuing/cards':
+            self._send_list(path, self.server.cards, query,
+                            lambda card: not query.get('cardholder') or card['cardholder']['id'] == query['cardholder'])
+        else:
+            self._error(404, f"Unrecognized request URL (GET: {path})")
+
+    def _send_list(self, path, objects, query, keep=None):
+        limit = min(max(int(query.get('limit', 10)), 1), 100)
+        with self.server.lock:
+            items = [obj for obj in objects.values() if keep is None or keep(obj)]
+        # Newest first, like Stripe
+        items.reverse()
+        start = 0
+        if query.get('starting_after'):
+            ids = [obj['id'] for obj in items]
+            if query['starting_after'] not in ids:
+                self._error(400, f"No such object: '{query['starting_after']}'", param='starting_after',
+                            code='resource_missing')
+                return
+            start = ids.index(query['starting_after']) + 1
+        page = items[start:start + limit]
+        self._send_json(200, {
+            'object': 'list',
+            'url': path,
+            'has_more': start + limit < len(items),
+            'data': page
+        })
+
+    # ----- POST -----
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length).decode()
+        path = urlparse(self.path).path.rstrip('/')
+        self._count('requests')
+        if self.server.delay:
+            time.sleep(self.server.delay)
+
+        creators = {
+            '/v1/payment_intents': self._create_payment_intent,
+            '/v1/issuing/cardholders': self._create_cardholder,
+            '/v1/issuing/cards': self._create_card
+        }
+        intent_match = _INTENT_PATH.match(path)
+        if intent_match and intent_match.group(2):
+            intent_id = intent_match.group(1)
+            creators[path] = lambda params: self._confirm_payment_intent(intent_id, params)
+        if path not in creators:
+            self._error(404, f"Unrecognized request URL (POST: {path})")
+            return
+
+        params = decode_form(raw)
+        key = self.headers.get('Idempotency-Key')
+        with self.server.lock:
+            stored = self.server.idempotency.get(key) if key else None
+            if stored is not None:
+                if stored['path'] != path or stored['params'] != params:
+                    conflict = True
+                else:
+                    conflict = False
+                    self.server.stats['idempotent_replays'] += 1
+            else:
+                status, body = creators[path](params)
+                # Like Stripe, requests rejected by validation aren't stored
+                if key and status == 200:
+                    self.server.idempotency[key] = {'path': path, 'params': params, 'status': status, 'body': body}
+
+        if stored is not None:
+            if conflict:
+                self._error(400, 'Keys for idempotent requests can only be used with the same parameters '
+                                 'they were first used with.', type='idempotency_error')
+            else:
+                self._send_json(stored['status'], stored['body'], {'Idempotent-Replayed': 'true'})
+            return
+
+        if status == 200 and self.server.fail_rate and random.random() < self.server.fail_rate:
+            # Committed, but the response is "lost"
+            self._count('injected_failures')
+            self._send_json(500, {'error': {'type': 'api_error', 'message': 'Injected failure (the request was applied).'}},
+                            {'Stripe-Should-Retry': 'true'})
+            return
+        self._send_json(status, body)
+
+    def _create_payment_intent(self, params):
+        # Caller holds server.lock
+        try:
+            amount = int(params.get('amount', ''))
+        except ValueError:
+            return 400, {'error': {'type': 'invalid_request_error', 'param': 'amount',
+                                   'message': 'Missing required param: amount.'}}
+        if amount < 50:
+            return 400, {'error': {'type': 'invalid_request_error', 'param': 'amount', 'code': 'amount_too_small',
+                                   'message': 'Amount must be at least $0.50 usd'}}
+        number = len(self.server.payment_intents) + 1
+        intent_id = f'pi_mock{number:08d}'
+        intent = {
+            'id': intent_id,
+            'object': 'payment_intent',
+            'amount': amount,
+            'currency': params.get('currency', 'usd'),
+            'status': 'requires_payment_method',
+            'client_secret': f'{intent_id}_secret_mock',
+            'automatic_payment_methods': params.get('automatic_payment_methods'),
+            'payment_method': None,
+            'created': int(time.time()),
+            'livemode': False
+        }
+        self.server.payment_intents[intent_id] = intent
+        self.server.stats['payment_intents_created'] += 1
+        return 200, dict(intent)
+
+    def _confirm_payment_intent(self, intent_id, params):
+        # Caller holds server.lock
+        intent = self.server.payment_intents.get(intent_id)
+        if intent is None:
+            return 404, {'error': {'type': 'invalid_request_error', 'code': 'resource_missing',
+                                   'message': f"No such payment_intent: '{intent_id}'"}}
+        if intent['status'] == 'succeeded':
+            return 400, {'error': {'type': 'invalid_request_error', 'code': 'payment_intent_unexpected_state',
+                                   'message': 'This PaymentIntent has already succeeded.'}}
+        intent['payment_method'] = params.get('payment_method', 'pm_card_visa')
+        intent['status'] = 'succeeded'
+        self.server.stats['payment_intents_confirmed'] += 1
+        return 200, dict(intent)
+
+    def _create_cardholder(self, params):
+        # Caller holds server.lock
+        for field in ('name', 'billing'):
+            if not params.get(field):
+                return 400, {'error': {'type': 'invalid_request_error', 'param': field,
+                                       'message': f'Missing required param: {field}.'}}
+        number = len(self.server.cardholders) + 1
+        cardholder = {
+            'id': f'ich_mock{number:08d}',
+            'object': 'issuing.cardholder',
+            'name': params['name'],
+            'email': params.get('email'),
+            'phone_number': params.get('phone_number'),
+            'billing': params['billing'],
+            'status': params.get('status', 'active'),
+            'type': params.get('type', 'individual'),
+            'created': int(time.time()),
+            'livemode': False
+        }
+        self.server.cardholders[cardholder['id']] = cardholder
+        self.server.stats['cardholders_created'] += 1
+        return 200, cardholder
+
+    def _create_card(self, params):
+        # Caller holds server.lock
+        cardholder = self.server.cardholders.get(params.get('cardholder'))
+        if cardholder is None:
+            return 400, {'error': {'type': 'invalid_request_error', 'param': 'cardholder', 'code': 'resource_missing',
+                                   'message': f"No such cardholder: '{params.get('cardholder')}'"}}
+        number = len(self.server.cards) + 1
+        card = {
+            'id': f'ic_mock{number:08d}',
+            'object': 'issuing.card',
+            'cardholder': cardholder,
+            'brand': 'Visa',
+            'last4': f'{number % 10000:04d}',
+            'exp_month': 12,
+            'exp_year': time.gmtime().tm_year + 3,
+            'currency': params.get('currency', 'usd'),
+            'type': params.get('type', 'virtual'),
+            'status': params.get('status', 'inactive'),
+            'spending_controls': params.get('spending_controls', {}),
+            'created': int(time.time()),
+            'livemode': False
+        }
+        self.server.cards[card['id']] = card
+        self.server.stats['cards_created'] += 1
+        return 200, card
+
+
+class MockStripeServer(ThreadingHTTPServer):
+    request_queue_size = 1024
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # A client that gave up (timeout, killed job) isn't a server error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def create_server(host='127.0.0.1', port=0, delay_ms=0, fail_rate=0.0, verbose=False):
+    """
+    Build (but don't start) a mock Stripe server; port 0 picks a free port.
+
+    Returns:
+        MockStripeServer: use server.server_address for the bound port
+    """
+    server = MockStripeServer((host, port), MockStripeHandler)
+    server.delay = delay_ms / 1000.0
+    server.fail_rate = fail_rate
+    server.verbose = verbose
+    server.lock = threading.Lock()
+    server.payment_intents = {}
+    server.cardholders = {}
+    server.cards = {}
+    server.idempotency = {}
+    server.request_ids = itertools.count(1)
+    server.stats = {'connections': 0, 'requests': 0, 'payment_intents_created': 0, 'payment_intents_confirmed': 0,
+                    'cardholders_created': 0, 'cards_created': 0, 'idempotent_replays': 0, 'injected_failures': 0}
+    return server
+
+
+def start_in_thread(**kwargs):
+    """Start a mock server on a background thread; returns (server, api_base)."""
+    server = create_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local mock of the Stripe API (payments, balance, issuing)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=12111)
+    parser.add_argument('--delay-ms', type=float, default=0, help='simulated Stripe latency per request')
+    parser.add_argument('--fail-rate', type=float, default=0.0,
+                        help='fraction of create/confirm responses replaced by a 500 after the change is made')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.delay_ms, args.fail_rate, args.verbose)
+    print(f"Mock Stripe API on http://{args.host}:{args.port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,504 @@
+"""
+SOLVY Batch Tax Engine - Vectorized bracket math for member rosters
+===================================================================
+
+Purpose: Run the progressive bracket calculation from `tax_calculations`
+for thousands of members at once (portfolio-wide scenarios, payroll
+rosters) without a Python loop or string formatting per member.
+
+How it works:
+- Bracket limits, rates and the tax owed below each bracket are compiled
+  into NumPy arrays once per tax year and filing status
+- Each income finds its bracket with `searchsorted`, so total tax is one
+  lookup plus one multiply-add
+- Per-bracket amounts come from a single clip over the bracket widths
+
+Results match `calculate_income_tax` to the cent.
+
+Author: SOLVY Platform
+"""
+
+import math
+
+import numpy as np
+
+from tax_calculations import (
+    SE_AGI_FACTOR,
+    SELF_EMPLOYMENT_DEDUCTION,
+    SELF_EMPLOYMENT_TAX_RATE,
+    SEP_IRA_RATE,
+    bracket_tables_version,
+    get_tax_year,
+    normalize_filing_status,
+    normalize_tax_year,
+    solve_break_even_expenses,
+)
+
+
+def _compile_brackets(table):
+    """
+    Convert a compiled BracketTable into arrays for vectorized lookup.
+
+    The cumulative tax is taken from the BracketTable, which sums it in
+    bracket order like `calculate_income_tax` always has, so the floating
+    point results are identical.
+    """
+    limits = np.array(table.limits, dtype=float)
+    lowers = np.array(table.lowers, dtype=float)
+
+    return {
+        'limits': limits,
+        'lowers': lowers,
+        'widths': limits - lowers,
+        'rates': np.array(table.rates, dtype=float),
+        'cumulative_tax': np.array(table.cumulative_tax, dtype=float),
+        'standard_deduction': table.standard_deduction
+    }
+
+
+_batch_tables = {'version': None, 'years': {}}
+
+
+def batch_tables(tax_year=None):
+    """Array form of a tax year's bracket tables, rebuilt when tables are reloaded."""
+    version = bracket_tables_version()
+    if _batch_tables['version'] != version:
+        _batch_tables['years'] = {}
+        _batch_tables['version'] = version
+
+    year = normalize_tax_year(tax_year)
+    tables = _batch_tables['years'].get(year)
+    if tables is None:
+        tables = {status: _compile_brackets(table) for status, table in get_tax_year(year).bracket_tables.items()}
+        _batch_tables['years'][year] = tables
+    return tables
+
+
+def round_cents(values):
+    """
+    Round an array to cents exactly like Python's `round(x, 2)`.
+
+    `np.round` scales by 100 first, which can land on the other side of a
+    half-cent tie from Python's correctly-rounded `round`. Ties are rare, so
+    only those elements are re-rounded in Python.
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, 2)
+
+    scaled = values * 100
+    ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if ties.any():
+        flat = rounded.reshape(-1)
+        for i in np.flatnonzero(ties.reshape(-1)):
+            flat[i] = round(float(values.reshape(-1)[i]), 2)
+
+    return rounded
+
+
+def filing_status_groups(filing_statuses, size):
+    """
+    Split row indices by filing status.
+
+    A missing status (None or '') means 'single', as in the scalar
+    functions; any other status without a bracket table is rejected rather
+    than silently taxed as 'single'.
+
+    Returns:
+        list of (status, index array) pairs
+
+    Raises:
+        ValueError: if a status is unknown
+    """
+    values = np.broadcast_to(np.asarray(filing_statuses, dtype=object), (size,))
+    statuses = values.astype(str)
+    statuses[np.equal(values, None)] = ''
+    groups = {}
+    for status in np.unique(statuses):
+        key = status or 'single'
+        if normalize_filing_status(key) != key:
+            raise ValueError(f"Unknown filing status: {status}")
+        mask = statuses == status
+        groups[key] = mask if key not in groups else (groups[key] | mask)
+
+    return [(status, np.flatnonzero(mask)) for status, mask in groups.items()]
+
+
+def calculate_income_tax_batch(taxable_incomes, filing_statuses='married_jointly', tax_year=None):
+    """
+    Calculate federal income tax for many taxable incomes at once.
+
+    Args:
+        taxable_incomes: Array-like of incomes after deductions
+        filing_statuses: One filing status for everyone, or an array-like
+                         with one status per income
+        tax_year: Tax year whose brackets apply (default DEFAULT_TAX_YEAR)
+
+    Returns:
+        dict of NumPy arrays:
+        - total_income_tax: tax per income (rounded to cents)
+        - effective_rate: percent of taxable income (rounded to 2 places)
+        - marginal_rate: rate of the top bracket reached
+        - bracket_amounts: (n, brackets) taxable amount in each bracket
+        - bracket_taxes: (n, brackets) tax owed in each bracket
+    """
+    incomes = np.atleast_1d(np.asarray(taxable_incomes, dtype=float))
+    n = incomes.shape[0]
+    positive = np.maximum(incomes, 0.0)
+
+    tables = batch_tables(tax_year)
+    bracket_count = max(len(table['limits']) for table in tables.values())
+    tax = np.zeros(n)
+    marginal_rate = np.zeros(n)
+    bracket_amounts = np.zeros((n, bracket_count))
+    bracket_rates = np.zeros((n, bracket_count))
+
+    for status, rows in filing_status_groups(filing_statuses, n):
+        table = tables[status]
+        income = positive[rows]
+        idx = np.searchsorted(table['limits'], income, side='left')
+
+        tax[rows] = table['cumulative_tax'][idx] + (income - table['lowers'][idx]) * table['rates'][idx]
+        marginal_rate[rows] = np.where(income > 0, table['rates'][idx], 0.0)
+
+        width = len(table['limits'])
+        bracket_amounts[rows, :width] = np.clip(income[:, None] - table['lowers'], 0.0, table['widths'])
+        bracket_rates[rows, :width] = table['rates']
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        effective_rate = np.where(incomes > 0, tax / incomes * 100, 0.0)
+
+    return {
+        'total_income_tax': round_cents(tax),
+        'effective_rate': round_cents(effective_rate),
+        'marginal_rate': marginal_rate,
+        'bracket_amounts': round_cents(bracket_amounts),
+        'bracket_taxes': round_cents(bracket_amounts * bracket_rates)
+    }
+
+
+def calculate_w2_scenario_batch(gross_incomes, filing_statuses='married_jointly', dependents=0, tax_year=None):
+    """
+    Calculate W-2 employee taxes for many members at once.
+
+    Mirrors `calculate_w2_scenario` field for field (income tax, FICA with
+    the Social Security wage base and additional Medicare, child tax credit).
+
+    Args:
+        gross_incomes: Array-like of W-2 incomes
+        filing_statuses: One filing status, or one per income
+        dependents: One dependent count, or one per income
+        tax_year: Tax year whose tables apply (default DEFAULT_TAX_YEAR)
+
+    Returns:
+        dict of NumPy arrays rounded to cents
+    """
+    gross = np.atleast_1d(np.asarray(gross_incomes, dtype=float))
+    n = gross.shape[0]
+    dependents = np.broadcast_to(np.asarray(dependents, dtype=float), (n,))
+
+    year = get_tax_year(tax_year)
+    standard_deduction = np.zeros(n)
+    medicare_threshold = np.zeros(n)
+    for status, rows in filing_status_groups(filing_statuses, n):
+        standard_deduction[rows] = year.bracket_table(status).standard_deduction
+        medicare_threshold[rows] = year.medicare_threshold(status)
+
+    taxable_income = np.maximum(0, gross - standard_deduction)
+    income_tax_result = calculate_income_tax_batch(taxable_income, filing_statuses, tax_year)
+    income_tax = income_tax_result['total_income_tax']
+
+    social_security_tax = np.minimum(gross, year.social_security_wage_base) * 0.062
+    medicare_tax = gross * 0.0145
+    additional_medicare = np.maximum(0, gross - medicare_threshold) * 0.009
+    fica_tax = social_security_tax + medicare_tax + additional_medicare
+
+    child_tax_credit = np.minimum(dependents * year.child_tax_credit, income_tax)
+    total_tax = income_tax + fica_tax - child_tax_credit
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        effective_tax_rate = np.where(gross > 0, total_tax / gross * 100, 0.0)
+
+    return {
+        'gross_income': round_cents(gross),
+        'standard_deduction': round_cents(standard_deduction),
+        'taxable_income': round_cents(taxable_income),
+        'income_tax': income_tax,
+        'fica_tax': round_cents(fica_tax),
+        'child_tax_credit': round_cents(child_tax_credit),
+        'total_tax': round_cents(total_tax),
+        'effective_tax_rate': round_cents(effective_tax_rate),
+        'marginal_rate': income_tax_result['marginal_rate'],
+        'take_home_pay': round_cents(gross - total_tax)
+    }
+
+
+def calculate_self_employment_batch(gross_incomes, business_expenses, filing_statuses='married_jointly',
+                                    dependents=0, ibc_contributions=0, sep_ira_contributions=0, tax_year=None):
+    """
+    Calculate self-employed taxes for many scenarios at once.
+
+    Mirrors `calculate_self_employment_scenario`; every argument broadcasts
+    against the others, so a grid of inputs can be passed flattened.
+
+    Returns:
+        dict of NumPy arrays rounded to cents
+    """
+    gross, expenses, dependents, ibc, sep = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(values, dtype=float))
+          for values in (gross_incomes, business_expenses, dependents, ibc_contributions, sep_ira_contributions))
+    )
+    n = gross.shape[0]
+
+    year = get_tax_year(tax_year)
+    standard_deduction = np.zeros(n)
+    for status, rows in filing_status_groups(filing_statuses, n):
+        standard_deduction[rows] = year.bracket_table(status).standard_deduction
+
+    net_income = gross - expenses
+    self_employment_tax = net_income * SELF_EMPLOYMENT_DEDUCTION * SELF_EMPLOYMENT_TAX_RATE
+    se_tax_deduction = self_employment_tax * 0.5
+    agi = net_income - se_tax_deduction - sep
+    taxable_income = np.maximum(0, agi - standard_deduction)
+
+    income_tax_result = calculate_income_tax_batch(taxable_income, filing_statuses, tax_year)
+    income_tax = income_tax_result['total_income_tax']
+    child_tax_credit = np.minimum(dependents * year.child_tax_credit, income_tax)
+    total_tax = income_tax + self_employment_tax - child_tax_credit
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        effective_tax_rate = np.where(gross > 0, total_tax / gross * 100, 0.0)
+
+    return {
+        'gross_income': round_cents(gross),
+        'business_expenses': round_cents(expenses),
+        'net_income': round_cents(net_income),
+        'self_employment_tax': round_cents(self_employment_tax),
+        'se_tax_deduction': round_cents(se_tax_deduction),
+        'agi': round_cents(agi),
+        'taxable_income': round_cents(taxable_income),
+        'income_tax': income_tax,
+        'child_tax_credit': round_cents(child_tax_credit),
+        'total_tax': round_cents(total_tax),
+        'effective_tax_rate': round_cents(effective_tax_rate),
+        'marginal_rate': income_tax_result['marginal_rate'],
+        'take_home_pay': round_cents(gross - expenses - total_tax - ibc - sep),
+        'quarterly_estimated_payment': round_cents(total_tax / 4)
+    }
+
+
+def sweep_w2_vs_self_employment(gross_incomes, business_expenses, sep_ira_contributions=(0,),
+                                filing_status='married_jointly', dependents=0, ibc_contribution=0, tax_year=None):
+    """
+    Compare W-2 and self-employment over a whole grid of what-if inputs.
+
+    Builds the chart data for take-home pay as income, business expenses
+    and SEP IRA contributions vary, in one call. The W-2 side depends only
+    on income, so it is computed once per income; the self-employment side
+    is computed for the full income x expenses x contribution grid in one
+    vectorized pass. For each income and contribution the exact break-even
+    expense level is solved on the bracket structure
+    (see `solve_break_even_expenses`).
+
+    Args:
+        gross_incomes: Income axis
+        business_expenses: Business expense axis
+        sep_ira_contributions: SEP IRA contribution axis
+        filing_status: Tax filing status
+        dependents: Number of dependents
+        ibc_contribution: IBC policy contribution applied to every point
+        tax_year: Tax year whose tables apply (default DEFAULT_TAX_YEAR)
+
+    Returns:
+        dict of nested lists indexed [income][expenses][contribution]
+        (W-2 values by [income], break-even by [income][contribution])
+    """
+    incomes = np.atleast_1d(np.asarray(gross_incomes, dtype=float))
+    expenses = np.atleast_1d(np.asarray(business_expenses, dtype=float))
+    contributions = np.atleast_1d(np.asarray(sep_ira_contributions, dtype=float))
+    shape = (incomes.size, expenses.size, contributions.size)
+
+    w2 = calculate_w2_scenario_batch(incomes, filing_status, dependents, tax_year)
+
+    grid_income, grid_expenses, grid_contribution = (axis.reshape(-1) for axis in
+                                                     np.meshgrid(incomes, expenses, contributions, indexing='ij'))
+    se = calculate_self_employment_batch(grid_income, grid_expenses, filing_status, dependents,
+                                         ibc_contribution, grid_contribution, tax_year)
+
+    se_take_home = se['take_home_pay'].reshape(shape)
+    se_total_tax = se['total_tax'].reshape(shape)
+
+    break_even = [
+        [solve_break_even_expenses(float(income), filing_status, dependents, float(contribution), tax_year)
+         for contribution in contributions]
+        for income in incomes
+    ]
+
+    return {
+        'tax_year': normalize_tax_year(tax_year),
+        'gross_incomes': incomes.tolist(),
+        'business_expenses': expenses.tolist(),
+        'sep_ira_contributions': contributions.tolist(),
+        'filing_status': filing_status,
+        'dependents': dependents,
+        'ibc_contribution': ibc_contribution,
+        'w2_total_tax': w2['total_tax'].tolist(),
+        'w2_take_home_pay': w2['take_home_pay'].tolist(),
+        'se_total_tax': se_total_tax.tolist(),
+        'se_take_home_pay': se_take_home.tolist(),
+        'take_home_difference': round_cents(se_take_home - w2['take_home_pay'][:, None, None]).tolist(),
+        'tax_difference': round_cents(se_total_tax - w2['total_tax'][:, None, None]).tolist(),
+        'break_even_expenses': break_even
+    }
+
+
+def taxable_income_for_tax_batch(taxes, filing_statuses='married_jointly', tax_year=None):
+    """Vectorized BracketTable.taxable_income_for_tax: taxable income on which each tax is owed."""
+    taxes = np.atleast_1d(np.asarray(taxes, dtype=float))
+    n = taxes.shape[0]
+    taxable_income = np.zeros(n)
+
+    tables = batch_tables(tax_year)
+    for status, rows in filing_status_groups(filing_statuses, n):
+        table = tables[status]
+        tax = np.maximum(taxes[rows], 0.0)
+        idx = np.searchsorted(table['cumulative_tax'], tax, side='right') - 1
+        taxable_income[rows] = table['lowers'][idx] + (tax - table['cumulative_tax'][idx]) / table['rates'][idx]
+
+    return taxable_income
+
+
+def optimize_tax_mix_batch(gross_incomes, expense_caps=0, filing_statuses='married_jointly', dependents=0,
+                           sep_limits=np.inf, budgets=np.inf, tax_year=None):
+    """
+    Vectorized `optimize_tax_mix`: tax-minimizing expense and SEP IRA mix per member.
+
+    Same closed form as the scalar version (expenses first, then SEP IRA up
+    to its limit or until income tax reaches the child tax credit), applied
+    to whole arrays. Every argument broadcasts against the others.
+
+    Returns:
+        dict of NumPy arrays rounded to cents
+    """
+    gross, caps, dependents, sep_limits, budgets = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(values, dtype=float))
+          for values in (gross_incomes, expense_caps, dependents, sep_limits, budgets))
+    )
+    n = gross.shape[0]
+    year = get_tax_year(tax_year)
+    child_credit = dependents * year.child_tax_credit
+    available = np.maximum(budgets, 0.0)
+
+    standard_deduction = np.zeros(n)
+    for status, rows in filing_status_groups(filing_statuses, n):
+        standard_deduction[rows] = year.bracket_table(status).standard_deduction
+
+    expenses = np.maximum(0.0, np.minimum(np.minimum(caps, available), gross))
+    net_income = gross - expenses
+
+    sep_room = np.clip(net_income * SE_AGI_FACTOR * SEP_IRA_RATE, 0.0, year.sep_ira_dollar_limit)
+    sep_room = np.minimum(sep_room, np.maximum(sep_limits, 0.0))
+    taxable_before_sep = np.maximum(0.0, net_income * SE_AGI_FACTOR - standard_deduction)
+    useful_sep = np.maximum(0.0, taxable_before_sep - taxable_income_for_tax_batch(child_credit, filing_statuses,
+                                                                                   tax_year))
+    sep_ira = np.maximum(0.0, np.minimum(np.minimum(sep_room, available - expenses), useful_sep))
+
+    baseline = calculate_self_employment_batch(gross, 0, filing_statuses, dependents, tax_year=tax_year)
+    optimized = calculate_self_employment_batch(gross, expenses, filing_statuses, dependents, 0, sep_ira, tax_year)
+
+    owes_income_tax = optimized['income_tax'] > child_credit
+    income_tax_rate = np.where(owes_income_tax, optimized['marginal_rate'], 0.0)
+    se_tax_rate = np.where(net_income > 0, SELF_EMPLOYMENT_DEDUCTION * SELF_EMPLOYMENT_TAX_RATE, 0.0)
+
+    # No income, nothing to optimize (as in the scalar version)
+    has_income = gross > 0
+    total_tax = np.where(has_income, optimized['total_tax'], 0.0)
+    baseline_total_tax = np.where(has_income, baseline['total_tax'], 0.0)
+
+    return {
+        'gross_income': round_cents(gross),
+        'business_expenses': round_cents(expenses),
+        'sep_ira_contribution': round_cents(sep_ira),
+        'sep_ira_limit': round_cents(sep_room),
+        'taxable_income': np.where(has_income, optimized['taxable_income'], 0.0),
+        'total_tax': total_tax,
+        'baseline_total_tax': baseline_total_tax,
+        'tax_savings': round_cents(baseline_total_tax - total_tax),
+        'take_home_pay': np.where(has_income, optimized['take_home_pay'], round_cents(gross)),
+        'marginal_savings_expenses': np.round(se_tax_rate + SE_AGI_FACTOR * income_tax_rate, 4),
+        'marginal_savings_sep_ira': income_tax_rate
+    }
+
+
+def _parse_w2_row(row):
+    """Normalize a JSON object or [income, filing_status, dependents] row."""
+    if isinstance(row, dict):
+        income = row.get('income', 0)
+        filing_status = row.get('filing_status', 'single')
+        dependents = row.get('dependents', 0)
+    elif isinstance(row, (list, tuple)) and row:
+        income = row[0]
+        filing_status = row[1] if len(row) > 1 else 'single'
+        dependents = row[2] if len(row) > 2 else 0
+    else:
+        raise ValueError('Row must be an object or [income, filing_status, dependents]')
+
+    income = float(income)
+    if not math.isfinite(income):
+        # json.loads accepts NaN/Infinity, which would come back as invalid JSON
+        raise ValueError('income must be a finite number')
+    filing_status = filing_status or 'single'
+    if normalize_filing_status(filing_status) != filing_status:
+        # Checked per row so one bad status doesn't fail the whole chunk
+        raise ValueError(f"Unknown filing status: {filing_status}")
+    return income, filing_status, int(dependents or 0)
+
+
+def stream_w2_scenarios(rows, chunk_size=1000, tax_year=None):
+    """
+    Compute W-2 scenarios for an iterable of rows, one chunk at a time.
+
+    Only `chunk_size` rows are held in memory, so a roster of any size can
+    be streamed straight from the request body to the response. Rows that
+    cannot be parsed produce an error record instead of failing the batch.
+
+    Yields:
+        dict per input row, in input order, tagged with its `index`
+    """
+    pending = []
+
+    def flush():
+        parsed = [values for _, values in pending if not isinstance(values, Exception)]
+        columns = {}
+        if parsed:
+            incomes, statuses, dependent_counts = zip(*parsed)
+            result = calculate_w2_scenario_batch(incomes, np.array(statuses, dtype=object), dependent_counts,
+                                                 tax_year)
+            columns = {key: iter(values.tolist()) for key, values in result.items()}
+
+        for i, values in pending:
+            if isinstance(values, Exception):
+                yield {'index': i, 'success': False, 'error': str(values)}
+                continue
+
+            income, filing_status, dependents = values
+            record = {'index': i, 'success': True, 'income': income,
+                      'filing_status': filing_status, 'dependents': dependents}
+            record.update((key, next(column)) for key, column in columns.items())
+            yield record
+
+        pending.clear()
+
+    for i, row in enumerate(rows):
+        if isinstance(row, Exception):
+            # Upstream parse failure (e.g. a malformed NDJSON line)
+            pending.append((i, row))
+            continue
+        try:
+            pending.append((i, _parse_w2_row(row)))
+        except (TypeError, ValueError) as e:
+            pending.append((i, e))
+
+        if len(pending) >= chunk_size:
+            yield from flush()
+
+    yield from flush()
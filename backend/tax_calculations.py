@@ -7,7 +7,7 @@ from W-2 employment to self-employment (data sovereign income).
 
 Key Features:
 - W-2 vs Self-Employment comparison
-- Real 2024 tax brackets
+- Real federal tax brackets per tax year (2024 onward, see tax_tables.py)
 - Self-employment tax calculations (15.3%)
 - Business expense optimization
 - IBC (Infinite Banking Concept) integration
@@ -18,94 +18,109 @@ Author: SOLVY Platform
 Date: November 19, 2025
 """
 
-# 2024 Federal Tax Brackets
-TAX_BRACKETS = {
-    'single': [
-        (11600, 0.10),    # 10% up to $11,600
-        (47150, 0.12),    # 12% from $11,601 to $47,150
-        (100525, 0.22),   # 22% from $47,151 to $100,525
-        (191950, 0.24),   # 24% from $100,526 to $191,950
-        (243725, 0.32),   # 32% from $191,951 to $243,725
-        (609350, 0.35),   # 35% from $243,726 to $609,350
-        (float('inf'), 0.37)  # 37% above $609,350
-    ],
-    'married_jointly': [
-        (23200, 0.10),    # 10% up to $23,200
-        (94300, 0.12),    # 12% from $23,201 to $94,300
-        (201050, 0.22),   # 22% from $94,301 to $201,050
-        (383900, 0.24),   # 24% from $201,051 to $383,900
-        (487450, 0.32),   # 32% from $383,901 to $487,450
-        (731200, 0.35),   # 35% from $487,451 to $731,200
-        (float('inf'), 0.37)  # 37% above $731,200
-    ],
-    'head_of_household': [
-        (16550, 0.10),
-        (63100, 0.12),
-        (100500, 0.22),
-        (191950, 0.24),
-        (243700, 0.32),
-        (609350, 0.35),
-        (float('inf'), 0.37)
-    ]
-}
+import threading
+from collections import OrderedDict, namedtuple
+
+from tax_tables import (
+    DEFAULT_TAX_YEAR,
+    TaxYearTables,
+    get_tax_year,
+    register_tax_year,
+    tables_version,
+)
 
-# Standard deductions for 2024
-STANDARD_DEDUCTIONS = {
-    'single': 14600,
-    'married_jointly': 29200,
-    'head_of_household': 21900
-}
+# Federal tables for the default tax year (2024 unless TAX_YEAR is set).
+# Other years load on demand from tax_data/<year>.json - see tax_tables.py.
+_default_tables = get_tax_year(DEFAULT_TAX_YEAR)
+TAX_BRACKETS = _default_tables.brackets()
+STANDARD_DEDUCTIONS = _default_tables.standard_deductions()
+BRACKET_TABLES = dict(_default_tables.bracket_tables)
 
 # Self-employment tax rate (Social Security + Medicare)
 SELF_EMPLOYMENT_TAX_RATE = 0.153  # 15.3%
 SELF_EMPLOYMENT_DEDUCTION = 0.9235  # 92.35% of net earnings subject to SE tax
 
+# SEP IRA contribution rate for the self-employed (the dollar cap is per tax year)
+SEP_IRA_RATE = 0.20  # 20% of net SE earnings after the SE tax deduction (25% of "compensation")
+
+
+# Lean, numeric-only scenario results (unrounded, no formatted strings)
+W2Result = namedtuple('W2Result', [
+    'gross_income', 'standard_deduction', 'taxable_income', 'income_tax',
+    'social_security_tax', 'medicare_tax', 'additional_medicare', 'fica_tax',
+    'child_tax_credit', 'total_tax', 'effective_tax_rate', 'take_home_pay'
+])
+
+SelfEmploymentResult = namedtuple('SelfEmploymentResult', [
+    'gross_income', 'business_expenses', 'net_income', 'self_employment_tax',
+    'se_tax_deduction', 'sep_ira_contribution', 'ibc_contribution', 'standard_deduction',
+    'agi', 'taxable_income', 'income_tax', 'child_tax_credit', 'total_tax',
+    'effective_tax_rate', 'take_home_pay', 'quarterly_estimated_payment'
+])
+
+
+def bracket_tables_version():
+    """Version counter of the compiled tax tables (any year)."""
+    return tables_version()
 
-def calculate_income_tax(taxable_income, filing_status='married_jointly'):
+
+def reload_bracket_tables():
+    """
+    Recompile the default year after TAX_BRACKETS or STANDARD_DEDUCTIONS change.
+
+    Bumps the table version, which invalidates TaxAssistant result caches
+    and the batch engine's arrays on their next use.
+    """
+    default = get_tax_year(DEFAULT_TAX_YEAR)
+    tables = register_tax_year(TaxYearTables(
+        DEFAULT_TAX_YEAR, TAX_BRACKETS, STANDARD_DEDUCTIONS,
+        default.social_security_wage_base, default.additional_medicare_thresholds,
+        default.child_tax_credit, default.sep_ira_dollar_limit
+    ))
+    BRACKET_TABLES.clear()
+    BRACKET_TABLES.update(tables.bracket_tables)
+    return tables_version()
+
+
+def get_bracket_table(filing_status, tax_year=None):
+    """Compiled table for a filing status and year (unknown statuses use 'single')."""
+    return get_tax_year(tax_year).bracket_table(filing_status)
+
+
+def normalize_filing_status(filing_status):
+    """Filing status the calculations actually use (unknown statuses use 'single')."""
+    return filing_status if filing_status in BRACKET_TABLES else 'single'
+
+
+def normalize_tax_year(tax_year):
+    """Tax year the calculations actually use (None or '' means DEFAULT_TAX_YEAR, as in get_tax_year)."""
+    return DEFAULT_TAX_YEAR if tax_year in (None, '') else int(tax_year)
+
+
+def calculate_income_tax(taxable_income, filing_status='married_jointly', tax_year=None):
     """
     Calculate federal income tax using progressive tax brackets.
     
     Args:
         taxable_income: Income after deductions
         filing_status: 'single', 'married_jointly', or 'head_of_household'
+        tax_year: Tax year whose brackets apply (default DEFAULT_TAX_YEAR)
     
     Returns:
         dict with tax breakdown by bracket
     """
-    brackets = TAX_BRACKETS.get(filing_status, TAX_BRACKETS['single'])
-    
-    tax = 0
-    prev_bracket = 0
-    bracket_details = []
-    
-    for bracket_limit, rate in brackets:
-        if taxable_income <= prev_bracket:
-            break
-        
-        # Calculate taxable amount in this bracket
-        taxable_in_bracket = min(taxable_income, bracket_limit) - prev_bracket
-        
-        if taxable_in_bracket > 0:
-            bracket_tax = taxable_in_bracket * rate
-            tax += bracket_tax
-            
-            bracket_details.append({
-                'bracket': f"${prev_bracket:,.0f} - ${bracket_limit:,.0f}" if bracket_limit != float('inf') else f"${prev_bracket:,.0f}+",
-                'rate': f"{rate * 100:.0f}%",
-                'taxable_amount': round(taxable_in_bracket, 2),
-                'tax': round(bracket_tax, 2)
-            })
-        
-        prev_bracket = bracket_limit
+    table = get_bracket_table(filing_status, tax_year)
+    tax = table.income_tax(taxable_income)
     
     return {
         'total_income_tax': round(tax, 2),
-        'bracket_details': bracket_details,
+        'bracket_details': table.bracket_details(taxable_income),
         'effective_rate': round((tax / taxable_income * 100), 2) if taxable_income > 0 else 0
     }
 
 
-def calculate_w2_scenario(gross_income, filing_status='married_jointly', dependents=0):
+def calculate_w2_scenario(gross_income, filing_status='married_jointly', dependents=0, tax_year=None,
+                          lean=False, details=True):
     """
     Calculate taxes for W-2 employee.
     
@@ -119,40 +134,51 @@ def calculate_w2_scenario(gross_income, filing_status='married_jointly', depende
         gross_income: Total W-2 income
         filing_status: Tax filing status
         dependents: Number of dependents (affects child tax credit)
+        tax_year: Tax year whose tables apply (default DEFAULT_TAX_YEAR)
+        lean: Return an unrounded W2Result with numeric fields only
+        details: Include the formatted bracket_details (dict results only)
     
     Returns:
-        dict with complete tax breakdown
+        dict with complete tax breakdown, or W2Result when lean
     """
+    year = get_tax_year(tax_year)
+    table = year.bracket_table(filing_status)
+
     # Standard deduction
-    standard_deduction = STANDARD_DEDUCTIONS.get(filing_status, STANDARD_DEDUCTIONS['single'])
+    standard_deduction = table.standard_deduction
     
     # Taxable income after standard deduction
     taxable_income = max(0, gross_income - standard_deduction)
     
     # Calculate income tax
-    income_tax_result = calculate_income_tax(taxable_income, filing_status)
-    income_tax = income_tax_result['total_income_tax']
+    income_tax = round(table.income_tax(taxable_income), 2)
     
     # FICA taxes (employee portion only - employer pays the other half)
-    social_security_tax = min(gross_income, 168600) * 0.062  # 6.2% up to $168,600 (2024 limit)
+    social_security_tax = min(gross_income, year.social_security_wage_base) * 0.062  # 6.2% up to the wage base
     medicare_tax = gross_income * 0.0145  # 1.45% on all income
     
     # Additional Medicare tax for high earners
-    medicare_threshold = 250000 if filing_status == 'married_jointly' else 200000
+    medicare_threshold = year.medicare_threshold(filing_status)
     additional_medicare = max(0, gross_income - medicare_threshold) * 0.009  # 0.9% above threshold
     
     fica_tax = social_security_tax + medicare_tax + additional_medicare
     
     # Child tax credit (if applicable)
-    child_tax_credit = min(dependents * 2000, income_tax)  # $2,000 per child, refundable up to $1,600
+    child_tax_credit = min(dependents * year.child_tax_credit, income_tax)  # per child ($2,000 in 2024)
     
     # Total tax
     total_tax = income_tax + fica_tax - child_tax_credit
     
     # Take home pay
     take_home = gross_income - total_tax
+    effective_tax_rate = total_tax / gross_income * 100 if gross_income > 0 else 0.0
     
-    return {
+    if lean:
+        return W2Result(gross_income, standard_deduction, taxable_income, income_tax,
+                        social_security_tax, medicare_tax, additional_medicare, fica_tax,
+                        child_tax_credit, total_tax, effective_tax_rate, take_home)
+    
+    result = {
         'scenario': 'W-2 Employee',
         'gross_income': round(gross_income, 2),
         'standard_deduction': round(standard_deduction, 2),
@@ -166,14 +192,17 @@ def calculate_w2_scenario(gross_income, filing_status='married_jointly', depende
         },
         'child_tax_credit': round(child_tax_credit, 2),
         'total_tax': round(total_tax, 2),
-        'effective_tax_rate': round((total_tax / gross_income * 100), 2),
-        'take_home_pay': round(take_home, 2),
-        'bracket_details': income_tax_result['bracket_details']
+        'effective_tax_rate': round(effective_tax_rate, 2),
+        'take_home_pay': round(take_home, 2)
     }
+    if details:
+        result['bracket_details'] = table.bracket_details(taxable_income)
+    return result
 
 
 def calculate_self_employment_scenario(gross_income, business_expenses, filing_status='married_jointly', 
-                                      dependents=0, ibc_contribution=0, sep_ira_contribution=0):
+                                      dependents=0, ibc_contribution=0, sep_ira_contribution=0, tax_year=None,
+                                      lean=False, details=True):
     """
     Calculate taxes for self-employed individual.
     
@@ -192,9 +221,12 @@ def calculate_self_employment_scenario(gross_income, business_expenses, filing_s
         dependents: Number of dependents
         ibc_contribution: Contribution to Infinite Banking Concept policy
         sep_ira_contribution: Contribution to SEP IRA
+        tax_year: Tax year whose tables apply (default DEFAULT_TAX_YEAR)
+        lean: Return an unrounded SelfEmploymentResult with numeric fields only
+        details: Include the formatted bracket_details (dict results only)
     
     Returns:
-        dict with complete tax breakdown
+        dict with complete tax breakdown, or SelfEmploymentResult when lean
     """
     # Net income after business expenses
     net_income = gross_income - business_expenses
@@ -206,8 +238,11 @@ def calculate_self_employment_scenario(gross_income, business_expenses, filing_s
     # Deduction for half of self-employment tax
     se_tax_deduction = self_employment_tax * 0.5
     
+    year = get_tax_year(tax_year)
+    table = year.bracket_table(filing_status)
+
     # Standard deduction
-    standard_deduction = STANDARD_DEDUCTIONS.get(filing_status, STANDARD_DEDUCTIONS['single'])
+    standard_deduction = table.standard_deduction
     
     # Adjusted Gross Income (AGI)
     agi = net_income - se_tax_deduction - sep_ira_contribution
@@ -216,11 +251,10 @@ def calculate_self_employment_scenario(gross_income, business_expenses, filing_s
     taxable_income = max(0, agi - standard_deduction)
     
     # Calculate income tax
-    income_tax_result = calculate_income_tax(taxable_income, filing_status)
-    income_tax = income_tax_result['total_income_tax']
+    income_tax = round(table.income_tax(taxable_income), 2)
     
     # Child tax credit
-    child_tax_credit = min(dependents * 2000, income_tax)
+    child_tax_credit = min(dependents * year.child_tax_credit, income_tax)
     
     # Total tax
     total_tax = income_tax + self_employment_tax - child_tax_credit
@@ -230,8 +264,15 @@ def calculate_self_employment_scenario(gross_income, business_expenses, filing_s
     
     # Quarterly estimated payments
     quarterly_payment = total_tax / 4
+    effective_tax_rate = total_tax / gross_income * 100 if gross_income > 0 else 0.0
     
-    return {
+    if lean:
+        return SelfEmploymentResult(gross_income, business_expenses, net_income, self_employment_tax,
+                                    se_tax_deduction, sep_ira_contribution, ibc_contribution, standard_deduction,
+                                    agi, taxable_income, income_tax, child_tax_credit, total_tax,
+                                    effective_tax_rate, take_home, quarterly_payment)
+    
+    result = {
         'scenario': 'Self-Employed',
         'gross_income': round(gross_income, 2),
         'business_expenses': round(business_expenses, 2),
@@ -246,15 +287,18 @@ def calculate_self_employment_scenario(gross_income, business_expenses, filing_s
         'income_tax': round(income_tax, 2),
         'child_tax_credit': round(child_tax_credit, 2),
         'total_tax': round(total_tax, 2),
-        'effective_tax_rate': round((total_tax / gross_income * 100), 2),
+        'effective_tax_rate': round(effective_tax_rate, 2),
         'take_home_pay': round(take_home, 2),
-        'quarterly_estimated_payment': round(quarterly_payment, 2),
-        'bracket_details': income_tax_result['bracket_details']
+        'quarterly_estimated_payment': round(quarterly_payment, 2)
     }
+    if details:
+        result['bracket_details'] = table.bracket_details(taxable_income)
+    return result
 
 
 def compare_w2_vs_self_employment(gross_income, business_expenses=0, filing_status='married_jointly',
-                                 dependents=0, ibc_contribution=0, sep_ira_contribution=0):
+                                 dependents=0, ibc_contribution=0, sep_ira_contribution=0, tax_year=None,
+                                 details=True):
     """
     Compare W-2 employment vs self-employment side-by-side.
     
@@ -271,14 +315,17 @@ def compare_w2_vs_self_employment(gross_income, business_expenses=0, filing_stat
         dependents: Number of dependents
         ibc_contribution: IBC policy contribution (self-employment only)
         sep_ira_contribution: SEP IRA contribution (self-employment only)
+        tax_year: Tax year whose tables apply (default DEFAULT_TAX_YEAR)
+        details: Include formatted bracket_details in both scenarios
     
     Returns:
         dict with side-by-side comparison and key learnings
     """
     # Calculate both scenarios
-    w2 = calculate_w2_scenario(gross_income, filing_status, dependents)
+    w2 = calculate_w2_scenario(gross_income, filing_status, dependents, tax_year, details=details)
     se = calculate_self_employment_scenario(gross_income, business_expenses, filing_status, 
-                                           dependents, ibc_contribution, sep_ira_contribution)
+                                           dependents, ibc_contribution, sep_ira_contribution, tax_year,
+                                           details=details)
     
     # Calculate differences
     tax_difference = se['total_tax'] - w2['total_tax']
@@ -325,7 +372,168 @@ def compare_w2_vs_self_employment(gross_income, business_expenses=0, filing_stat
     }
 
 
-def optimize_business_expenses(gross_income, current_expenses=0):
+# Share of net self-employment income left in AGI after the SE tax deduction
+SE_AGI_FACTOR = 1 - SELF_EMPLOYMENT_DEDUCTION * SELF_EMPLOYMENT_TAX_RATE * 0.5
+
+
+def _self_employment_total_tax(gross_income, business_expenses, table, child_credit, sep_ira_contribution):
+    """Unrounded self-employed total tax, as in calculate_self_employment_scenario."""
+    net_income = gross_income - business_expenses
+    self_employment_tax = net_income * SELF_EMPLOYMENT_DEDUCTION * SELF_EMPLOYMENT_TAX_RATE
+    taxable_income = max(0, net_income * SE_AGI_FACTOR - sep_ira_contribution - table.standard_deduction)
+    income_tax = table.income_tax(taxable_income)
+    return self_employment_tax + max(0, income_tax - child_credit)
+
+
+def solve_break_even_expenses(gross_income, filing_status='married_jointly', dependents=0,
+                              sep_ira_contribution=0, tax_year=None):
+    """
+    Find the business expense level where self-employed total tax equals W-2 total tax.
+
+    Self-employed total tax is piecewise linear in business expenses: the
+    slope only changes where taxable income crosses a bracket threshold,
+    reaches zero, or where income tax drops below the child tax credit.
+    Those breakpoints are computed directly from the compiled bracket
+    table, and the crossing is solved exactly on the one linear segment
+    that contains it - no search over expense values.
+
+    Args:
+        gross_income: Income for both scenarios
+        filing_status: Tax filing status
+        dependents: Number of dependents
+        sep_ira_contribution: SEP IRA contribution (self-employment only)
+        tax_year: Tax year whose tables apply (default DEFAULT_TAX_YEAR)
+
+    Returns:
+        Smallest expense amount at which self-employment costs no more tax
+        than W-2 (0 if it already doesn't, or there is no income), or None
+        if no expense level up to gross income gets there.
+    """
+    if gross_income <= 0:
+        return 0.0
+
+    year = get_tax_year(tax_year)
+    table = year.bracket_table(filing_status)
+    child_credit = dependents * year.child_tax_credit
+    target = round(calculate_w2_scenario(gross_income, filing_status, dependents, tax_year, lean=True).total_tax, 2)
+
+    def excess(expenses):
+        return _self_employment_total_tax(gross_income, expenses, table, child_credit,
+                                          sep_ira_contribution) - target
+
+    # Expense levels where taxable income hits each threshold, zero, or the credit
+    taxable_breakpoints = list(table.limits[:-1]) + [0, table.taxable_income_for_tax(child_credit)]
+    breakpoints = {0, gross_income}
+    for taxable_income in taxable_breakpoints:
+        expenses = gross_income - (taxable_income + table.standard_deduction + sep_ira_contribution) / SE_AGI_FACTOR
+        if 0 < expenses < gross_income:
+            breakpoints.add(expenses)
+
+    previous = None
+    for expenses in sorted(breakpoints):
+        value = excess(expenses)
+        if value <= 0:
+            if previous is None:
+                return 0.0
+            lo, lo_value = previous
+            return round(lo + lo_value * (expenses - lo) / (lo_value - value), 2)
+        previous = (expenses, value)
+
+    return None
+
+
+def optimize_tax_mix(gross_income, expense_cap=0, filing_status='married_jointly', dependents=0,
+                     sep_limit=None, budget=None, tax_year=None):
+    """
+    Compute the tax-minimizing mix of deductible expenses and SEP IRA contribution.
+
+    Solved analytically on the piecewise-linear tax structure instead of
+    probing inputs:
+    - A dollar of business expense saves SE tax (~14.1%) plus income tax on
+      the ~92.9% of it left in AGI; a SEP IRA dollar saves only income tax.
+      Since 14.1% exceeds the top income tax rate times the 7.1% gap, expenses
+      always come first, up to the cap (and budget)
+    - The SEP IRA is then filled up to the statutory limit (20% of net SE
+      earnings after the SE tax deduction, capped at the year's dollar
+      limit, e.g. $69,000 for 2024), the caller's
+      limit and the remaining budget - but only until income tax reaches
+      the child tax credit, past which another dollar saves nothing
+
+    Args:
+        gross_income: Total self-employment income
+        expense_cap: Deductible business expenses available to claim
+        filing_status: Tax filing status
+        dependents: Number of dependents
+        sep_limit: Optional lower SEP IRA contribution limit
+        budget: Optional cash available for expenses plus SEP IRA
+        tax_year: Tax year whose tables apply (default DEFAULT_TAX_YEAR)
+
+    Returns:
+        dict with the optimal mix, resulting taxes and marginal savings
+    """
+    if gross_income <= 0:
+        # No income, nothing to optimize (and no tax rate to divide by)
+        return {
+            'gross_income': round(gross_income, 2),
+            'business_expenses': 0.0,
+            'sep_ira_contribution': 0.0,
+            'sep_ira_limit': 0.0,
+            'taxable_income': 0.0,
+            'total_tax': 0.0,
+            'baseline_total_tax': 0.0,
+            'tax_savings': 0.0,
+            'take_home_pay': round(gross_income, 2),
+            'marginal_savings_per_dollar': {'business_expenses': 0.0, 'sep_ira': 0.0}
+        }
+
+    year = get_tax_year(tax_year)
+    table = year.bracket_table(filing_status)
+    child_credit = dependents * year.child_tax_credit
+    available = float('inf') if budget is None else max(0, budget)
+
+    # Expenses first
+    expenses = max(0, min(expense_cap, available, gross_income))
+    net_income = gross_income - expenses
+
+    # Then the SEP IRA, up to the point it stops saving tax
+    sep_room = max(0, min(net_income * SE_AGI_FACTOR * SEP_IRA_RATE, year.sep_ira_dollar_limit))
+    if sep_limit is not None:
+        sep_room = min(sep_room, max(0, sep_limit))
+    taxable_before_sep = max(0, net_income * SE_AGI_FACTOR - table.standard_deduction)
+    useful_sep = max(0, taxable_before_sep - table.taxable_income_for_tax(child_credit))
+    sep_ira_contribution = max(0, min(sep_room, available - expenses, useful_sep))
+
+    baseline = calculate_self_employment_scenario(gross_income, 0, filing_status, dependents,
+                                                  tax_year=tax_year, lean=True)
+    optimized = calculate_self_employment_scenario(gross_income, expenses, filing_status, dependents,
+                                                   sep_ira_contribution=sep_ira_contribution, tax_year=tax_year,
+                                                   lean=True)
+    baseline_total_tax = round(baseline.total_tax, 2)
+    total_tax = round(optimized.total_tax, 2)
+
+    owes_income_tax = optimized.income_tax > child_credit
+    income_tax_rate = table.marginal_rate(optimized.taxable_income) if owes_income_tax else 0
+    se_tax_rate = SELF_EMPLOYMENT_DEDUCTION * SELF_EMPLOYMENT_TAX_RATE if net_income > 0 else 0
+
+    return {
+        'gross_income': round(gross_income, 2),
+        'business_expenses': round(expenses, 2),
+        'sep_ira_contribution': round(sep_ira_contribution, 2),
+        'sep_ira_limit': round(sep_room, 2),
+        'taxable_income': round(optimized.taxable_income, 2),
+        'total_tax': total_tax,
+        'baseline_total_tax': baseline_total_tax,
+        'tax_savings': round(baseline_total_tax - total_tax, 2),
+        'take_home_pay': round(optimized.take_home_pay, 2),
+        'marginal_savings_per_dollar': {
+            'business_expenses': round(se_tax_rate + SE_AGI_FACTOR * income_tax_rate, 4),
+            'sep_ira': income_tax_rate
+        }
+    }
+
+
+def optimize_business_expenses(gross_income, current_expenses=0, filing_status='married_jointly', dependents=0,
+                               tax_year=None):
     """
     Recommend optimal business expense deductions based on income.
     
@@ -341,9 +549,13 @@ def optimize_business_expenses(gross_income, current_expenses=0):
     Args:
         gross_income: Total self-employment income
         current_expenses: Current business expenses
+        filing_status: Tax filing status
+        dependents: Number of dependents
+        tax_year: Tax year whose tables apply (default DEFAULT_TAX_YEAR)
     
     Returns:
-        dict with recommended expense categories and amounts
+        dict with recommended expense categories and amounts, the real tax
+        savings of claiming them and the optimal expense/SEP IRA mix
     """
     # Recommended expense percentages (conservative estimates)
     recommendations = {
@@ -382,8 +594,19 @@ def optimize_business_expenses(gross_income, current_expenses=0):
     # Calculate total recommended expenses
     total_recommended = sum(cat['amount'] for cat in recommendations.values())
     
-    # Tax savings from recommended expenses (assuming 35% effective rate)
-    tax_savings = total_recommended * 0.35
+    # Tax savings from recommended expenses, on the actual brackets and SE tax
+    expense_cap = max(current_expenses, total_recommended)
+    if gross_income > 0:
+        tax_savings = (
+            round(calculate_self_employment_scenario(gross_income, 0, filing_status, dependents,
+                                                     tax_year=tax_year, lean=True).total_tax, 2)
+            - round(calculate_self_employment_scenario(gross_income, total_recommended, filing_status, dependents,
+                                                       tax_year=tax_year, lean=True).total_tax, 2)
+        )
+        optimal_mix = optimize_tax_mix(gross_income, expense_cap, filing_status, dependents, tax_year=tax_year)
+    else:
+        tax_savings = 0
+        optimal_mix = None
     
     return {
         'current_expenses': round(current_expenses, 2),
@@ -391,6 +614,7 @@ def optimize_business_expenses(gross_income, current_expenses=0):
         'total_recommended': round(total_recommended, 2),
         'expense_details': recommendations,
         'potential_tax_savings': round(tax_savings, 2),
+        'optimal_mix': optimal_mix,
         'tips': [
             "Keep receipts for ALL business expenses",
             "Use SOLVY Card to automatically track and categorize expenses",
@@ -406,97 +630,157 @@ def print_comparison_report(comparison):
     """
     Print a beautiful, educational comparison report.
     
-    This is what members see when they use the calculator.
+    This is what members see when they use the calculator. Rendering
+    lives in tax_report.py and only runs when a report is asked for.
+    """
+    from tax_report import render_comparison_report
+    print(render_comparison_report(comparison), end='')
+
+
+class FrozenDict(dict):
+    """Read-only dict handed out by the TaxAssistant result cache."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('Cached tax results are read-only; copy with dict() first')
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+
+def freeze(value):
+    """Recursively convert dicts to FrozenDict and lists to tuples."""
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+class ScenarioCache:
     """
-    print("\n" + "="*70)
-    print("SOLVY TAX CALCULATOR - W-2 vs Self-Employment Comparison")
-    print("="*70)
-    
-    w2 = comparison['w2_scenario']
-    se = comparison['self_employment_scenario']
-    comp = comparison['comparison']
-    
-    print(f"\n📊 INCOME: ${w2['gross_income']:,.2f}")
-    print(f"👨‍👩‍👧‍👦 FILING STATUS: {w2.get('filing_status', 'Married Jointly')}")
-    
-    print("\n" + "-"*70)
-    print("W-2 EMPLOYEE SCENARIO")
-    print("-"*70)
-    print(f"Gross Income:           ${w2['gross_income']:>15,.2f}")
-    print(f"Standard Deduction:    -${w2['standard_deduction']:>15,.2f}")
-    print(f"Taxable Income:         ${w2['taxable_income']:>15,.2f}")
-    print(f"Income Tax:            -${w2['income_tax']:>15,.2f}")
-    print(f"FICA Tax (your half):  -${w2['fica_tax']:>15,.2f}")
-    if w2['child_tax_credit'] > 0:
-        print(f"Child Tax Credit:      +${w2['child_tax_credit']:>15,.2f}")
-    print(f"Total Tax:             -${w2['total_tax']:>15,.2f}")
-    print(f"Effective Rate:         {w2['effective_tax_rate']:>15.2f}%")
-    print(f"TAKE HOME PAY:          ${w2['take_home_pay']:>15,.2f}")
-    
-    print("\n" + "-"*70)
-    print("SELF-EMPLOYMENT SCENARIO")
-    print("-"*70)
-    print(f"Gross Income:           ${se['gross_income']:>15,.2f}")
-    print(f"Business Expenses:     -${se['business_expenses']:>15,.2f}")
-    print(f"Net Income:             ${se['net_income']:>15,.2f}")
-    print(f"Self-Employment Tax:   -${se['self_employment_tax']:>15,.2f}")
-    print(f"SE Tax Deduction:      +${se['se_tax_deduction']:>15,.2f}")
-    if se['sep_ira_contribution'] > 0:
-        print(f"SEP IRA Contribution:  -${se['sep_ira_contribution']:>15,.2f}")
-    if se['ibc_contribution'] > 0:
-        print(f"IBC Contribution:      -${se['ibc_contribution']:>15,.2f}")
-    print(f"Standard Deduction:    -${se['standard_deduction']:>15,.2f}")
-    print(f"Taxable Income:         ${se['taxable_income']:>15,.2f}")
-    print(f"Income Tax:            -${se['income_tax']:>15,.2f}")
-    if se['child_tax_credit'] > 0:
-        print(f"Child Tax Credit:      +${se['child_tax_credit']:>15,.2f}")
-    print(f"Total Tax:             -${se['total_tax']:>15,.2f}")
-    print(f"Effective Rate:         {se['effective_tax_rate']:>15.2f}%")
-    print(f"TAKE HOME PAY:          ${se['take_home_pay']:>15,.2f}")
-    
-    print("\n" + "-"*70)
-    print("COMPARISON")
-    print("-"*70)
-    symbol = "📈" if comp['tax_difference'] > 0 else "📉"
-    print(f"{symbol} Tax Difference:        ${comp['tax_difference']:>15,.2f}")
-    print(f"   Take Home Difference:   ${comp['take_home_difference']:>15,.2f}")
-    
-    print("\n" + "-"*70)
-    print("QUARTERLY ESTIMATED PAYMENTS")
-    print("-"*70)
-    schedule = comparison['quarterly_payment_schedule']
-    print(f"Q1 ({schedule['q1_due']}):        ${schedule['q1_amount']:>15,.2f}")
-    print(f"Q2 ({schedule['q2_due']}):         ${schedule['q2_amount']:>15,.2f}")
-    print(f"Q3 ({schedule['q3_due']}):  ${schedule['q3_amount']:>15,.2f}")
-    print(f"Q4 ({schedule['q4_due']}): ${schedule['q4_amount']:>15,.2f}")
-    
-    print("\n" + "-"*70)
-    print("KEY LEARNINGS")
-    print("-"*70)
-    for i, learning in enumerate(comparison['key_learnings'], 1):
-        print(f"{i}. {learning}")
-    
-    print("\n" + "="*70)
-    print("💡 Want to optimize your taxes? Use SOLVY Card to track expenses!")
-    print("="*70 + "\n")
+    Bounded, thread-safe LRU cache for TaxAssistant results.
+
+    Entries are tagged with the bracket table version they were computed
+    against; a version change (see `reload_bracket_tables`) empties the cache.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._version = bracket_tables_version()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if self._version != bracket_tables_version():
+                self._entries.clear()
+                self._version = bracket_tables_version()
+
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            version = self._version
+
+        # Compute outside the lock; a concurrent miss on the same key just
+        # computes the same immutable value twice
+        value = freeze(compute())
+
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0
+            }
 
 
 # Minimal TaxAssistant class for backend integration
 class TaxAssistant:
-    def calculate_marginal_tax(self, income, filing_status='married_jointly'):
-        result = calculate_w2_scenario(float(income), filing_status)
-        return {
-            'income_tax': result.get('income_tax'),
-            'fica_tax': result.get('fica_tax'),
-            'total_tax': result.get('total_tax'),
-            'effective_tax_rate': result.get('effective_tax_rate'),
-            'take_home_pay': result.get('take_home_pay'),
-            'bracket_details': result.get('bracket_details')
+    """
+    Backend entry point for the tax endpoints.
+
+    Args:
+        cache_size: Max cached results (0 disables the cache). Cached results
+                    are returned as read-only FrozenDicts.
+    """
+
+    def __init__(self, cache_size=0):
+        self._cache = ScenarioCache(cache_size) if cache_size and cache_size > 0 else None
+
+    def _cached(self, key, compute):
+        if self._cache is None:
+            return compute()
+        return self._cache.get_or_compute(key, compute)
+
+    def cache_info(self):
+        """Hit/miss/eviction counters, or None when caching is disabled."""
+        return self._cache.info() if self._cache is not None else None
+
+    def cache_clear(self):
+        if self._cache is not None:
+            self._cache.clear()
+
+    def calculate_marginal_tax(self, income, filing_status='married_jointly', tax_year=None, details=True):
+        """
+        W-2 tax summary for one income.
+
+        Set details=False to skip building the formatted bracket_details.
+        """
+        income = float(income)
+        filing_status = normalize_filing_status(filing_status)
+        tax_year = normalize_tax_year(tax_year)
+        details = bool(details)
+        return self._cached(('marginal_tax', income, filing_status, tax_year, details),
+                            lambda: self._calculate_marginal_tax(income, filing_status, tax_year, details))
+
+    def _calculate_marginal_tax(self, income, filing_status, tax_year, details):
+        result = calculate_w2_scenario(income, filing_status, tax_year=tax_year, lean=True)
+        table = get_bracket_table(filing_status, tax_year)
+        summary = {
+            'tax_year': tax_year,
+            'income_tax': round(result.income_tax, 2),
+            'fica_tax': round(result.fica_tax, 2),
+            'total_tax': round(result.total_tax, 2),
+            'effective_tax_rate': round(result.effective_tax_rate, 2),
+            'marginal_rate': table.marginal_rate(result.taxable_income),
+            'take_home_pay': round(result.take_home_pay, 2)
         }
+        if details:
+            summary['bracket_details'] = table.bracket_details(result.taxable_income)
+        return summary
 
-    def optimize_business_expenses(self, revenue, expenses):
+    def optimize_business_expenses(self, revenue, expenses, filing_status='married_jointly', dependents=0,
+                                   tax_year=None):
         total_expenses = sum(expenses.values()) if isinstance(expenses, dict) else float(expenses or 0)
-        return optimize_business_expenses(float(revenue), total_expenses)
+        revenue = float(revenue)
+        filing_status = normalize_filing_status(filing_status)
+        dependents = int(dependents or 0)
+        tax_year = normalize_tax_year(tax_year)
+        key = ('optimize_business_expenses', revenue, float(total_expenses), filing_status, dependents, tax_year)
+        return self._cached(key, lambda: optimize_business_expenses(revenue, total_expenses, filing_status,
+                                                                    dependents, tax_year))
 
 
     # Example usage and test cases
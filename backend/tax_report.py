@@ -0,0 +1,98 @@
+"""
+SOLVY Tax Report Renderer
+=========================
+
+Purpose: Turn a `compare_w2_vs_self_employment` result into the
+educational text report members see, only when someone asks for it.
+The calculator itself never formats the report.
+
+Author: SOLVY Platform
+"""
+
+
+def render_comparison_report(comparison):
+    """
+    Render a beautiful, educational comparison report as text.
+    
+    This is what members see when they use the calculator.
+    
+    Args:
+        comparison: Result of compare_w2_vs_self_employment
+    
+    Returns:
+        str report (one line per row, trailing newline)
+    """
+    lines = []
+    lines.append("\n" + "="*70)
+    lines.append("SOLVY TAX CALCULATOR - W-2 vs Self-Employment Comparison")
+    lines.append("="*70)
+    
+    w2 = comparison['w2_scenario']
+    se = comparison['self_employment_scenario']
+    comp = comparison['comparison']
+    
+    lines.append(f"\n📊 INCOME: ${w2['gross_income']:,.2f}")
+    lines.append(f"👨‍👩‍👧‍👦 FILING STATUS: {w2.get('filing_status', 'Married Jointly')}")
+    
+    lines.append("\n" + "-"*70)
+    lines.append("W-2 EMPLOYEE SCENARIO")
+    lines.append("-"*70)
+    lines.append(f"Gross Income:           ${w2['gross_income']:>15,.2f}")
+    lines.append(f"Standard Deduction:    -${w2['standard_deduction']:>15,.2f}")
+    lines.append(f"Taxable Income:         ${w2['taxable_income']:>15,.2f}")
+    lines.append(f"Income Tax:            -${w2['income_tax']:>15,.2f}")
+    lines.append(f"FICA Tax (your half):  -${w2['fica_tax']:>15,.2f}")
+    if w2['child_tax_credit'] > 0:
+        lines.append(f"Child Tax Credit:      +${w2['child_tax_credit']:>15,.2f}")
+    lines.append(f"Total Tax:             -${w2['total_tax']:>15,.2f}")
+    lines.append(f"Effective Rate:         {w2['effective_tax_rate']:>15.2f}%")
+    lines.append(f"TAKE HOME PAY:          ${w2['take_home_pay']:>15,.2f}")
+    
+    lines.append("\n" + "-"*70)
+    lines.append("SELF-EMPLOYMENT SCENARIO")
+    lines.append("-"*70)
+    lines.append(f"Gross Income:           ${se['gross_income']:>15,.2f}")
+    lines.append(f"Business Expenses:     -${se['business_expenses']:>15,.2f}")
+    lines.append(f"Net Income:             ${se['net_income']:>15,.2f}")
+    lines.append(f"Self-Employment Tax:   -${se['self_employment_tax']:>15,.2f}")
+    lines.append(f"SE Tax Deduction:      +${se['se_tax_deduction']:>15,.2f}")
+    if se['sep_ira_contribution'] > 0:
+        lines.append(f"SEP IRA Contribution:  -${se['sep_ira_contribution']:>15,.2f}")
+    if se['ibc_contribution'] > 0:
+        lines.append(f"IBC Contribution:      -${se['ibc_contribution']:>15,.2f}")
+    lines.append(f"Standard Deduction:    -${se['standard_deduction']:>15,.2f}")
+    lines.append(f"Taxable Income:         ${se['taxable_income']:>15,.2f}")
+    lines.append(f"Income Tax:            -${se['income_tax']:>15,.2f}")
+    if se['child_tax_credit'] > 0:
+        lines.append(f"Child Tax Credit:      +${se['child_tax_credit']:>15,.2f}")
+    lines.append(f"Total Tax:             -${se['total_tax']:>15,.2f}")
+    lines.append(f"Effective Rate:         {se['effective_tax_rate']:>15.2f}%")
+    lines.append(f"TAKE HOME PAY:          ${se['take_home_pay']:>15,.2f}")
+    
+    lines.append("\n" + "-"*70)
+    lines.append("COMPARISON")
+    lines.append("-"*70)
+    symbol = "📈" if comp['tax_difference'] > 0 else "📉"
+    lines.append(f"{symbol} Tax Difference:        ${comp['tax_difference']:>15,.2f}")
+    lines.append(f"   Take Home Difference:   ${comp['take_home_difference']:>15,.2f}")
+    
+    lines.append("\n" + "-"*70)
+    lines.append("QUARTERLY ESTIMATED PAYMENTS")
+    lines.append("-"*70)
+    schedule = comparison['quarterly_payment_schedule']
+    lines.append(f"Q1 ({schedule['q1_due']}):        ${schedule['q1_amount']:>15,.2f}")
+    lines.append(f"Q2 ({schedule['q2_due']}):         ${schedule['q2_amount']:>15,.2f}")
+    lines.append(f"Q3 ({schedule['q3_due']}):  ${schedule['q3_amount']:>15,.2f}")
+    lines.append(f"Q4 ({schedule['q4_due']}): ${schedule['q4_amount']:>15,.2f}")
+    
+    lines.append("\n" + "-"*70)
+    lines.append("KEY LEARNINGS")
+    lines.append("-"*70)
+    for i, learning in enumerate(comparison['key_learnings'], 1):
+        lines.append(f"{i}. {learning}")
+    
+    lines.append("\n" + "="*70)
+    lines.append("💡 Want to optimize your taxes? Use SOLVY Card to track expenses!")
+    lines.append("="*70 + "\n")
+    
+    return "\n".join(lines) + "\n"
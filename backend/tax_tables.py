@@ -0,0 +1,234 @@
+"""
+SOLVY Tax Tables - Multi-year federal tax table registry
+========================================================
+
+Purpose: Keep federal brackets and thresholds for every supported tax year
+in compact data files (`tax_data/<year>.json`) instead of constants spread
+through the calculator, and compile them only when a year is first used.
+
+How it works:
+- `get_tax_year(2025)` loads `tax_data/2025.json` on first use, compiles a
+  BracketTable per filing status and caches the result for the process
+- Years nobody asks for are never read, so adding years does not slow
+  import or any calculation
+- `register_tax_year` installs tables from code (e.g. tests, overrides)
+- Every (re)load bumps `tables_version()` so result caches can drop
+  entries computed against old tables
+
+Data file format:
+    {
+      "tax_year": 2025,
+      "brackets": {"single": {"limits": [...], "rates": [...]}, ...},
+      "standard_deductions": {"single": 15750, ...},
+      "social_security_wage_base": 176100,
+      "additional_medicare_thresholds": {"single": 200000, ...},
+      "child_tax_credit": 2200,
+      "sep_ira_dollar_limit": 70000
+    }
+`limits` lists the upper bound of every bracket but the last (unbounded).
+
+Author: SOLVY Platform
+"""
+
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+
+TAX_DATA_DIR = os.getenv('TAX_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tax_data'))
+
+# Year used when callers don't pass tax_year
+DEFAULT_TAX_YEAR = int(os.getenv('TAX_YEAR', '2024'))
+
+
+class BracketTable:
+    """
+    Compiled federal brackets for one filing status.
+
+    Stores the bracket thresholds, rates and the cumulative tax owed at each
+    threshold, so tax and marginal rate come from a bisect lookup plus one
+    multiply instead of walking every lower bracket.
+    """
+
+    __slots__ = ('filing_status', 'limits', 'lowers', 'rates', 'cumulative_tax',
+                 'labels', 'rate_labels', 'standard_deduction')
+
+    def __init__(self, filing_status, brackets, standard_deduction):
+        self.filing_status = filing_status
+        self.limits = tuple(limit for limit, _ in brackets)
+        self.lowers = (0,) + self.limits[:-1]
+        self.rates = tuple(rate for _, rate in brackets)
+        self.standard_deduction = standard_deduction
+
+        # Tax owed on all income below each bracket, summed in bracket order
+        cumulative = [0]
+        for lower, limit, rate in zip(self.lowers[:-1], self.limits[:-1], self.rates[:-1]):
+            cumulative.append(cumulative[-1] + (limit - lower) * rate)
+        self.cumulative_tax = tuple(cumulative)
+
+        self.labels = tuple(
+            f"${lower:,.0f} - ${limit:,.0f}" if limit != float('inf') else f"${lower:,.0f}+"
+            for lower, limit in zip(self.lowers, self.limits)
+        )
+        self.rate_labels = tuple(f"{rate * 100:.0f}%" for rate in self.rates)
+
+    def bracket_index(self, taxable_income):
+        """Index of the bracket the last dollar of income falls in."""
+        return bisect_left(self.limits, taxable_income)
+
+    def income_tax(self, taxable_income):
+        """Unrounded federal income tax on taxable income."""
+        if taxable_income <= 0:
+            return 0
+        i = bisect_left(self.limits, taxable_income)
+        return self.cumulative_tax[i] + (taxable_income - self.lowers[i]) * self.rates[i]
+
+    def marginal_rate(self, taxable_income):
+        """Rate applied to the next dollar of taxable income."""
+        if taxable_income <= 0:
+            return 0
+        return self.rates[bisect_left(self.limits, taxable_income)]
+
+    def taxable_income_for_tax(self, tax):
+        """Inverse of income_tax: the taxable income on which `tax` is owed."""
+        if tax <= 0:
+            return 0
+        i = bisect_right(self.cumulative_tax, tax) - 1
+        return self.lowers[i] + (tax - self.cumulative_tax[i]) / self.rates[i]
+
+    def bracket_details(self, taxable_income):
+        """Per-bracket breakdown using the precompiled labels."""
+        if taxable_income <= 0:
+            return []
+        details = []
+        for i in range(bisect_left(self.limits, taxable_income) + 1):
+            taxable_in_bracket = min(taxable_income, self.limits[i]) - self.lowers[i]
+            if taxable_in_bracket > 0:
+                details.append({
+                    'bracket': self.labels[i],
+                    'rate': self.rate_labels[i],
+                    'taxable_amount': round(taxable_in_bracket, 2),
+                    'tax': round(taxable_in_bracket * self.rates[i], 2)
+                })
+        return details
+
+
+class TaxYearTables:
+    """Compiled brackets and thresholds for one tax year."""
+
+    __slots__ = ('tax_year', 'bracket_tables', 'social_security_wage_base',
+                 'additional_medicare_thresholds', 'child_tax_credit', 'sep_ira_dollar_limit')
+
+    def __init__(self, tax_year, brackets, standard_deductions, social_security_wage_base,
+                 additional_medicare_thresholds, child_tax_credit, sep_ira_dollar_limit):
+        self.tax_year = tax_year
+        self.bracket_tables = {
+            status: BracketTable(status, status_brackets,
+                                 standard_deductions.get(status, standard_deductions['single']))
+            for status, status_brackets in brackets.items()
+        }
+        self.social_security_wage_base = social_security_wage_base
+        self.additional_medicare_thresholds = dict(additional_medicare_thresholds)
+        self.child_tax_credit = child_tax_credit
+        self.sep_ira_dollar_limit = sep_ira_dollar_limit
+
+    def bracket_table(self, filing_status):
+        """Compiled table for a filing status (unknown statuses use 'single')."""
+        return self.bracket_tables.get(filing_status) or self.bracket_tables['single']
+
+    def medicare_threshold(self, filing_status):
+        """Income above which the 0.9% additional Medicare tax applies."""
+        thresholds = self.additional_medicare_thresholds
+        return thresholds.get(filing_status, thresholds['single'])
+
+    def brackets(self):
+        """Brackets as {status: [(limit, rate), ...]}, the TAX_BRACKETS shape."""
+        return {status: list(zip(table.limits, table.rates)) for status, table in self.bracket_tables.items()}
+
+    def standard_deductions(self):
+        return {status: table.standard_deduction for status, table in self.bracket_tables.items()}
+
+
+def parse_tax_year(data):
+    """Compile a data-file dict into TaxYearTables."""
+    brackets = {
+        status: list(zip(list(spec['limits']) + [float('inf')], spec['rates']))
+        for status, spec in data['brackets'].items()
+    }
+    return TaxYearTables(
+        tax_year=int(data['tax_year']),
+        brackets=brackets,
+        standard_deductions=data['standard_deductions'],
+        social_security_wage_base=data['social_security_wage_base'],
+        additional_medicare_thresholds=data['additional_medicare_thresholds'],
+        child_tax_credit=data['child_tax_credit'],
+        sep_ira_dollar_limit=data['sep_ira_dollar_limit']
+    )
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+_version = 0
+
+
+def tables_version():
+    """Counter bumped whenever any tax year's tables are (re)loaded or replaced."""
+    return _version
+
+
+def available_tax_years():
+    """Tax years with a data file or registered tables."""
+    years = set(_registry)
+    if os.path.isdir(TAX_DATA_DIR):
+        for name in os.listdir(TAX_DATA_DIR):
+            stem, ext = os.path.splitext(name)
+            if ext == '.json' and stem.isdigit():
+                years.add(int(stem))
+    return sorted(years)
+
+
+def get_tax_year(tax_year=None):
+    """
+    Compiled tables for a tax year, loading its data file on first use.
+
+    Args:
+        tax_year: Year to load (None or '' means DEFAULT_TAX_YEAR, e.g. an
+                  empty ?tax_year= query parameter)
+
+    Raises:
+        ValueError: if no tables exist for the year
+    """
+    year = DEFAULT_TAX_YEAR if tax_year in (None, '') else int(tax_year)
+    tables = _registry.get(year)
+    if tables is not None:
+        return tables
+
+    with _registry_lock:
+        tables = _registry.get(year)
+        if tables is None:
+            path = os.path.join(TAX_DATA_DIR, f'{year}.json')
+            try:
+                with open(path) as f:
+                    tables = parse_tax_year(json.load(f))
+            except FileNotFoundError:
+                raise ValueError(f"No tax tables for {year}; available years: {available_tax_years()}")
+            _registry[year] = tables
+    return tables
+
+
+def register_tax_year(tables):
+    """Install (or replace) a year's compiled tables, invalidating dependent caches."""
+    global _version
+    with _registry_lock:
+        _registry[tables.tax_year] = tables
+        _version += 1
+    return tables
+
+
+def reload_tax_years():
+    """Drop every compiled year so data files are re-read on next use."""
+    global _version
+    with _registry_lock:
+        _registry.clear()
+        _version += 1
+    return _version
@@ -0,0 +1,38 @@
+"""Shared pytest setup: backend modules are imported flat, as the app does."""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def kimi_upstream(monkeypatch):
+    """
+    kimi_client pointed at a local mock Kimi, with fresh guard, reply cache
+    and single-flight state and the conversation store off. Yields the
+    mock server (its `stats` count upstream requests).
+    """
+    import kimi_cache
+    import kimi_client
+    import kimi_conversations
+    import kimi_guard
+    import kimi_singleflight
+    from kimi_mock_server import start_in_thread
+
+    server, base_url = start_in_thread()
+    monkeypatch.setattr(kimi_client, 'KIMI_API_KEY', 'test')
+    monkeypatch.setattr(kimi_client, 'KIMI_BASE_URL', base_url)
+    monkeypatch.setattr(kimi_guard, '_guard', kimi_guard.UpstreamGuard())
+    monkeypatch.setattr(kimi_guard, '_guard_pid', os.getpid())
+    monkeypatch.setattr(kimi_cache, '_cache', kimi_cache.MemoryResponseCache())
+    monkeypatch.setattr(kimi_cache, 'KIMI_CACHE', 'memory')
+    monkeypatch.setattr(kimi_singleflight, '_flight', None)
+    monkeypatch.setattr(kimi_singleflight, 'KIMI_SINGLEFLIGHT', 'process')
+    monkeypatch.setattr(kimi_conversations, '_store', None)
+    monkeypatch.setattr(kimi_conversations, 'KIMI_CONVERSATIONS', 'off')
+    yield server
+    server.shutdown()
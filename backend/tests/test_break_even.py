@@ -0,0 +1,49 @@
+"""Break-even expenses: the exact solve agrees with a dollar-by-dollar scan, and the sweep uses it."""
+
+import pytest
+
+from tax_batch import sweep_w2_vs_self_employment
+from tax_calculations import calculate_self_employment_scenario, calculate_w2_scenario, solve_break_even_expenses
+
+CASES = [
+    (30000, 'single', 0, 0),
+    (45000, 'head_of_household', 3, 0),
+    (120000, 'married_jointly', 2, 5000),
+    (600000, 'single', 0, 20000),
+]
+
+
+def se_tax(income, expenses, status, dependents, sep):
+    return calculate_self_employment_scenario(income, expenses, status, dependents, sep_ira_contribution=sep,
+                                              details=False)['total_tax']
+
+
+@pytest.mark.parametrize('income,status,dependents,sep', CASES)
+def test_break_even_is_the_first_expense_level_that_closes_the_gap(income, status, dependents, sep):
+    expenses = solve_break_even_expenses(income, status, dependents, sep)
+    w2 = calculate_w2_scenario(income, status, dependents, details=False)['total_tax']
+
+    assert 0 < expenses < income
+    assert se_tax(income, expenses, status, dependents, sep) == pytest.approx(w2, abs=0.02)
+    assert se_tax(income, expenses - 1, status, dependents, sep) > w2
+
+
+@pytest.mark.parametrize('income', [0, -5000])
+def test_no_income_breaks_even_with_no_expenses(income):
+    assert solve_break_even_expenses(income, 'single', 2) == 0.0
+
+
+def test_sweep_grid_lines_up_with_the_scalar_calculators():
+    incomes, expenses, contributions = [40000, 150000], [0, 8000, 30000], [0, 6000]
+    sweep = sweep_w2_vs_self_employment(incomes, expenses, contributions, filing_status='single', dependents=1)
+
+    for i, income in enumerate(incomes):
+        w2 = calculate_w2_scenario(income, 'single', 1, details=False)
+        assert sweep['w2_total_tax'][i] == w2['total_tax']
+        for j, spend in enumerate(expenses):
+            for k, sep in enumerate(contributions):
+                se = se_tax(income, spend, 'single', 1, sep)
+                assert sweep['se_total_tax'][i][j][k] == se
+                assert sweep['tax_difference'][i][j][k] == pytest.approx(se - w2['total_tax'], abs=0.005)
+        assert sweep['break_even_expenses'][i] == [solve_break_even_expenses(income, 'single', 1, sep)
+                                                   for sep in contributions]
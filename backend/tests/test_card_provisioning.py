@@ -0,0 +1,113 @@
+"""Bulk provisioning against the local Stripe mock: retries and reruns never duplicate cards."""
+
+import json
+from urllib.request import urlopen
+
+import pytest
+
+from card_provisioning import Checkpoint, idempotency_key, read_members, run
+from stripe_client import configure_stripe
+from stripe_mock_server import start_in_thread
+
+MEMBERS = 40
+
+
+@pytest.fixture
+def mock_stripe():
+    """Mock Stripe that loses 20% of create responses after applying them."""
+    server, api_base = start_in_thread(fail_rate=0.2)
+    configure_stripe(api_key='sk_test_provisioning', api_base=api_base, max_retries=8, pool_size=8, force=True)
+    yield api_base
+    server.shutdown()
+    configure_stripe(force=True)
+
+
+@pytest.fixture
+def members_file(tmp_path):
+    path = tmp_path / 'members.jsonl'
+    with open(path, 'w') as f:
+        for i in range(MEMBERS):
+            f.write(json.dumps({'pmc_id': f'PMC-{i}', 'name': f'Member {i}', 'email': f'member{i}@example.com',
+                                'address': {'line1': f'{i} Main St', 'city': 'Austin', 'state': 'TX',
+                                            'postal_code': '78701'}}) + '\n')
+    return path
+
+
+def stripe_stats(api_base):
+    return json.load(urlopen(f'{api_base}/stats'))
+
+
+def provision(members_file, checkpoint_path):
+    checkpoint = Checkpoint(str(checkpoint_path))
+    try:
+        return run(read_members(str(members_file)), checkpoint, concurrency=8, log=None)
+    finally:
+        checkpoint.close()
+
+
+def test_lost_responses_and_reruns_create_each_card_once(mock_stripe, members_file, tmp_path):
+    summary = provision(members_file, tmp_path / 'run.checkpoint.jsonl')
+    assert summary['done'] == MEMBERS
+    assert summary['failed'] == 0
+    assert stripe_stats(mock_stripe)['injected_failures'] > 0
+
+    # Same checkpoint: everyone is skipped
+    assert provision(members_file, tmp_path / 'run.checkpoint.jsonl')['skipped'] == MEMBERS
+
+    # Checkpoint lost: Stripe's idempotency keys return the original objects
+    assert provision(members_file, tmp_path / 'fresh.checkpoint.jsonl')['done'] == MEMBERS
+
+    stats = stripe_stats(mock_stripe)
+    assert stats['cardholders_created'] == MEMBERS
+    assert stats['cards_created'] == MEMBERS
+
+
+def test_corrected_parameters_get_a_new_key():
+    member = {'key': 'pmc-1', 'name': 'Member', 'address': {'line1': '1 Main St'}}
+    corrected = dict(member, address={'line1': '1 Main Street'})
+
+    assert idempotency_key('p', 'pmc-1', 'cardholder', member) == idempotency_key('p', 'pmc-1', 'cardholder',
+                                                                                  dict(member))
+    assert idempotency_key('p', 'pmc-1', 'cardholder', member) != idempotency_key('p', 'pmc-1', 'cardholder',
+                                                                                  corrected)
+    assert idempotency_key('p', 'pmc-1', 'card', {'spending_limit': 100}) != \
+        idempotency_key('p', 'pmc-1', 'card', {'spending_limit': 200})
+
+
+def test_invalid_rows_are_reported_not_sent(mock_stripe, tmp_path):
+    path = tmp_path / 'members.csv'
+    path.write_text('pmc_id,name,email,address_line1,city,state,postal_code,spending_limit\n'
+                    'PMC-1,Ann,ann@example.com,1 Main,Austin,TX,78701,lots\n'
+                    'PMC-2,Bob,bob@example.com,,Austin,TX,78701,5000\n')
+    checkpoint = Checkpoint(str(tmp_path / 'members.csv.checkpoint.jsonl'))
+    try:
+        summary = run(read_members(str(path)), checkpoint, log=None)
+    finally:
+        checkpoint.close()
+
+    assert summary['invalid'] == 2
+    assert [error['line'] for error in summary['errors']] == [2, 3]
+    assert stripe_stats(mock_stripe)['requests'] == 0
+
+
+def test_unreadable_jsonl_lines_are_invalid_not_fatal(mock_stripe, tmp_path):
+    member = {'name': 'Ann', 'email': 'ann@example.com', 'address': {'line1': '1 Main St', 'city': 'Austin',
+                                                                      'state': 'TX', 'postal_code': '78701'}}
+    path = tmp_path / 'members.jsonl'
+    path.write_text('\n'.join([
+        json.dumps(dict(member, pmc_id='PMC-1')),
+        '{"pmc_id": "PMC-2", "name": ',
+        '["PMC-3", "Bob"]',
+        '42',
+        json.dumps(dict(member, pmc_id='PMC-5', email='eve@example.com')),
+    ]) + '\n')
+    checkpoint = Checkpoint(str(tmp_path / 'members.jsonl.checkpoint.jsonl'))
+    try:
+        summary = run(read_members(str(path)), checkpoint, log=None)
+    finally:
+        checkpoint.close()
+
+    assert (summary['done'], summary['invalid']) == (2, 3)
+    assert [(error['line'], error['member']) for error in summary['errors']] == [(2, None), (3, None), (4, None)]
+    assert summary['errors'][0]['error'].startswith('invalid JSON')
+    assert summary['errors'][1]['error'] == 'member must be a JSON object'
@@ -0,0 +1,135 @@
+"""Group commit: concurrent writes share a flush, errors stay per record, slow commits report pending."""
+
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+import signup_store
+from api import contact_eva
+from group_commit import CommitPendingError, GroupCommitWriter
+from signup_store import SQLiteSignupStore
+
+
+class RecordingFlush:
+    """flush() that records each batch and can be held until released."""
+
+    def __init__(self):
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, records):
+        self.release.wait()
+        self.batches.append(list(records))
+        return [ValueError(record) if record == 'bad' else record.upper() for record in records]
+
+
+@pytest.fixture
+def flush():
+    return RecordingFlush()
+
+
+def write_together(writer, records, timeout=5):
+    barrier = threading.Barrier(len(records))
+    results = [None] * len(records)
+
+    def target(i, record):
+        barrier.wait()
+        try:
+            results[i] = writer.write(record, timeout)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=target, args=(i, record)) for i, record in enumerate(records)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_writes_share_batches(flush):
+    writer = GroupCommitWriter(flush, max_batch=64, max_delay=0.05)
+    records = [f'r{i}' for i in range(20)]
+    results = write_together(writer, records)
+    writer.close()
+
+    assert results == [record.upper() for record in records]
+    assert sorted(sum(flush.batches, [])) == sorted(records)
+    assert len(flush.batches) < len(records)
+    assert writer.info()['records'] == 20
+
+
+def test_batches_are_capped_at_max_batch(flush):
+    flush.release.clear()
+    writer = GroupCommitWriter(flush, max_batch=4, max_delay=0)
+    futures = [writer.submit(f'r{i}') for i in range(10)]
+    flush.release.set()
+    assert [future.result(5) for future in futures] == [f'R{i}' for i in range(10)]
+    writer.close()
+
+    assert max(len(batch) for batch in flush.batches) <= 4
+    assert writer.info()['largest_batch'] <= 4
+
+
+def test_a_failed_record_does_not_fail_its_batch(flush):
+    writer = GroupCommitWriter(flush, max_delay=0.05)
+    results = write_together(writer, ['a', 'bad', 'c'])
+    writer.close()
+
+    assert results[0] == 'A' and results[2] == 'C'
+    assert isinstance(results[1], ValueError)
+
+
+def test_a_failing_flush_fails_every_record_in_the_batch():
+    def broken(records):
+        raise OSError('disk full')
+
+    writer = GroupCommitWriter(broken)
+    with pytest.raises(OSError, match='disk full'):
+        writer.write('a', 5)
+    writer.close()
+
+
+def test_timeout_reports_pending_and_the_record_still_commits(flush):
+    flush.release.clear()
+    writer = GroupCommitWriter(flush, max_delay=0)
+
+    with pytest.raises(CommitPendingError) as pending:
+        writer.write('late', timeout=0.05)
+    assert isinstance(pending.value, TimeoutError)
+
+    flush.release.set()
+    writer.close()
+    assert flush.batches == [['late']]
+
+
+def test_signup_endpoint_answers_pending_instead_of_an_error(monkeypatch, tmp_path):
+    store = SQLiteSignupStore(str(tmp_path / 'signups.sqlite3'))
+    committed = threading.Event()
+
+    def slow_append_many(signups):
+        time.sleep(0.2)
+        results = SQLiteSignupStore.append_many(store, signups)
+        committed.set()
+        return results
+
+    monkeypatch.setattr(store, 'append_many', slow_append_many)
+    monkeypatch.setattr(signup_store, '_store', store)
+    monkeypatch.setattr(signup_store, '_writer', None)
+    monkeypatch.setattr(signup_store, 'SIGNUP_DURABILITY', 'group')
+    monkeypatch.setattr(signup_store, 'SIGNUP_COMMIT_TIMEOUT', 0.05)
+    app = Flask(__name__)
+    app.register_blueprint(contact_eva.contact_eva_bp, url_prefix='/api')
+    client = app.test_client()
+    body = {'name': 'Ann', 'pmc_id': 'PMC-1', 'email': 'ann@example.com', 'business': 'Bakery'}
+
+    response = client.post('/api/contact-eva', json=body)
+    assert response.status_code == 202
+    assert response.get_json()['status'] == 'pending'
+
+    assert committed.wait(5)
+    signup_store._writer.close()
+    assert store.find(pmc_id='PMC-1')['email'] == 'ann@example.com'
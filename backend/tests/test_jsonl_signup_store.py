@@ -0,0 +1,107 @@
+"""JSONL signup log: one locked append per signup, shared safely by every worker on the host."""
+
+import json
+import multiprocessing
+
+import pytest
+
+from signup_store import DuplicateSignupError, JSONLSignupStore
+
+PROCESSES = 4
+PER_PROCESS = 25
+
+
+def signup(pmc_id, email):
+    return {'timestamp': '2025-11-26T12:00:00', 'name': 'Founding Member', 'pmc_id': pmc_id, 'email': email,
+            'business': '', 'plan': 'Founding 50', 'price': 24.99}
+
+
+def log_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+def test_legacy_array_is_migrated_once_with_its_old_ids(tmp_path):
+    legacy = tmp_path / 'pmc_signups.json'
+    legacy.write_text(json.dumps([signup('PMC-1', 'one@example.com'), signup('PMC-2', 'two@example.com')]))
+    original = legacy.read_text()
+    path = str(tmp_path / 'pmc_signups.jsonl')
+    store = JSONLSignupStore(path, str(legacy))
+
+    assert store.append(signup('PMC-3', 'three@example.com')) == 3
+    assert [record['signup_id'] for record in store] == [1, 2, 3]
+    assert store.find(email='TWO@example.com')['pmc_id'] == 'PMC-2'
+    assert legacy.read_text() == original
+
+    legacy.write_text(json.dumps([signup('PMC-9', 'nine@example.com')]))
+    assert JSONLSignupStore(path, str(legacy)).count() == 3
+
+
+def test_each_signup_is_one_line_and_the_counter_is_fixed_width(tmp_path):
+    path = str(tmp_path / 'pmc_signups.jsonl')
+    store = JSONLSignupStore(path)
+    store.append(signup('PMC-1', 'one@example.com'))
+    store.append_many([signup('PMC-2', 'two@example.com'), signup('PMC-3', 'three@example.com')])
+
+    assert [json.loads(line)['signup_id'] for line in log_lines(path)] == [1, 2, 3]
+    with open(path + '.counter') as f:
+        assert f.read() == '{:020d}\n'.format(3)
+
+
+def test_a_torn_line_is_skipped_and_terminated_by_the_next_append(tmp_path):
+    path = str(tmp_path / 'pmc_signups.jsonl')
+    JSONLSignupStore(path).append(signup('PMC-1', 'one@example.com'))
+    with open(path, 'a') as f:
+        f.write('{"pmc_id": "PMC-torn", "ema')
+
+    store = JSONLSignupStore(path)
+    assert store.append(signup('PMC-2', 'two@example.com')) == 2
+    assert [record['pmc_id'] for record in store] == ['PMC-1', 'PMC-2']
+    assert store.find(pmc_id='PMC-2')['email'] == 'two@example.com'
+    assert len(log_lines(path)) == 3
+
+
+def test_ids_lost_to_a_crash_leave_a_gap_not_a_duplicate(tmp_path):
+    path = str(tmp_path / 'pmc_signups.jsonl')
+    store = JSONLSignupStore(path)
+    store.append(signup('PMC-1', 'one@example.com'))
+    # A worker bumped the counter and died before writing its record
+    store._write_counter(5)
+
+    assert store.append(signup('PMC-2', 'two@example.com')) == 6
+    assert [record['signup_id'] for record in store.page()] == [1, 6]
+
+
+def test_workers_see_each_others_appends(tmp_path):
+    path = str(tmp_path / 'pmc_signups.jsonl')
+    first, second = JSONLSignupStore(path), JSONLSignupStore(path)
+
+    assert first.append(signup('PMC-1', 'one@example.com')) == 1
+    assert second.append(signup('PMC-2', 'two@example.com')) == 2
+    with pytest.raises(DuplicateSignupError):
+        second.append(signup('PMC-3', 'ONE@example.com'))
+    assert first.find(pmc_id='pmc-2')['signup_id'] == 2
+    assert [record['signup_id'] for record in first.page(after=1)] == [2]
+
+
+def append_from_process(path, worker):
+    store = JSONLSignupStore(path)
+    for i in range(PER_PROCESS):
+        store.append(signup(f'PMC-{worker}-{i}', f'w{worker}-{i}@example.com'))
+
+
+def test_concurrent_processes_never_share_an_id_or_interleave_lines(tmp_path):
+    path = str(tmp_path / 'pmc_signups.jsonl')
+    JSONLSignupStore(path).count()
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=append_from_process, args=(path, worker)) for worker in range(PROCESSES)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+
+    records = [json.loads(line) for line in log_lines(path)]
+    assert sorted(record['signup_id'] for record in records) == list(range(1, PROCESSES * PER_PROCESS + 1))
+    assert JSONLSignupStore(path).count() == PROCESSES * PER_PROCESS
+
@@ -0,0 +1,135 @@
+"""Async Kimi client and the ASGI support route: same answers as the sync path, without a thread per chat."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import kimi_client
+import kimi_singleflight
+from kimi_asgi import app
+from kimi_client import close_async_client, send_message_async, stream_message_async
+
+
+@pytest.fixture
+def upstream(kimi_upstream, monkeypatch):
+    monkeypatch.setattr(kimi_singleflight, '_async_flight', None)
+    monkeypatch.setattr(kimi_client, '_async_client', None)
+    return kimi_upstream
+
+
+def run(coro):
+    """Run one coroutine on a fresh event loop, closing the pooled async client it opened."""
+    async def main():
+        try:
+            return await coro
+        finally:
+            await close_async_client()
+    return asyncio.run(main())
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+def test_send_message_async_answers_like_the_sync_client(upstream):
+    result = run(send_message_async('m1', 'how do I order a card'))
+
+    assert result['success'] is True and result['source'] == 'kimi'
+    assert result['reply'] == 'Mock reply to: how do I order a card'
+    assert upstream.stats['requests'] == 1
+
+
+def test_identical_concurrent_questions_share_one_upstream_call(upstream):
+    upstream.delay = 0.2
+
+    async def ask_together():
+        return await asyncio.gather(*(send_message_async(f'm{i}', 'what is IBC') for i in range(5)))
+
+    results = run(ask_together())
+
+    assert {result['reply'] for result in results} == {'Mock reply to: what is IBC'}
+    assert sum(bool(result.get('coalesced')) for result in results) == 4
+    assert upstream.stats['requests'] == 1
+
+
+def test_stream_message_async_streams_tokens_then_serves_the_cache(upstream):
+    events = run(collect(stream_message_async('m1', 'explain quarterly taxes')))
+    tokens = [event['content'] for event in events if event['type'] == 'token']
+
+    assert events[-1]['type'] == 'done'
+    assert events[-1]['reply'] == ''.join(tokens) == 'Mock reply to: explain quarterly taxes'
+    assert len(tokens) == len(events[-1]['reply'].split(' '))
+    assert [event['type'] for event in run(collect(stream_message_async('m2', 'explain quarterly taxes')))] == [
+        'token', 'done']
+    assert upstream.stats['requests'] == 1
+
+
+def test_without_an_api_key_the_async_client_is_mocked(monkeypatch):
+    monkeypatch.setattr(kimi_client, 'KIMI_API_KEY', None)
+
+    assert run(send_message_async('m1', 'hi'))['source'] == 'mock'
+    assert run(collect(stream_message_async('m1', 'hi')))[-1]['source'] == 'mock'
+
+
+def asgi_request(method, path, **kwargs):
+    async def call():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://testserver') as client:
+            response = await client.request(method, path, **kwargs)
+            await response.aread()
+            return response
+    return run(call())
+
+
+def test_asgi_support_route_answers_json(upstream):
+    response = asgi_request('POST', '/api/support/kimi', json={'message': 'hello there', 'member_id': 'm1'})
+
+    assert response.status_code == 200
+    assert response.json()['reply'] == 'Mock reply to: hello there'
+    assert response.headers['access-control-allow-origin'] == '*'
+
+
+def test_asgi_support_route_streams_sse(upstream):
+    response = asgi_request('POST', '/api/support/kimi?stream=true', json={'message': 'hello there'})
+    events = [block.split('\n') for block in response.text.split('\n\n') if block.startswith('event:')]
+
+    assert response.headers['content-type'].startswith('text/event-stream')
+    assert [lines[0] for lines in events][-1] == 'event: done'
+    assert json.loads(events[-1][1][len('data: '):])['reply'] == 'Mock reply to: hello there'
+
+
+def test_asgi_support_route_rejects_bad_requests(upstream):
+    assert asgi_request('POST', '/api/support/kimi', json={}).status_code == 400
+    assert asgi_request('GET', '/api/support/kimi').status_code == 405
+    assert asgi_request('OPTIONS', '/api/support/kimi').status_code == 204
+
+
+def test_other_routes_go_to_the_flask_app(upstream):
+    response = asgi_request('GET', '/api')
+
+    assert response.status_code == 200
+    assert response.json()['status'] == 'running'
+
+
+def test_a_disconnected_browser_stops_the_stream(upstream):
+    upstream.token_delay = 0.05
+    body = json.dumps({'message': 'a long question with many words in it', 'stream': True}).encode()
+    incoming = [{'type': 'http.request', 'body': body}, {'type': 'http.disconnect'}]
+    sent = []
+
+    async def receive():
+        if incoming:
+            return incoming.pop(0)
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/api/support/kimi', 'query_string': b'', 'headers': []}
+    run(app(scope, receive, send))
+    streamed = b''.join(message.get('body', b'') for message in sent if message['type'] == 'http.response.body')
+
+    assert b'event: done' not in streamed
+    assert sent[-1] == {'type': 'http.response.body', 'body': b''}
@@ -0,0 +1,73 @@
+"""Kimi reply cache: normalized keys, LRU/TTL, and read-only hits on the shared SQLite file."""
+
+import time
+
+import pytest
+
+from kimi_cache import MemoryResponseCache, SQLiteResponseCache, cache_key
+
+
+@pytest.fixture(params=['memory', 'disk'])
+def cache(request, tmp_path):
+    if request.param == 'disk':
+        return SQLiteResponseCache(str(tmp_path / 'cache.sqlite3'), maxsize=3, ttl=60)
+    return MemoryResponseCache(maxsize=3, ttl=60)
+
+
+def test_equivalent_questions_share_a_key():
+    assert cache_key('What is PMC?', 'prompt', 'model', 0.7) == cache_key('  what is  pmc ', 'prompt', 'model', 0.7)
+    assert cache_key('What is PMC?', 'prompt', 'model', 0.7) != cache_key('What is PMC?', 'prompt', 'model', 0.2)
+
+
+def age_entries(cache, seconds):
+    """Pretend the disk cache's entries were last used `seconds` ago."""
+    if isinstance(cache, SQLiteResponseCache):
+        conn = cache._connect()
+        with conn:
+            conn.execute('UPDATE responses SET last_used = last_used - ?', (seconds,))
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    for name in 'abc':
+        cache.set(name, {'reply': name})
+    # The disk backend only records recency once it is a tenth of the TTL old
+    age_entries(cache, 30)
+    assert cache.get('a') == {'reply': 'a'}
+    cache.set('d', {'reply': 'd'})
+
+    assert cache.get('b') is None
+    assert cache.get('a') == {'reply': 'a'}
+    info = cache.info()
+    assert (info['hits'], info['misses'], info['evictions'], info['size']) == (2, 1, 1, 3)
+
+
+def test_expired_entries_are_misses(cache):
+    cache.ttl = 0.05
+    cache.set('a', {'reply': 'a'})
+    time.sleep(0.1)
+
+    assert cache.get('a') is None
+    assert cache.info()['expirations'] == 1
+
+
+def test_disk_hits_do_not_write(tmp_path):
+    cache = SQLiteResponseCache(str(tmp_path / 'cache.sqlite3'), ttl=60)
+    cache.set('a', {'reply': 'a'})
+    conn = cache._connect()
+    before = conn.total_changes
+    for _ in range(100):
+        assert cache.get('a') == {'reply': 'a'}
+
+    assert conn.total_changes == before
+    assert cache.info()['hits'] == 100
+
+
+def test_disk_hit_refreshes_stale_recency(tmp_path):
+    cache = SQLiteResponseCache(str(tmp_path / 'cache.sqlite3'), ttl=60)
+    cache.set('a', {'reply': 'a'})
+    age_entries(cache, 30)
+    cache.get('a')
+
+    conn = cache._connect()
+    last_used = conn.execute('SELECT last_used FROM responses').fetchone()[0]
+    assert time.time() - last_used < 1
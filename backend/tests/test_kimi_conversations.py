@@ -0,0 +1,126 @@
+"""Kimi conversations: windowing, summaries, token budget, and who may reach a stored history."""
+
+import pytest
+
+from kimi_client import send_message
+from kimi_conversations import (
+    SUMMARY_HEADER,
+    MemoryConversationStore,
+    SQLiteConversationStore,
+    build_window,
+    compact,
+    conversation_key,
+    estimate_tokens,
+    message_tokens,
+    set_conversation_store,
+    summarize_turns,
+)
+
+
+def exchanges(count, words=30):
+    turns = []
+    for i in range(count):
+        turns.append({'role': 'user', 'content': f"Question {i}. " + 'detail ' * words})
+        turns.append({'role': 'assistant', 'content': f"Answer {i}. " + 'because ' * words})
+    return turns
+
+
+def test_token_estimate_counts_cjk_characters_individually():
+    assert estimate_tokens('abcdefgh') == 2
+    assert estimate_tokens('税务问题') == 4
+    assert estimate_tokens('') == 0
+
+
+def test_short_history_is_sent_whole():
+    turns = exchanges(2)
+    messages, stats = build_window({'summary': '', 'turns': turns}, 'next question', budget=2000)
+
+    assert messages == turns
+    assert stats == {'turns': 4, 'summarized': False, 'history_tokens': sum(map(message_tokens, turns))}
+
+
+def test_window_keeps_newest_turns_within_budget_and_summarizes_the_rest():
+    turns = exchanges(10)
+    budget = 300
+    messages, stats = build_window({'summary': '', 'turns': turns}, 'next question', budget=budget,
+                                   summary_tokens=100)
+
+    assert messages[0]['role'] == 'system'
+    assert messages[0]['content'].startswith(SUMMARY_HEADER)
+    newest_folded = (len(turns) - stats['turns']) // 2 - 1
+    assert f'- Member asked: Question {newest_folded}.; you answered: Answer {newest_folded}.' in messages[0]['content']
+    # The newest turns, opening on a question, and the whole request within budget
+    assert messages[-1] == turns[-1]
+    assert messages[1]['role'] == 'user'
+    assert stats['turns'] and messages[1:] == turns[-stats['turns']:]
+    assert stats['summarized'] is True
+    assert stats['history_tokens'] + message_tokens({'content': 'next question'}) <= budget
+
+
+def test_summary_drops_oldest_lines_beyond_its_cap():
+    summary = summarize_turns(exchanges(40), max_tokens=60)
+
+    assert estimate_tokens(summary) <= 60
+    assert 'Question 39.' in summary
+    assert 'Question 0.' not in summary
+
+
+def test_compact_folds_old_turns_into_summary():
+    conversation = compact({'summary': '', 'turns': exchanges(10)}, budget=200)
+
+    assert sum(map(message_tokens, conversation['turns'])) <= 200
+    assert conversation['turns'][0]['role'] == 'user'
+    assert 'Question 0.' in conversation['summary']
+
+
+@pytest.fixture(params=['memory', 'disk'])
+def store(request, tmp_path):
+    if request.param == 'disk':
+        return SQLiteConversationStore(str(tmp_path / 'conversations.sqlite3'), budget=200)
+    return MemoryConversationStore(budget=200)
+
+
+def test_store_keeps_stored_turns_compacted(store):
+    for turn in range(0, 20, 2):
+        user, reply = exchanges(10)[turn:turn + 2]
+        store.append('member-1:abc', user['content'], reply['content'])
+    conversation = store.get('member-1:abc')
+
+    assert sum(map(message_tokens, conversation['turns'])) <= 200
+    assert 'Question 0.' in conversation['summary']
+    assert store.get('member-2:abc') == {'summary': '', 'turns': []}
+
+
+def test_only_issued_ids_select_a_conversation():
+    key, conversation_id = conversation_key('member-1', {})
+    assert key == f'member-1:{conversation_id}'
+    assert conversation_key('member-1', {'conversation_id': conversation_id}) == (key, conversation_id)
+
+    # Made-up ids (or none) start a fresh conversation instead of reaching someone else's
+    assert conversation_key('member-1', {'conversation_id': 'default'})[1] != 'default'
+    assert conversation_key('member-1', {})[1] != conversation_id
+    assert conversation_key('member-1', {'conversation': False}) == (None, None)
+
+
+def test_follow_ups_need_the_conversation_id(kimi_upstream):
+    set_conversation_store(MemoryConversationStore())
+    first = send_message('member-1', 'How do I activate my card?')
+    conversation_id = first['conversation']['id']
+    assert first['conversation']['turns'] == 0
+
+    follow_up = send_message('member-1', 'And the spending limit?', context={'conversation_id': conversation_id})
+    assert (follow_up['conversation']['id'], follow_up['conversation']['turns']) == (conversation_id, 2)
+
+    # Same member_id without the id, or the id with someone else's member_id: no history
+    assert send_message('member-1', 'Anything else?')['conversation']['turns'] == 0
+    other = send_message('member-2', 'Reset it', context={'conversation_id': conversation_id, 'reset': True})
+    assert other['conversation']['turns'] == 0
+    resumed = send_message('member-1', 'Thanks', context={'conversation_id': conversation_id})
+    assert resumed['conversation']['turns'] == 4
+
+
+def test_store_is_off_by_default(kimi_upstream):
+    result = send_message('member-1', 'How do I activate my card?')
+
+    assert 'conversation' not in result
+    assert send_message('member-1', 'How do I activate my card?')['cached'] is True
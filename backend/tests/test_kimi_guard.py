@@ -0,0 +1,89 @@
+"""Kimi upstream guard: member limits, anonymous visitors, and the circuit breaker."""
+
+from kimi_guard import CircuitBreaker, KeyedTokenBucket, TokenBucket, UpstreamGuard
+
+
+def member_guard(rate=0.2, burst=5):
+    return UpstreamGuard(member_buckets=KeyedTokenBucket(rate, burst))
+
+
+def test_member_is_limited_after_burst():
+    guard = member_guard()
+    results = [guard.check_member('member-1') for _ in range(6)]
+
+    assert results[:5] == [None] * 5
+    assert results[5]['rejected'] == 'member_rate_limited'
+    assert results[5]['retry_after'] > 0
+    assert guard.check_member('member-2') is None
+
+
+def test_anonymous_visitors_do_not_share_a_member_bucket():
+    guard = member_guard()
+
+    assert all(guard.check_member('anonymous') is None for _ in range(50))
+    assert all(guard.check_member(None) is None for _ in range(50))
+
+
+def test_anonymous_traffic_is_still_bounded_by_the_process_bucket():
+    guard = UpstreamGuard(bucket=TokenBucket(1, 3), member_buckets=KeyedTokenBucket(0.2, 5))
+    admitted = [guard.check_member('anonymous') or guard.admit() for _ in range(5)]
+
+    assert admitted[:3] == [None] * 3
+    assert [result['rejected'] for result in admitted[3:]] == ['rate_limited'] * 2
+
+
+def test_breaker_opens_after_consecutive_failures():
+    guard = UpstreamGuard(breaker=CircuitBreaker(3, 30))
+    for _ in range(3):
+        assert guard.admit() is None
+        guard.record(False, 100)
+
+    assert guard.admit()['rejected'] == 'circuit_open'
+
+
+def open_breaker(guard, failures=3):
+    for _ in range(failures):
+        guard.admit()
+        guard.record(False, 100)
+
+
+def test_reset_timeout_expiring_mid_admit_does_not_strand_the_probe(monkeypatch):
+    clock = {'now': 1000.0, 'step': 0.0}
+
+    def monotonic():
+        clock['now'] += clock['step']
+        return clock['now']
+
+    monkeypatch.setattr('kimi_guard.time.monotonic', monotonic)
+    breaker = CircuitBreaker(3, 30)
+    guard = UpstreamGuard(bucket=TokenBucket(1, 1), breaker=breaker)
+    open_breaker(guard)
+
+    # Each clock read moves time on, so the reset timeout runs out while admit() is deciding
+    clock['now'] += 30 - 0.5
+    clock['step'] = 0.4
+    results = [guard.admit() for _ in range(3)]
+    clock['step'] = 0.0
+
+    assert breaker.state != CircuitBreaker.OPEN
+    assert [result for result in results if result is None] == [None]
+    guard.record(True, 100)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_rejection_while_open_does_not_take_the_probe(monkeypatch):
+    clock = {'now': 1000.0}
+    monkeypatch.setattr('kimi_guard.time.monotonic', lambda: clock['now'])
+    breaker = CircuitBreaker(3, 30)
+    guard = UpstreamGuard(breaker=breaker)
+    open_breaker(guard)
+
+    rejected = guard.admit()
+    assert rejected['rejected'] == 'circuit_open'
+    assert rejected['retry_after'] == 30
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.info()['rejected'] == 1
+
+    clock['now'] += 30
+    assert guard.admit() is None
+    assert breaker.state == CircuitBreaker.HALF_OPEN
@@ -0,0 +1,144 @@
+"""Single-flight: identical calls share one upstream call, different keys never wait on each other."""
+
+import fcntl
+import hashlib
+import os
+import threading
+import time
+
+import pytest
+
+import kimi_cache
+import kimi_client
+import kimi_singleflight
+from kimi_cache import SQLiteResponseCache
+from single_flight import SingleFlight
+
+
+def key(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def run_together(calls):
+    """Start every zero-argument callable at once; returns their results in order."""
+    barrier = threading.Barrier(len(calls))
+    results = [None] * len(calls)
+
+    def target(i, call):
+        barrier.wait()
+        results[i] = call()
+
+    threads = [threading.Thread(target=target, args=(i, call)) for i, call in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def slow_upstream(counter, reply='reply', delay=0.2):
+    def fetch():
+        with counter['lock']:
+            counter['calls'] += 1
+        time.sleep(delay)
+        return reply
+    return fetch
+
+
+@pytest.fixture
+def counter():
+    return {'calls': 0, 'lock': threading.Lock()}
+
+
+def test_identical_concurrent_calls_make_one_upstream_call(counter):
+    flight = SingleFlight()
+    fetch = slow_upstream(counter)
+    results = run_together([lambda: flight.do(key('what is pmc'), fetch)] * 5)
+
+    assert counter['calls'] == 1
+    assert [result for result, _ in results] == ['reply'] * 5
+    assert sorted(shared for _, shared in results) == [False] + [True] * 4
+    assert flight.info()['collapsed'] == 4
+
+
+def test_leader_error_reaches_every_waiter():
+    flight = SingleFlight()
+
+    def fail():
+        time.sleep(0.1)
+        raise TimeoutError('upstream timed out')
+
+    def call():
+        try:
+            flight.do(key('q'), fail)
+        except TimeoutError as e:
+            return str(e)
+
+    assert run_together([call] * 3) == ['upstream timed out'] * 3
+
+
+def test_host_mode_rechecks_cache_after_another_worker(tmp_path, counter):
+    cache = {}
+    workers = [SingleFlight(str(tmp_path)) for _ in range(3)]
+    k = key('card limit')
+
+    def fetch():
+        cache[k] = slow_upstream(counter)()
+        return cache[k]
+
+    results = run_together([lambda flight=flight: flight.do(k, fetch, lambda: cache.get(k)) for flight in workers])
+
+    assert counter['calls'] == 1
+    assert [result for result, _ in results] == ['reply'] * 3
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_host_mode_different_keys_run_in_parallel(tmp_path, counter):
+    workers = [SingleFlight(str(tmp_path)) for _ in range(4)]
+    fetch = slow_upstream(counter, delay=0.3)
+    started = time.perf_counter()
+    run_together([lambda flight=flight, i=i: flight.do(key(f'question {i}'), fetch, lambda: None)
+                  for i, flight in enumerate(workers)])
+
+    assert counter['calls'] == 4
+    assert time.perf_counter() - started < 0.6
+
+
+def test_host_mode_stops_waiting_on_a_stuck_lock(tmp_path, counter):
+    k = key('stuck')
+    with open(tmp_path / f'{k}.lock', 'a') as held:
+        fcntl.flock(held, fcntl.LOCK_EX)
+        flight = SingleFlight(str(tmp_path), lock_wait=0.1)
+        result, shared = flight.do(k, slow_upstream(counter, delay=0), lambda: None)
+
+    assert (result, shared) == ('reply', False)
+    assert flight.info()['lock_timeouts'] == 1
+
+
+def test_send_message_uses_the_reply_another_worker_cached(kimi_upstream, monkeypatch, tmp_path):
+    cache = SQLiteResponseCache(str(tmp_path / 'cache.sqlite3'))
+    monkeypatch.setattr(kimi_cache, '_cache', cache)
+    monkeypatch.setattr(kimi_cache, 'KIMI_CACHE', 'disk')
+    monkeypatch.setattr(kimi_singleflight, 'KIMI_SINGLEFLIGHT', 'host')
+    monkeypatch.setattr(kimi_singleflight, 'KIMI_SINGLEFLIGHT_LOCK_DIR', str(tmp_path / 'locks'))
+    question = 'How do I raise my card limit?'
+    _, _, payload = kimi_client._chat_request('member-1', question, 'chat')
+    k = kimi_client._reply_key(question, payload)
+    path = tmp_path / 'locks' / f'{k}.lock'
+    os.makedirs(path.parent)
+
+    # Another worker is already asking Kimi this question
+    results = []
+    with open(path, 'a') as other_worker:
+        fcntl.flock(other_worker, fcntl.LOCK_EX)
+        thread = threading.Thread(target=lambda: results.append(kimi_client.send_message('member-1', question)))
+        thread.start()
+        time.sleep(0.2)
+        cache.set(k, {'reply': 'answered by the other worker', 'raw': None})
+        os.unlink(path)
+    thread.join(5)
+
+    assert results[0]['reply'] == 'answered by the other worker'
+    assert results[0]['coalesced'] is True
+    assert kimi_upstream.stats['requests'] == 0
+    assert kimi_singleflight.get_single_flight().info()['collapsed_across_workers'] == 1
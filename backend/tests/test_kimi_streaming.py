@@ -0,0 +1,109 @@
+"""Streamed support replies: token events add up to the reply, and the endpoint relays them as SSE."""
+
+import json
+
+import pytest
+from flask import Flask
+
+import kimi_client
+from kimi_client import _delta_content, stream_message
+from kimi_support import SSE_OPEN, kimi_bp, sse_event
+
+
+def parse_sse(text):
+    """[(event, data)] from a text/event-stream body, skipping comment lines."""
+    events = []
+    for block in text.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+        if fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_delta_lines_are_parsed_openai_style():
+    chunk = {'choices': [{'delta': {'content': 'Hel'}}]}
+
+    assert _delta_content(f"data: {json.dumps(chunk)}") == 'Hel'
+    assert _delta_content('data: {"choices": [{"text": "lo"}]}') == 'lo'
+    assert _delta_content('data: [DONE]') is None
+    assert _delta_content(': keep-alive') is None
+    assert _delta_content('') is None
+
+
+def test_tokens_arrive_one_by_one_and_add_up_to_the_reply(kimi_upstream):
+    events = list(stream_message('m1', 'how do I activate my card'))
+    tokens = [event['content'] for event in events if event['type'] == 'token']
+    done = events[-1]
+
+    assert len(tokens) > 1
+    assert done['type'] == 'done' and done['source'] == 'kimi'
+    assert done['reply'] == ''.join(tokens) == 'Mock reply to: how do I activate my card'
+    assert 0 <= done['ttft_ms'] <= done['latency_ms']
+
+
+def test_a_repeated_question_streams_from_the_cache(kimi_upstream):
+    first = list(stream_message('m1', 'what is a SEP IRA'))
+    again = list(stream_message('m2', 'what is a SEP IRA'))
+
+    assert [event['type'] for event in again] == ['token', 'done']
+    assert again[-1]['cached'] is True and again[-1]['reply'] == first[-1]['reply']
+    assert kimi_upstream.stats['requests'] == 1
+
+
+def test_upstream_failure_ends_the_stream_with_an_error(kimi_upstream, monkeypatch):
+    monkeypatch.setattr(kimi_client, 'KIMI_BASE_URL', 'http://127.0.0.1:1/v1')
+    events = list(stream_message('m1', 'hello', timeout=2))
+
+    assert [event['type'] for event in events] == ['error']
+    assert events[0]['error']
+
+
+def test_without_an_api_key_the_mock_reply_streams_word_by_word(monkeypatch):
+    monkeypatch.setattr(kimi_client, 'KIMI_API_KEY', None)
+    events = list(stream_message('m1', 'hello'))
+    tokens = [event['content'] for event in events if event['type'] == 'token']
+
+    assert events[-1]['source'] == 'mock'
+    assert ''.join(tokens) == events[-1]['reply'] == kimi_client._mock_reply('m1')
+    assert len(tokens) == len(events[-1]['reply'].split(' '))
+
+
+def test_sse_event_formatting():
+    assert sse_event({'type': 'token', 'content': 'Hi'}, 'm1', 'chat') == 'event: token\ndata: {"content": "Hi"}\n\n'
+
+    rejected = sse_event({'type': 'error', 'error': 'busy', 'rejected': 'rate_limited', 'retry_after': 2.5,
+                          'latency_ms': 1}, 'm1', 'chat')
+    assert parse_sse(rejected) == [('error', {'success': False, 'error': 'busy', 'rejected': 'rate_limited',
+                                              'retry_after': 2.5})]
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(kimi_bp)
+    return app.test_client()
+
+
+@pytest.mark.parametrize('request_kwargs', [
+    {'json': {'message': 'hi there', 'stream': True}},
+    {'json': {'message': 'hi there'}, 'query_string': {'stream': 'true'}},
+    {'json': {'message': 'hi there'}, 'headers': {'Accept': 'text/event-stream'}},
+])
+def test_endpoint_streams_when_asked(kimi_upstream, client, request_kwargs):
+    response = client.post('/api/support/kimi', **request_kwargs)
+    body = response.get_data(as_text=True)
+    events = parse_sse(body)
+
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['X-Accel-Buffering'] == 'no'
+    assert body.startswith(SSE_OPEN)
+    assert [kind for kind, _ in events[:-1]] == ['token'] * (len(events) - 1)
+    assert events[-1][0] == 'done'
+    assert events[-1][1]['reply'] == ''.join(data['content'] for _, data in events[:-1])
+
+
+def test_endpoint_answers_json_by_default(kimi_upstream, client):
+    response = client.post('/api/support/kimi', json={'message': 'hi there'})
+
+    assert response.mimetype == 'application/json'
+    assert response.get_json()['reply'] == 'Mock reply to: hi there'
@@ -0,0 +1,107 @@
+"""Signup export: streamed NDJSON or CSV, filtered by time window and plan, safe to open in a spreadsheet."""
+
+import csv
+import io
+import json
+
+import pytest
+from flask import Flask
+
+import signup_store
+from api import contact_eva
+from signup_store import JSONLSignupStore, SQLiteSignupStore
+
+TOKEN = 'export-token'
+AUTH = {'Authorization': f'Bearer {TOKEN}'}
+
+
+def signup(pmc_id, email, timestamp, plan='Founding 50', **fields):
+    return dict({'timestamp': timestamp, 'name': 'Founding Member', 'pmc_id': pmc_id, 'email': email,
+                 'business': '', 'plan': plan, 'price': 24.99}, **fields)
+
+
+@pytest.fixture(params=['sqlite', 'jsonl'])
+def store(request, tmp_path, monkeypatch):
+    if request.param == 'sqlite':
+        store = SQLiteSignupStore(str(tmp_path / 'signups.sqlite3'))
+    else:
+        store = JSONLSignupStore(str(tmp_path / 'signups.jsonl'))
+    store.append(signup('PMC-1', 'one@example.com', '2025-11-01T09:00:00'))
+    store.append(signup('PMC-2', 'two@example.com', '2025-11-15T09:00:00', plan='Standard'))
+    store.append(signup('PMC-3', 'three@example.com', '2025-12-01T00:00:00'))
+    monkeypatch.setattr(signup_store, '_store', store)
+    return store
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(contact_eva, 'SIGNUPS_ADMIN_TOKEN', TOKEN)
+    app = Flask(__name__)
+    app.register_blueprint(contact_eva.contact_eva_bp, url_prefix='/api')
+    return app.test_client()
+
+
+def export_ids(client, **query):
+    response = client.get('/api/signups/export', query_string=query, headers=AUTH)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return [json.loads(line)['pmc_id'] for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_export_requires_the_admin_token(store, client):
+    assert client.get('/api/signups/export').status_code == 401
+    assert client.get('/api/signups/export', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+
+
+def test_ndjson_export_streams_every_signup_as_an_attachment(store, client):
+    response = client.get('/api/signups/export', headers=AUTH)
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['Content-Disposition'].startswith('attachment; filename="pmc_signups-')
+    assert [record['signup_id'] for record in records] == [1, 2, 3]
+    assert records[0]['email'] == 'one@example.com'
+
+
+def test_filters_by_time_window_and_plan(store, client):
+    assert export_ids(client, since='2025-11-15') == ['PMC-2', 'PMC-3']
+    assert export_ids(client, until='2025-12-01T00:00:00') == ['PMC-1', 'PMC-2']
+    assert export_ids(client, since='2025-11-02', until='2025-12-01') == ['PMC-2']
+    assert export_ids(client, plan='founding 50') == ['PMC-1', 'PMC-3']
+    # Offsets are converted to UTC: 10:00+01:00 is the 09:00 signup, and until is exclusive
+    assert export_ids(client, since='2025-11-15T10:00:00+01:00', until='2025-11-15T10:00:01+01:00') == ['PMC-2']
+    assert export_ids(client, until='2025-11-15T10:00:00+01:00') == ['PMC-1']
+
+
+def test_bad_format_or_timestamp_is_a_bad_request(store, client):
+    assert client.get('/api/signups/export?format=xlsx', headers=AUTH).status_code == 400
+    response = client.get('/api/signups/export?since=last-week', headers=AUTH)
+    assert response.status_code == 400
+    assert 'since must be an ISO date' in response.get_json()['error']
+
+
+def test_csv_export_neutralizes_spreadsheet_formulas(store, client):
+    store.append(signup('PMC-4', 'four@example.com', '2025-12-02T00:00:00', name='=HYPERLINK("http://x")',
+                        business='+1 Bakery', plan='-Founding', price=-5.0))
+    store.append(signup('PMC-5', '@five@example.com', '2025-12-03T00:00:00', name='Ann = Bob'))
+    response = client.get('/api/signups/export?format=csv', headers=AUTH)
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+    assert response.mimetype == 'text/csv'
+    assert list(rows[0]) == list(contact_eva.EXPORT_COLUMNS)
+    assert [row['pmc_id'] for row in rows] == ['PMC-1', 'PMC-2', 'PMC-3', 'PMC-4', 'PMC-5']
+    assert rows[3]['name'] == '\'=HYPERLINK("http://x")'
+    assert rows[3]['business'] == "'+1 Bakery"
+    assert rows[3]['plan'] == "'-Founding"
+    assert rows[3]['price'] == '-5.0'
+    assert rows[4]['email'] == "'@five@example.com"
+    assert rows[4]['name'] == 'Ann = Bob'
+
+
+def test_sqlite_scan_reads_in_keyset_batches(tmp_path):
+    store = SQLiteSignupStore(str(tmp_path / 'signups.sqlite3'))
+    for i in range(7):
+        store.append(signup(f'PMC-{i}', f'm{i}@example.com', f'2025-11-0{i + 1}T00:00:00'))
+
+    assert [record['signup_id'] for record in store.scan(batch_size=2)] == list(range(1, 8))
+    assert [record['pmc_id'] for record in store.scan(since='2025-11-03', until='2025-11-05', batch_size=2)] == [
+        'PMC-2', 'PMC-3']
@@ -0,0 +1,128 @@
+"""Signup stores must reject duplicates even when workers race to insert them."""
+
+import json
+import threading
+
+import pytest
+
+from group_commit import GroupCommitWriter
+from signup_store import DuplicateSignupError, JSONLSignupStore, SQLiteSignupStore
+
+THREADS = 16
+
+
+def signup(pmc_id, email):
+    """Signup record as api/contact_eva builds it."""
+    return {'timestamp': '2025-11-26T12:00:00', 'name': 'Founding Member', 'pmc_id': pmc_id, 'email': email,
+            'business': '', 'plan': 'Founding 50', 'price': 24.99}
+
+
+@pytest.fixture(params=['sqlite', 'jsonl'])
+def store(request, tmp_path):
+    if request.param == 'sqlite':
+        return SQLiteSignupStore(str(tmp_path / 'signups.sqlite3'))
+    return JSONLSignupStore(str(tmp_path / 'signups.jsonl'))
+
+
+def race(append, signups):
+    """Submit every signup from its own thread at once; returns ids and errors."""
+    barrier = threading.Barrier(len(signups))
+    ids, errors = [], []
+    lock = threading.Lock()
+
+    def submit(signup):
+        barrier.wait()
+        try:
+            signup_id = append(signup)
+        except DuplicateSignupError as e:
+            with lock:
+                errors.append(e)
+        else:
+            with lock:
+                ids.append(signup_id)
+
+    threads = [threading.Thread(target=submit, args=(signup,)) for signup in signups]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return ids, errors
+
+
+def test_same_email_from_many_threads_is_stored_once(store):
+    signups = [signup(f'PMC-{i}', 'Founder@Example.com' if i % 2 else 'founder@example.com')
+               for i in range(THREADS)]
+    ids, errors = race(store.append, signups)
+
+    assert len(ids) == 1
+    assert len(errors) == THREADS - 1
+    assert {e.field for e in errors} == {'email'}
+    assert store.count() == 1
+    assert store.find(email='FOUNDER@example.com')['signup_id'] == ids[0]
+
+
+def test_distinct_signups_get_unique_ids(store):
+    signups = [signup(f'PMC-{i}', f'member{i}@example.com') for i in range(THREADS)]
+    ids, errors = race(store.append, signups)
+
+    assert not errors
+    assert len(set(ids)) == THREADS
+    assert store.count() == THREADS
+    assert [record['signup_id'] for record in store.page(limit=THREADS)] == sorted(ids)
+
+
+def test_duplicate_pmc_id_is_rejected(store):
+    store.append(signup('PMC-1', 'a@example.com'))
+    with pytest.raises(DuplicateSignupError) as excinfo:
+        store.append(signup('pmc-1', 'b@example.com'))
+    assert excinfo.value.field == 'pmc_id'
+
+
+def test_group_commit_rejects_duplicates_within_one_batch(store):
+    writer = GroupCommitWriter(store.append_many, max_batch=THREADS, max_delay=0.05)
+    try:
+        signups = [signup(f'PMC-{i % 4}', f'member{i % 4}@example.com') for i in range(THREADS)]
+        ids, errors = race(lambda signup: writer.write(signup, 10), signups)
+    finally:
+        writer.close()
+
+    assert len(ids) == 4
+    assert len(errors) == THREADS - 4
+    assert store.count() == 4
+
+
+def test_import_reports_legacy_rows_it_cannot_take(tmp_path, capsys):
+    legacy = tmp_path / 'pmc_signups.json'
+    legacy.write_text(json.dumps([
+        signup('PMC-1', 'one@example.com'),
+        signup('PMC-2', 'ONE@example.com'),
+        dict(signup('PMC-3', 'three@example.com'), name=None),
+        signup('PMC-4', 'four@example.com'),
+    ]))
+    store = SQLiteSignupStore(str(tmp_path / 'signups.sqlite3'), (str(tmp_path / 'missing.jsonl'), str(legacy)))
+
+    assert [row['pmc_id'] for row in store.page()] == ['PMC-1', 'PMC-4']
+    assert store.find(pmc_id='PMC-4')['signup_id'] == 4
+    assert store.import_skipped() == [
+        {'signup_id': 2, 'pmc_id': 'PMC-2', 'email': 'ONE@example.com', 'reason': 'duplicate email'},
+        {'signup_id': 3, 'pmc_id': 'PMC-3', 'email': 'three@example.com', 'reason': 'missing name'},
+    ]
+    assert store.info()['import_skipped'] == 2
+    output = capsys.readouterr().out
+    assert 'Imported 2 of 4 signups' in output
+    assert 'Skipped signup 3 (PMC-3, three@example.com): missing name' in output
+
+
+def test_import_prefers_the_jsonl_log_and_runs_once(tmp_path):
+    log = tmp_path / 'pmc_signups.jsonl'
+    log.write_text(json.dumps(dict(signup('PMC-9', 'nine@example.com'), signup_id=9)) + '\n{"torn": \n')
+    legacy = tmp_path / 'pmc_signups.json'
+    legacy.write_text(json.dumps([signup('PMC-1', 'one@example.com')]))
+    path = str(tmp_path / 'signups.sqlite3')
+
+    assert [row['signup_id'] for row in SQLiteSignupStore(path, (str(log), str(legacy))).page()] == [9]
+    # Later opens (another worker, a restart) don't import again
+    log.write_text(json.dumps(dict(signup('PMC-10', 'ten@example.com'), signup_id=10)) + '\n')
+    reopened = SQLiteSignupStore(path, (str(log), str(legacy)))
+    assert reopened.count() == 1
+    assert reopened.import_skipped() == []
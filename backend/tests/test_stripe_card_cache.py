@@ -0,0 +1,177 @@
+"""Issuing card cache: served from memory, reloaded in the background, invalidated by webhooks in every worker."""
+
+import hashlib
+import hmac
+import json
+import threading
+import time
+
+import pytest
+import stripe
+from flask import Flask
+
+import stripe_card_cache
+from api import stripe_payments
+from stripe_card_cache import IssuingCardCache, simplify_card
+
+WEBHOOK_SECRET = 'whsec_test_card_cache'
+
+
+class Loader:
+    """Snapshot loader that returns the current `cards` list, counts calls and can fail or be held."""
+
+    def __init__(self):
+        self.calls = 0
+        self.cards = [{'id': 'ic_1', 'cardholder': 'ich_1'}, {'id': 'ic_2', 'cardholder': 'ich_1'}]
+        self.error = None
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return list(self.cards), [{'id': 'ich_1', 'name': 'Ann'}]
+
+
+def settled(cache, timeout=5):
+    deadline = time.monotonic() + timeout
+    while cache.info()['refreshing'] and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return cache.info()
+
+
+@pytest.fixture
+def loader():
+    return Loader()
+
+
+@pytest.fixture
+def cache(loader, tmp_path):
+    return IssuingCardCache(loader, ttl=60, stale_ttl=600, signal_path=str(tmp_path / 'cards.signal'))
+
+
+def test_fresh_reads_are_served_from_memory(cache, loader):
+    assert [card['id'] for card in cache.cards()] == ['ic_1', 'ic_2']
+    assert [card['id'] for card in cache.cards('ich_1')] == ['ic_1', 'ic_2']
+    assert cache.cards('ich_other') == []
+    assert cache.cardholders()[0]['name'] == 'Ann'
+
+    assert loader.calls == 1
+    assert cache.info()['hits'] == 3
+
+
+def test_concurrent_cold_reads_share_one_load(cache, loader):
+    loader.release.clear()
+    threads = [threading.Thread(target=cache.cards) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    loader.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert loader.calls == 1
+
+
+def test_an_expired_snapshot_is_served_while_it_reloads(cache, loader):
+    cache.cards()
+    cache._snapshot.loaded -= 61
+    loader.cards.append({'id': 'ic_3', 'cardholder': 'ich_2'})
+
+    assert len(cache.cards()) == 2
+    assert settled(cache)['loads'] == 2
+    assert len(cache.cards()) == 3
+    assert cache.info()['stale_hits'] == 1
+
+
+def test_a_snapshot_past_stale_ttl_is_reloaded_in_the_foreground(cache, loader):
+    cache.cards()
+    cache._snapshot.loaded -= 601
+    loader.cards.append({'id': 'ic_3', 'cardholder': 'ich_2'})
+
+    assert len(cache.cards()) == 3
+    assert cache.info()['stale_hits'] == 0
+
+
+def test_a_failed_reload_keeps_the_previous_snapshot(cache, loader):
+    cache.cards()
+    loader.error = stripe.APIConnectionError('unreachable')
+    cache.invalidate()
+
+    info = settled(cache)
+    assert info['failures'] == 1 and info['last_error'] == 'unreachable' and info['stale']
+    assert len(cache.cards()) == 2
+
+    loader.error = None
+    settled(cache)
+    assert cache.info()['last_error'] is None
+
+
+def test_a_cold_load_failure_raises(cache, loader):
+    loader.error = stripe.APIConnectionError('unreachable')
+
+    with pytest.raises(stripe.APIConnectionError):
+        cache.cards()
+
+
+def test_invalidation_reaches_other_workers_through_the_signal_file(cache, loader):
+    other = IssuingCardCache(loader, ttl=60, stale_ttl=600, signal_path=cache.signal_path)
+    cache.cards()
+    other.cards()
+    loader.cards.append({'id': 'ic_3', 'cardholder': 'ich_2'})
+
+    cache.invalidate()
+    settled(cache)
+    assert len(cache.cards()) == 3
+
+    assert len(other.cards()) == 2
+    settled(other)
+    assert len(other.cards()) == 3
+    assert other.info()['stale_hits'] == 1
+
+
+def test_expanded_cardholders_are_stored_by_id():
+    card = simplify_card({'id': 'ic_1', 'cardholder': {'id': 'ich_9', 'name': 'Ann'}, 'last4': '4242'})
+
+    assert card['cardholder'] == 'ich_9'
+    assert card['last4'] == '4242' and card['brand'] == 'Visa'
+
+
+def signed(event):
+    payload = json.dumps(event)
+    timestamp = int(time.time())
+    signature = hmac.new(WEBHOOK_SECRET.encode(), f'{timestamp}.{payload}'.encode(), hashlib.sha256).hexdigest()
+    return payload, {'Stripe-Signature': f't={timestamp},v1={signature}', 'Content-Type': 'application/json'}
+
+
+@pytest.fixture
+def client(cache, monkeypatch):
+    monkeypatch.setenv('STRIPE_WEBHOOK_SECRET', WEBHOOK_SECRET)
+    monkeypatch.setattr(stripe_card_cache, '_card_cache', cache)
+    app = Flask(__name__)
+    app.register_blueprint(stripe_payments.stripe_bp, url_prefix='/api/stripe')
+    return app.test_client()
+
+
+@pytest.mark.parametrize('event_type,invalidated', [
+    ('issuing_card.updated', True),
+    ('issuing_cardholder.created', True),
+    ('payment_intent.succeeded', False),
+])
+def test_issuing_webhook_invalidates_on_card_events(client, cache, event_type, invalidated):
+    payload, headers = signed({'id': 'evt_1', 'object': 'event', 'type': event_type, 'data': {'object': {}}})
+    response = client.post('/api/stripe/webhooks/issuing', data=payload, headers=headers)
+
+    assert response.status_code == 200
+    assert response.get_json() == {'success': True, 'type': event_type, 'invalidated': invalidated}
+    assert cache.info()['invalidations'] == int(invalidated)
+
+
+def test_issuing_webhook_rejects_a_bad_signature(client, cache):
+    payload, headers = signed({'id': 'evt_1', 'object': 'event', 'type': 'issuing_card.updated'})
+    headers['Stripe-Signature'] = f't={int(time.time())},v1={"0" * 64}'
+
+    assert client.post('/api/stripe/webhooks/issuing', data=payload, headers=headers).status_code == 400
+    assert cache.info()['invalidations'] == 0
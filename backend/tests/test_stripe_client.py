@@ -0,0 +1,95 @@
+"""Stripe transport: one pooled client per process, rebuilt after fork, reported without secrets."""
+
+import json
+from urllib.request import urlopen
+
+import pytest
+import stripe
+
+import stripe_client
+from stripe_client import (
+    PooledRequestsClient,
+    _after_fork,
+    configure_stripe,
+    get_stripe_http_client,
+    set_stripe_http_client,
+    stripe_client_info,
+)
+from stripe_mock_server import start_in_thread
+
+
+@pytest.fixture(autouse=True)
+def restore_stripe(monkeypatch):
+    """Put the SDK's process-wide settings back after each test."""
+    for name in ('api_key', 'api_base', 'max_network_retries', 'default_http_client'):
+        monkeypatch.setattr(stripe, name, getattr(stripe, name))
+    yield
+    configure_stripe(force=True)
+
+
+def test_pooled_client_shares_one_session_sized_by_configuration():
+    client = configure_stripe(api_key='sk_test_pool', pool_size=3, max_retries=4, force=True)
+
+    assert isinstance(client, PooledRequestsClient)
+    assert stripe.default_http_client is client
+    assert stripe.max_network_retries == 4
+    assert client._session.get_adapter('https://api.stripe.com')._pool_maxsize == 3
+    assert (client.connect_timeout, client.read_timeout) == (stripe_client.STRIPE_CONNECT_TIMEOUT,
+                                                             stripe_client.STRIPE_READ_TIMEOUT)
+    # First call wins: later calls without force keep the configured client
+    assert configure_stripe(pool_size=50) is client
+    assert get_stripe_http_client() is client
+
+
+def test_requests_reuse_pooled_connections():
+    server, api_base = start_in_thread()
+    try:
+        configure_stripe(api_key='sk_test_pool', api_base=api_base, force=True)
+        for _ in range(5):
+            stripe.PaymentIntent.create(amount=1000, currency='usd')
+        stats = json.load(urlopen(f'{api_base}/stats'))
+    finally:
+        server.shutdown()
+
+    assert stats['payment_intents_created'] == 5
+    # Five SDK requests over one kept-alive connection; urlopen opens its own
+    assert stats['connections'] == 2
+
+
+def test_after_fork_opens_a_fresh_pool():
+    parent = configure_stripe(api_key='sk_test_fork', pool_size=7, force=True)
+    _after_fork()
+    child = get_stripe_http_client()
+
+    assert child is not parent
+    assert isinstance(child, PooledRequestsClient) and child.pool_size == 7
+    assert stripe.default_http_client is child
+
+
+def test_after_fork_keeps_a_custom_client():
+    custom = stripe.RequestsClient()
+    set_stripe_http_client(custom)
+    _after_fork()
+
+    assert get_stripe_http_client() is custom
+    assert stripe.default_http_client is custom
+
+
+def test_client_info_reports_settings_without_the_key():
+    configure_stripe(api_key='sk_live_secret', api_base='http://127.0.0.1:12111', pool_size=5, max_retries=1,
+                     force=True)
+    info = stripe_client_info()
+
+    assert info == {
+        'configured': True,
+        'api_base': 'http://127.0.0.1:12111',
+        'live_key': True,
+        'max_retries': 1,
+        'client': 'PooledRequestsClient',
+        'pool_size': 5,
+        'connect_timeout': stripe_client.STRIPE_CONNECT_TIMEOUT,
+        'read_timeout': stripe_client.STRIPE_READ_TIMEOUT
+    }
+    assert 'sk_live_secret' not in json.dumps(info)
+    configure_stripe(api_key='sk_test_secret', force=True)
+    assert stripe_client_info()['live_key'] is False
@@ -0,0 +1,103 @@
+"""Stripe health: status reads never wait on the network, and probes run in the background."""
+
+import threading
+import time
+
+import pytest
+import stripe
+
+import solvy_connector
+from solvy_connector import SOLVYStripeConnector, StripeHealth
+
+
+class Probe:
+    """Stand-in for stripe.Balance.retrieve that can be held, failed and counted."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+        self.error = None
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+
+
+@pytest.fixture
+def probe(monkeypatch):
+    monkeypatch.setattr(stripe, 'api_key', 'sk_test_health')
+    return Probe()
+
+
+def settled(health, timeout=5):
+    """Snapshot once the running probe (if any) has finished."""
+    deadline = time.monotonic() + timeout
+    while health._probing and time.monotonic() < deadline:
+        time.sleep(0.005)
+    with health._lock:
+        return dict(status=health._status, error=health._error, probes=health.probes)
+
+
+def test_without_a_key_nothing_is_probed(monkeypatch):
+    monkeypatch.setattr(stripe, 'api_key', None)
+    probe = Probe()
+    health = StripeHealth(probe)
+
+    assert health.snapshot() == {'status': 'unconfigured', 'connected': False}
+    assert probe.calls == 0
+
+
+def test_reads_return_at_once_while_the_first_probe_runs(probe):
+    probe.release.clear()
+    health = StripeHealth(probe)
+
+    started = time.perf_counter()
+    snapshot = health.snapshot()
+    assert time.perf_counter() - started < 0.5
+    assert snapshot['status'] == 'pending' and snapshot['refreshing'] is True
+    assert health.connected is False
+
+    probe.release.set()
+    assert settled(health)['status'] == 'connected'
+    assert health.snapshot()['latency_ms'] is not None
+    assert health.connected is True
+
+
+def test_concurrent_reads_start_one_probe(probe):
+    probe.release.clear()
+    health = StripeHealth(probe)
+    for _ in range(20):
+        health.snapshot()
+    probe.release.set()
+
+    assert settled(health)['probes'] == 1
+    assert probe.calls == 1
+
+
+def test_success_is_cached_and_failure_is_retried(probe):
+    health = StripeHealth(probe, interval=60, retry=0)
+    health.refresh()
+    settled(health)
+    health.snapshot()
+    assert settled(health)['probes'] == 1
+
+    probe.error = stripe.APIConnectionError('unreachable')
+    health.refresh(force=True)
+    assert settled(health) == {'status': 'failed', 'error': 'unreachable', 'probes': 2}
+
+    probe.error = None
+    health.snapshot()
+    assert settled(health)['status'] == 'connected'
+    assert probe.calls == 3
+
+
+def test_connector_does_not_probe_when_created(probe, monkeypatch):
+    monkeypatch.setattr(stripe.Balance, 'retrieve', probe)
+    connector = SOLVYStripeConnector()
+
+    assert probe.calls == 0
+    assert isinstance(connector.health, solvy_connector.StripeHealth)
+    assert connector.health.probe is probe
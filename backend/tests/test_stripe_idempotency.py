@@ -0,0 +1,121 @@
+"""Payment intent idempotency: replay, conflicts, and no derived keys by default."""
+
+import itertools
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+import stripe
+from flask import Flask
+
+from api import stripe_payments
+from ttl_cache import MemoryTTLCache
+
+
+@pytest.fixture
+def stripe_calls(monkeypatch):
+    """Stub PaymentIntent.create/confirm; returns the list of calls made."""
+    calls = []
+    ids = itertools.count(1)
+    lock = threading.Lock()
+
+    def create(**params):
+        time.sleep(0.05)
+        with lock:
+            calls.append(('create', params))
+            n = next(ids)
+        return SimpleNamespace(id=f'pi_{n}', client_secret=f'pi_{n}_secret')
+
+    def confirm(intent_id, **params):
+        with lock:
+            calls.append(('confirm', dict(params, intent_id=intent_id)))
+        return SimpleNamespace(id=intent_id, status='succeeded')
+
+    monkeypatch.setattr(stripe.PaymentIntent, 'create', create)
+    monkeypatch.setattr(stripe.PaymentIntent, 'confirm', confirm)
+    monkeypatch.setattr(stripe_payments, 'STRIPE_SECRET_KEY', 'sk_test_idempotency')
+    monkeypatch.setattr(stripe_payments, '_intent_results', MemoryTTLCache(maxsize=64, ttl=600))
+    return calls
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(stripe_payments.stripe_bp, url_prefix='/api/stripe')
+    return app.test_client()
+
+
+def create(client, amount, key=None):
+    headers = {'Idempotency-Key': key} if key else {}
+    return client.post('/api/stripe/create-payment-intent', json={'amount': amount, 'currency': 'usd'},
+                       headers=headers)
+
+
+def test_retry_with_same_key_is_replayed(client, stripe_calls):
+    first = create(client, 2000, 'attempt-1').get_json()
+    retry = create(client, 2000, 'attempt-1').get_json()
+
+    assert first['replayed'] is False
+    assert retry['replayed'] is True
+    assert retry['id'] == first['id']
+    assert retry['client_secret'] == first['client_secret']
+    assert len(stripe_calls) == 1
+    assert stripe_calls[0][1]['idempotency_key'] == first['idempotency_key']
+
+
+def test_same_key_with_different_amount_conflicts(client, stripe_calls):
+    create(client, 2000, 'attempt-1')
+    conflict = create(client, 3000, 'attempt-1')
+
+    assert conflict.status_code == 409
+    assert conflict.get_json()['success'] is False
+    assert len(stripe_calls) == 1
+
+
+def test_concurrent_duplicates_make_one_call(client, stripe_calls):
+    barrier = threading.Barrier(5)
+    results = []
+
+    def submit():
+        barrier.wait()
+        results.append(create(client, 2000, 'attempt-1').get_json())
+
+    threads = [threading.Thread(target=submit) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(stripe_calls) == 1
+    assert {result['id'] for result in results} == {'pi_1'}
+    assert sorted(result['replayed'] for result in results) == [False] + [True] * 4
+
+
+def test_payments_without_a_key_are_not_merged(client, stripe_calls):
+    first = create(client, 2000).get_json()
+    second = create(client, 2000).get_json()
+
+    assert first['id'] != second['id']
+    assert 'replayed' not in second
+    assert [call[1]['idempotency_key'] for call in stripe_calls] == [None, None]
+
+
+def test_confirm_is_never_replayed_without_a_client_key(client, stripe_calls, monkeypatch):
+    # Even with the derived-key window switched on
+    monkeypatch.setattr(stripe_payments, 'STRIPE_IDEMPOTENCY_WINDOW', 60)
+    for _ in range(2):
+        body = client.post('/api/stripe/confirm-payment-intent', json={'intent_id': 'pi_9'}).get_json()
+        assert body['status'] == 'succeeded'
+    assert [call[0] for call in stripe_calls] == ['confirm', 'confirm']
+
+
+def test_derived_window_dedupes_creates_when_enabled(client, stripe_calls, monkeypatch):
+    # Long window, so both requests land in the same slot
+    monkeypatch.setattr(stripe_payments, 'STRIPE_IDEMPOTENCY_WINDOW', 3600)
+    first = create(client, 2000).get_json()
+    retry = create(client, 2000).get_json()
+
+    assert retry['id'] == first['id']
+    assert retry['replayed'] is True
+    assert len(stripe_calls) == 1
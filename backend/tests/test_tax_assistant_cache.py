@@ -0,0 +1,66 @@
+"""TaxAssistant result cache: bounded LRU, read-only results, dropped when the tables change."""
+
+import json
+
+import pytest
+
+from tax_calculations import FrozenDict, ScenarioCache, TaxAssistant, freeze, reload_bracket_tables
+
+
+def test_frozen_results_are_read_only_but_copyable():
+    value = freeze({'total': 1, 'brackets': [{'rate': '10%'}]})
+
+    assert isinstance(value, FrozenDict)
+    assert value['brackets'] == ({'rate': '10%'},)
+    for mutate in (lambda: value.__setitem__('total', 2), lambda: value.update(total=2), value.clear,
+                   lambda: value['brackets'][0].pop('rate')):
+        with pytest.raises(TypeError, match='read-only'):
+            mutate()
+
+    copy = dict(value)
+    copy['total'] = 2
+    assert value['total'] == 1
+    assert json.loads(json.dumps(value)) == {'total': 1, 'brackets': [{'rate': '10%'}]}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ScenarioCache(maxsize=2)
+    computed = []
+
+    def compute(key):
+        return lambda: computed.append(key) or {'key': key}
+
+    for key in ('a', 'b', 'a', 'c', 'a', 'b'):
+        cache.get_or_compute(key, compute(key))
+
+    assert computed == ['a', 'b', 'c', 'b']
+    assert cache.info() == {'hits': 2, 'misses': 4, 'evictions': 2, 'size': 2, 'maxsize': 2, 'hit_rate': 0.3333}
+
+
+def test_equivalent_requests_share_one_entry():
+    assistant = TaxAssistant(cache_size=16)
+    first = assistant.calculate_marginal_tax('85000', 'single', tax_year='')
+    second = assistant.calculate_marginal_tax(85000.0, 'single', tax_year=None)
+
+    assert second is first
+    assert assistant.cache_info()['hits'] == 1
+    uncached = TaxAssistant().calculate_marginal_tax(85000, 'single')
+    assert json.loads(json.dumps(first)) == json.loads(json.dumps(uncached))
+    assert assistant.calculate_marginal_tax(85000, 'single', details=False) is not first
+
+
+def test_reloading_tables_empties_the_cache():
+    assistant = TaxAssistant(cache_size=16)
+    first = assistant.calculate_marginal_tax(85000, 'single')
+    reload_bracket_tables()
+
+    assert assistant.calculate_marginal_tax(85000, 'single') is not first
+    assert assistant.cache_info()['size'] == 1
+
+
+def test_cache_can_be_disabled():
+    assistant = TaxAssistant(cache_size=0)
+    result = assistant.calculate_marginal_tax(85000, 'single')
+
+    assert assistant.cache_info() is None
+    assert not isinstance(result, FrozenDict)
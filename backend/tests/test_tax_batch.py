@@ -0,0 +1,117 @@
+"""Batch tax engine must agree with the scalar calculators to the cent."""
+
+import json
+
+import pytest
+
+from tax_batch import (
+    calculate_income_tax_batch,
+    calculate_self_employment_batch,
+    calculate_w2_scenario_batch,
+    optimize_tax_mix_batch,
+    stream_w2_scenarios,
+    sweep_w2_vs_self_employment,
+)
+from tax_calculations import (
+    calculate_income_tax,
+    calculate_self_employment_scenario,
+    calculate_w2_scenario,
+    optimize_tax_mix,
+    solve_break_even_expenses,
+)
+
+INCOMES = [0, 1, 9999.99, 23200, 23200.01, 50000, 94300, 187654.32, 250000, 731200, 1500000]
+STATUSES = ['single', 'married_jointly', 'head_of_household']
+W2_FIELDS = ('standard_deduction', 'taxable_income', 'income_tax', 'fica_tax', 'child_tax_credit', 'total_tax',
+             'effective_tax_rate', 'take_home_pay')
+SE_FIELDS = ('net_income', 'self_employment_tax', 'se_tax_deduction', 'agi', 'taxable_income', 'income_tax',
+             'child_tax_credit', 'total_tax', 'effective_tax_rate', 'take_home_pay', 'quarterly_estimated_payment')
+
+
+@pytest.mark.parametrize('status', STATUSES)
+def test_income_tax_matches_scalar(status):
+    batch = calculate_income_tax_batch(INCOMES, status)
+    for i, income in enumerate(INCOMES):
+        scalar = calculate_income_tax(income, status)
+        assert batch['total_income_tax'][i] == scalar['total_income_tax']
+        assert batch['effective_rate'][i] == scalar['effective_rate']
+
+
+@pytest.mark.parametrize('status', STATUSES)
+@pytest.mark.parametrize('dependents', [0, 2])
+def test_w2_scenario_matches_scalar(status, dependents):
+    batch = calculate_w2_scenario_batch(INCOMES, status, dependents)
+    for i, income in enumerate(INCOMES):
+        scalar = calculate_w2_scenario(income, status, dependents, details=False)
+        for field in W2_FIELDS:
+            assert batch[field][i] == scalar[field], (income, field)
+
+
+@pytest.mark.parametrize('status', STATUSES)
+def test_self_employment_matches_scalar(status):
+    expenses = [0, 500, 12000]
+    for spend in expenses:
+        batch = calculate_self_employment_batch(INCOMES, spend, status, 1, 0, 3000)
+        for i, income in enumerate(INCOMES):
+            scalar = calculate_self_employment_scenario(income, spend, status, 1, sep_ira_contribution=3000,
+                                                        details=False)
+            for field in SE_FIELDS:
+                assert batch[field][i] == scalar[field], (income, spend, field)
+
+
+def test_mixed_statuses_in_one_batch():
+    statuses = [STATUSES[i % len(STATUSES)] for i in range(len(INCOMES))]
+    batch = calculate_w2_scenario_batch(INCOMES, statuses)
+    for i, (income, status) in enumerate(zip(INCOMES, statuses)):
+        assert batch['total_tax'][i] == calculate_w2_scenario(income, status, details=False)['total_tax']
+
+
+@pytest.mark.parametrize('income', [-1000, 0, 40000, 120000, 400000])
+@pytest.mark.parametrize('cap', [0, 5000, 60000])
+def test_optimize_tax_mix_matches_scalar(income, cap):
+    batch = optimize_tax_mix_batch([income], [cap], 'single', 2)
+    scalar = optimize_tax_mix(income, cap, 'single', 2)
+    for field in ('business_expenses', 'sep_ira_contribution', 'taxable_income', 'total_tax', 'baseline_total_tax',
+                  'tax_savings', 'take_home_pay'):
+        assert batch[field][0] == pytest.approx(scalar[field], abs=0.005), field
+
+
+def test_sweep_handles_zero_income():
+    sweep = sweep_w2_vs_self_employment([0, 50000], [0, 10000], filing_status='single')
+    assert sweep['break_even_expenses'][0] == [0.0]
+    assert sweep['break_even_expenses'][1] == [solve_break_even_expenses(50000, 'single')]
+    assert sweep['w2_total_tax'][0] == 0
+
+
+def test_break_even_equalizes_total_tax():
+    for income in (30000, 80000, 200000):
+        expenses = solve_break_even_expenses(income, 'married_jointly', 1)
+        w2 = calculate_w2_scenario(income, 'married_jointly', 1, details=False)['total_tax']
+        se = calculate_self_employment_scenario(income, expenses, 'married_jointly', 1, details=False)['total_tax']
+        assert se == pytest.approx(w2, abs=0.02)
+
+
+def test_stream_reports_non_finite_incomes_per_row():
+    rows = [{'income': float('nan')}, [float('inf'), 'single'], {'income': 50000}]
+    records = list(stream_w2_scenarios(rows, chunk_size=2))
+
+    assert [record['success'] for record in records] == [False, False, True]
+    assert records[2]['total_tax'] == calculate_w2_scenario(50000, 'single', details=False)['total_tax']
+    json.dumps(records, allow_nan=False)
+
+
+def test_missing_status_is_single_and_unknown_status_is_rejected():
+    batch = calculate_income_tax_batch([100000, 100000, 100000], ['single', None, ''])
+    assert batch['total_income_tax'].tolist() == [calculate_income_tax(100000, 'single')['total_income_tax']] * 3
+
+    with pytest.raises(ValueError, match='Unknown filing status: married_separately'):
+        calculate_w2_scenario_batch([50000, 50000], ['single', 'married_separately'])
+
+
+def test_stream_reports_unknown_status_per_row():
+    rows = [{'income': 50000, 'filing_status': 'bogus'}, {'income': 50000, 'filing_status': None}]
+    records = list(stream_w2_scenarios(rows))
+
+    assert records[0] == {'index': 0, 'success': False, 'error': 'Unknown filing status: bogus'}
+    assert records[1]['filing_status'] == 'single'
+    assert records[1]['total_tax'] == calculate_w2_scenario(50000, 'single', details=False)['total_tax']
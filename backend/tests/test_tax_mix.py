@@ -0,0 +1,73 @@
+"""Closed-form expense / SEP IRA mix: no grid point beats it, and every limit is respected."""
+
+import pytest
+
+from tax_calculations import SEP_IRA_RATE, SE_AGI_FACTOR, calculate_self_employment_scenario, optimize_tax_mix
+from tax_tables import get_tax_year
+
+
+def se_tax(income, expenses, status, dependents, sep):
+    return calculate_self_employment_scenario(income, expenses, status, dependents, sep_ira_contribution=sep,
+                                              details=False)['total_tax']
+
+
+@pytest.mark.parametrize('income,cap,status,dependents,budget', [
+    (60000, 10000, 'single', 0, None),
+    (150000, 40000, 'married_jointly', 2, 50000),
+    (45000, 5000, 'head_of_household', 3, None),
+])
+def test_no_grid_point_beats_the_closed_form_mix(income, cap, status, dependents, budget):
+    mix = optimize_tax_mix(income, cap, status, dependents, budget=budget)
+    available = float('inf') if budget is None else budget
+
+    for expenses in range(0, cap + 1, cap // 10):
+        for sep in range(0, int(mix['sep_ira_limit']) + 1, 1000):
+            if expenses + sep <= available:
+                assert mix['total_tax'] <= se_tax(income, expenses, status, dependents, sep) + 0.01
+
+
+def test_expenses_come_before_the_sep_ira_within_the_budget():
+    mix = optimize_tax_mix(200000, expense_cap=30000, filing_status='single', budget=35000)
+
+    assert mix['business_expenses'] == 30000
+    assert mix['sep_ira_contribution'] == 5000
+    assert mix['total_tax'] == se_tax(200000, 30000, 'single', 0, 5000)
+    assert mix['tax_savings'] == round(mix['baseline_total_tax'] - mix['total_tax'], 2)
+
+
+def test_sep_ira_is_held_to_the_statutory_and_caller_limits():
+    year = get_tax_year(None)
+    high = optimize_tax_mix(1000000, filing_status='single')
+    assert high['sep_ira_contribution'] == year.sep_ira_dollar_limit
+
+    mid = optimize_tax_mix(100000, filing_status='single')
+    assert mid['sep_ira_contribution'] == round(100000 * SE_AGI_FACTOR * SEP_IRA_RATE, 2)
+
+    assert optimize_tax_mix(100000, filing_status='single', sep_limit=2500)['sep_ira_contribution'] == 2500
+
+
+def test_sep_ira_stops_once_the_child_credit_covers_income_tax():
+    mix = optimize_tax_mix(40000, filing_status='married_jointly', dependents=3)
+
+    assert mix['sep_ira_contribution'] < mix['sep_ira_limit']
+    assert mix['marginal_savings_per_dollar']['sep_ira'] == 0
+    assert se_tax(40000, 0, 'married_jointly', 3, mix['sep_ira_contribution'] + 1000) == mix['total_tax']
+
+
+def test_marginal_savings_match_one_more_dollar():
+    mix = optimize_tax_mix(120000, expense_cap=10000, filing_status='single', sep_limit=3000)
+    rates = mix['marginal_savings_per_dollar']
+    expenses, sep = mix['business_expenses'], mix['sep_ira_contribution']
+
+    saved_by_expense = (se_tax(120000, expenses, 'single', 0, sep) - se_tax(120000, expenses + 100, 'single', 0, sep))
+    saved_by_sep = (se_tax(120000, expenses, 'single', 0, sep) - se_tax(120000, expenses, 'single', 0, sep + 100))
+    assert saved_by_expense / 100 == pytest.approx(rates['business_expenses'], abs=0.001)
+    assert saved_by_sep / 100 == pytest.approx(rates['sep_ira'], abs=0.001)
+    assert rates['business_expenses'] > rates['sep_ira']
+
+
+def test_no_income_has_nothing_to_optimize():
+    mix = optimize_tax_mix(0, expense_cap=5000)
+
+    assert mix['business_expenses'] == mix['sep_ira_contribution'] == mix['total_tax'] == 0
+    assert mix['marginal_savings_per_dollar'] == {'business_expenses': 0.0, 'sep_ira': 0.0}
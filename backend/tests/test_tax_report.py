@@ -0,0 +1,74 @@
+"""Lean results and opt-in bracket details agree with the full output; the report renders only on request."""
+
+import pytest
+
+from app_production import app
+from tax_calculations import (
+    SelfEmploymentResult,
+    W2Result,
+    calculate_self_employment_scenario,
+    calculate_w2_scenario,
+    compare_w2_vs_self_employment,
+    print_comparison_report,
+)
+from tax_report import render_comparison_report
+
+
+def test_lean_results_are_the_unrounded_full_results():
+    full = calculate_w2_scenario(87654.321, 'single', 1)
+    lean = calculate_w2_scenario(87654.321, 'single', 1, lean=True)
+    assert isinstance(lean, W2Result)
+    for field, value in lean._asdict().items():
+        if field in full:
+            assert round(value, 2) == full[field], field
+
+    full = calculate_self_employment_scenario(87654.321, 4321.5, 'head_of_household', 2, sep_ira_contribution=3000)
+    lean = calculate_self_employment_scenario(87654.321, 4321.5, 'head_of_household', 2, sep_ira_contribution=3000,
+                                              lean=True)
+    assert isinstance(lean, SelfEmploymentResult)
+    for field, value in lean._asdict().items():
+        if field in full:
+            assert round(value, 2) == full[field], field
+
+
+def test_details_false_only_drops_the_bracket_breakdown():
+    full = calculate_w2_scenario(120000, 'married_jointly')
+    short = calculate_w2_scenario(120000, 'married_jointly', details=False)
+
+    assert 'bracket_details' in full and 'bracket_details' not in short
+    assert {k: v for k, v in full.items() if k != 'bracket_details'} == short
+
+
+def test_printed_report_is_the_rendered_report(capsys):
+    comparison = compare_w2_vs_self_employment(75000, 8000, 'single', 1, ibc_contribution=2000,
+                                               sep_ira_contribution=4000)
+    print_comparison_report(comparison)
+    report = render_comparison_report(comparison)
+
+    assert capsys.readouterr().out == report
+    assert 'W-2 EMPLOYEE SCENARIO' in report and 'SELF-EMPLOYMENT SCENARIO' in report
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def test_calculate_endpoint_sends_bracket_details_only_when_asked(client):
+    body = {'income': 90000, 'filing_status': 'single'}
+
+    assert 'bracket_details' not in client.post('/api/tax/calculate', json=body).get_json()['data']
+    assert 'bracket_details' in client.post('/api/tax/calculate?details=true', json=body).get_json()['data']
+    assert 'bracket_details' in client.post('/api/tax/calculate', json={**body, 'details': True}).get_json()['data']
+
+
+def test_compare_endpoint_returns_json_or_the_text_report(client):
+    body = {'income': 75000, 'business_expenses': 8000, 'filing_status': 'single', 'dependents': 1}
+
+    data = client.post('/api/tax/compare', json=body).get_json()['data']
+    assert data == compare_w2_vs_self_employment(75000, 8000, 'single', 1, details=False)
+
+    response = client.post('/api/tax/compare?format=report', json=body)
+    assert response.mimetype == 'text/plain'
+    assert response.get_data(as_text=True) == render_comparison_report(
+        compare_w2_vs_self_employment(75000, 8000, 'single', 1, details=False))
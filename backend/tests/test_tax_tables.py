@@ -0,0 +1,72 @@
+"""Tax tables: lazy loading per year, the default year, and bisect lookups against a bracket walk."""
+
+import pytest
+
+import tax_tables
+from tax_calculations import calculate_income_tax, normalize_tax_year
+from tax_tables import DEFAULT_TAX_YEAR, available_tax_years, get_tax_year
+
+
+@pytest.mark.parametrize('missing', [None, ''])
+def test_missing_year_means_the_default_everywhere(missing):
+    assert normalize_tax_year(missing) == DEFAULT_TAX_YEAR
+    assert get_tax_year(missing) is get_tax_year(DEFAULT_TAX_YEAR)
+    assert calculate_income_tax(80000, 'single', tax_year=missing) == calculate_income_tax(80000, 'single')
+
+
+def test_years_load_from_data_files_on_first_use(monkeypatch):
+    monkeypatch.setattr(tax_tables, '_registry', {})
+
+    assert available_tax_years() == [2024, 2025, 2026]
+    tables = get_tax_year('2025')
+    assert tables.tax_year == 2025
+    assert get_tax_year(2025) is tables
+    assert list(tax_tables._registry) == [2025]
+
+
+def test_unknown_year_lists_the_available_ones():
+    with pytest.raises(ValueError, match=r'No tax tables for 1999; available years: \[2024, 2025, 2026'):
+        get_tax_year(1999)
+
+
+def walk_brackets(table, income):
+    """Reference tax: walk every bracket from the bottom, as the calculator used to."""
+    tax = 0.0
+    for lower, limit, rate in zip(table.lowers, table.limits, table.rates):
+        if income > lower:
+            tax += (min(income, limit) - lower) * rate
+    return tax
+
+
+@pytest.mark.parametrize('status', ['single', 'married_jointly', 'head_of_household'])
+def test_bisect_lookup_matches_walking_the_brackets(status):
+    table = get_tax_year(2024).bracket_table(status)
+    boundaries = [limit + delta for limit in table.limits[:-1] for delta in (-0.01, 0, 0.01)]
+    for income in [0, 1, 5000.5, 75000, 1000000] + boundaries:
+        assert table.income_tax(income) == pytest.approx(walk_brackets(table, income), abs=1e-6), income
+        assert sum(row['tax'] for row in table.bracket_details(income)) == pytest.approx(
+            walk_brackets(table, income), abs=0.01 * len(table.limits))
+
+
+def test_cumulative_tax_is_the_tax_owed_at_each_threshold():
+    table = get_tax_year(2024).bracket_table('single')
+
+    assert table.cumulative_tax[0] == 0
+    for i, lower in enumerate(table.lowers):
+        assert table.cumulative_tax[i] == pytest.approx(walk_brackets(table, lower))
+
+
+def test_income_on_a_threshold_stays_in_the_lower_bracket():
+    table = get_tax_year(2024).bracket_table('single')
+    limit = table.limits[0]
+
+    assert table.bracket_index(limit) == 0
+    assert table.bracket_index(limit + 0.01) == 1
+    assert table.marginal_rate(limit) == table.rates[0]
+    assert table.marginal_rate(0) == 0
+
+
+def test_taxable_income_for_tax_inverts_income_tax():
+    table = get_tax_year(2024).bracket_table('married_jointly')
+    for income in [0, 10000, 23200, 94300, 250000, 2000000]:
+        assert table.taxable_income_for_tax(table.income_tax(income)) == pytest.approx(income)
@@ -0,0 +1,90 @@
+"""
+SOLVY TTL Cache - Bounded in-memory cache with expiry
+=====================================================
+
+Purpose: One small, thread-safe TTL + LRU cache for results that are
+expensive to recompute or must not be repeated within a window (Kimi
+replies, Stripe payment intents keyed by idempotency key).
+
+How it works:
+- Entries expire after a TTL; the least recently used entry is evicted
+  once the cache is full
+- Values are dicts, copied on the way in and out so callers can't mutate
+  a cached entry
+- info() reports hits, misses, stores, evictions, expirations and hit rate
+  (cache_stats builds the same dict for other backends)
+
+Author: SOLVY Platform
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+def cache_stats(hits, misses, stores, evictions, expirations, size, maxsize, ttl, backend):
+    lookups = hits + misses
+    return {
+        'backend': backend,
+        'hits': hits,
+        'misses': misses,
+        'stores': stores,
+        'evictions': evictions,
+        'expirations': expirations,
+        'size': size,
+        'maxsize': maxsize,
+        'ttl': ttl,
+        'hit_rate': round(hits / lookups, 4) if lookups else 0.0
+    }
+
+
+class MemoryTTLCache:
+    """
+    Per-process TTL + LRU cache of dict values (copied in and out).
+
+    Args:
+        maxsize: Entries kept before the least recently used is evicted
+        ttl: Seconds an entry stays valid
+    """
+
+    backend = 'memory'
+
+    def __init__(self, maxsize=1024, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.stores = self.evictions = self.expirations = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, dict(value))
+            self._entries.move_to_end(key)
+            self.stores += 1
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        with self._lock:
+            return cache_stats(self.hits, self.misses, self.stores, self.evictions, self.expirations,
+                          len(self._entries), self.maxsize, self.ttl, self.backend)
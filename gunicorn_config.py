@@ -13,7 +13,13 @@ backlog = 2048
 
 # Worker processes
 workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
+# Streamed support replies (/api/support/kimi SSE) hold their connection for
+# the whole reply; threaded workers keep one slow chat from pinning a process.
+# Set GUNICORN_WORKER_CLASS=gevent (pip install gevent) for many concurrent streams,
+# or serve kimi_asgi:app with GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker
+# to run support chat on an event loop (threads are then unused).
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
 worker_connections = 1000
 timeout = 30
 keepalive = 2